@@ -8,8 +8,11 @@
 import errno
 import logging
 import os
+import shutil
+import signal
 import subprocess
 import sys
+import tempfile
 import threading
 
 from benchexec import __version__
@@ -17,12 +20,20 @@ from benchexec import util
 
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
 
+_POSIX_SPAWN_CHILD_SETUP = {
+    util.dummy_fn: {},
+    os.setpgrp: {"setpgroup": 0},
+    os.setsid: {"setsid": True},
+}
+"""Functions for child_setup_fn that can be replaced with these arguments
+for os.posix_spawn(), such that the child process does not need to execute Python."""
 
-def add_basic_executor_options(argument_parser):
+
+def add_basic_executor_options(argument_parser, args_required=True):
     """Add some basic options for an executor to an argparse argument_parser."""
     argument_parser.add_argument(
         "args",
-        nargs="+",
+        nargs="+" if args_required else "*",
         metavar="ARG",
         help='command line to run (prefix with "--" to ensure all arguments are treated correctly)',
     )
@@ -60,6 +71,10 @@ class BaseExecutor(object):
         where files created by the tool are stored."""
         return temp_dir
 
+    def _create_temp_dir(self):
+        """Create the temp directory for a run, which the caller needs to delete."""
+        return tempfile.mkdtemp(prefix="BenchExec_run_")
+
     def _start_execution(
         self,
         args,
@@ -78,7 +93,9 @@ class BaseExecutor(object):
         @param parent_setup_fn a function without parameters that is called in the parent process
             immediately before the tool is started
         @param child_setup_fn a function without parameters that is called in the child process
-            before the tool is started
+            before the tool is started (if it is one of the functions in
+            _POSIX_SPAWN_CHILD_SETUP, the tool is started with os.posix_spawn()
+            instead of forking this process if possible)
         @param parent_cleanup_fn a function that is called in the parent process
             immediately after the tool terminated, with three parameters:
             the result of parent_setup_fn, the result of the executed process as ProcessExitCode,
@@ -110,26 +127,106 @@ class BaseExecutor(object):
 
         parent_setup = parent_setup_fn()
 
-        p = subprocess.Popen(
-            args,
-            stdin=stdin,
-            stdout=stdout,
-            stderr=stderr,
-            env=env,
-            cwd=cwd,
-            close_fds=True,
-            preexec_fn=pre_subprocess,
+        pid = self._spawn_process(
+            args, stdin, stdout, stderr, env, cwd, cgroups, child_setup_fn
         )
+        if pid is None:
+            pid = subprocess.Popen(
+                args,
+                stdin=stdin,
+                stdout=stdout,
+                stderr=stderr,
+                env=env,
+                cwd=cwd,
+                close_fds=True,
+                preexec_fn=pre_subprocess,
+            ).pid
 
         def wait_and_get_result():
-            exitcode, ru_child = self._wait_for_process(p.pid, args[0])
+            exitcode, ru_child = self._wait_for_process(pid, args[0])
 
             parent_cleanup = parent_cleanup_fn(
                 parent_setup, util.ProcessExitCode.from_raw(exitcode), ""
             )
             return exitcode, ru_child, parent_cleanup
 
-        return p.pid, wait_and_get_result
+        return pid, wait_and_get_result
+
+    def _spawn_process(
+        self, args, stdin, stdout, stderr, env, cwd, cgroups, child_setup_fn
+    ):
+        """
+        Start a process like subprocess.Popen() in _start_execution() would,
+        but with os.posix_spawn(), which does not copy the memory mappings of this
+        (potentially large and multi-threaded) process and does not execute Python code
+        in the child process. Only file descriptors that are inheritable are
+        inherited by the child process, but Python creates all file descriptors
+        as non-inheritable by default.
+        The child process is started directly inside the given cgroups
+        by moving the current thread into them while starting the process.
+        @return: the PID of the new process, or None if it could not be started
+            with os.posix_spawn() and subprocess.Popen() needs to be used
+        """
+        spawn_args = _POSIX_SPAWN_CHILD_SETUP.get(child_setup_fn)
+        if spawn_args is None or not hasattr(os, "posix_spawn"):
+            return None
+        if cgroups.paths and not cgroups.can_join_single_thread:
+            return None
+        if cwd is not None and os.path.realpath(cwd) != os.getcwd():
+            # os.posix_spawn() cannot change the working directory of the child
+            return None
+        executable = args[0]
+        if not os.path.dirname(executable):
+            # Like subprocess.Popen(), we look up the executable in the new PATH
+            path = os.pathsep.join(os.get_exec_path(env))
+            executable = shutil.which(executable, path=path)
+            if executable is None:
+                raise FileNotFoundError(
+                    errno.ENOENT, os.strerror(errno.ENOENT), args[0]
+                )
+
+        fds_to_close = []
+        try:
+            file_actions = []
+            for child_fd, stream in enumerate([stdin, stdout, stderr]):
+                if stream is None:
+                    continue
+                elif stream == subprocess.DEVNULL:
+                    fd = os.open(os.devnull, os.O_RDWR)
+                    fds_to_close.append(fd)
+                elif isinstance(stream, int):
+                    fd = stream
+                else:
+                    fd = stream.fileno()
+                if fd < 3 and fd != child_fd:
+                    # fd could be overwritten by a previous file action
+                    fd = os.dup(fd)
+                    fds_to_close.append(fd)
+                if fd != child_fd:
+                    file_actions.append((os.POSIX_SPAWN_DUP2, fd, child_fd))
+
+            leave_cgroups = util.dummy_fn
+            if cgroups.paths:
+                try:
+                    leave_cgroups = cgroups.join_current_thread()
+                except OSError as e:
+                    logging.debug("Cannot use posix_spawn for starting run: %s", e)
+                    return None
+            try:
+                return os.posix_spawn(
+                    executable,
+                    args,
+                    env,
+                    file_actions=file_actions,
+                    # subprocess.Popen() does the same with restore_signals=True
+                    setsigdef=(signal.SIGPIPE, signal.SIGXFSZ),
+                    **spawn_args,
+                )
+            finally:
+                leave_cgroups()
+        finally:
+            for fd in fds_to_close:
+                os.close(fd)
 
     def _wait_for_process(self, pid, name):
         """Wait for the given process to terminate.
@@ -20,6 +20,7 @@ from benchexec import __version__
 from benchexec import BenchExecException
 from benchexec.model import Benchmark
 from benchexec.outputhandler import OutputHandler
+from benchexec import sharding
 from benchexec import util
 
 _BYTE_FACTOR = 1000  # byte in kilobyte
@@ -133,6 +134,40 @@ class BenchExec(object):
             metavar="TASKS",
         )
 
+        parser.add_argument(
+            "--shard",
+            type=sharding.parse_shard,
+            metavar="K/N",
+            help="""
+                Split the runs of the benchmark into N shards (e.g., for N machines)
+                and execute only shard K of them.
+                The results of all shards can be combined with --merge-shards.
+            """,
+        )
+
+        parser.add_argument(
+            "--merge-shards",
+            dest="merge_shards",
+            action="append",
+            metavar="DIR",
+            help="""
+                Do not execute runs, but merge the results of all shards
+                of this benchmark, which were written to the given output directories
+                (specify this option once for each shard).
+            """,
+        )
+
+        parser.add_argument(
+            "--coordinator",
+            type=util.parse_address,
+            metavar="[HOST:]PORT",
+            help="""
+                Do not execute runs locally, but distribute them to worker daemons
+                (benchexec-worker) that connect to this address
+                (HOST defaults to localhost, use 0.0.0.0 to accept remote workers).
+            """,
+        )
+
         parser.add_argument(
             "--tool-directory",
             help="""
@@ -219,6 +254,129 @@ class BenchExec(object):
             metavar="n",
         )
 
+        parser.add_argument(
+            "--pipeline-run-sets",
+            dest="pipeline_run_sets",
+            action="store_true",
+            help="""
+                Start runs of the next run set as soon as cores become free,
+                instead of waiting until all runs of the current run set are finished
+                (only for local execution, useful with --numOfThreads)
+            """,
+        )
+
+        parser.add_argument(
+            "--worker-processes",
+            dest="worker_processes",
+            action="store_true",
+            help="""
+                Execute runs from separate worker processes (one per parallel run)
+                instead of from threads of the main process
+                (only for local execution, useful with high values of --numOfThreads)
+            """,
+        )
+
+        parser.add_argument(
+            "--memory-admission-margin",
+            dest="memory_admission_margin",
+            type=util.parse_memory_value,
+            metavar="BYTES",
+            help="""
+                Start a further parallel run only if at least this amount of memory
+                is free according to the measured memory usage of the running runs
+                and the system neither swaps nor is under memory pressure,
+                instead of requiring that the memory limits of all parallel runs fit
+                into the memory (only for local execution)
+            """,
+        )
+
+        parser.add_argument(
+            "--measure-overhead",
+            dest="measure_overhead",
+            action="store_true",
+            help="""
+                Store the time that BenchExec spends before and after each run
+                (e.g., for setting up the container) per phase
+                as hidden result values "@overhead-<phase>"
+                and add a summary to the text output (only for local execution)
+            """,
+        )
+
+        parser.add_argument(
+            "--perf-events",
+            dest="measure_perf_events",
+            action="store_true",
+            help="""
+                Count performance events of each run with perf_event_open
+                (executed instructions, cycles, cache misses, context switches,
+                page faults, and task clock) and store them
+                as hidden result values "@perf-<event>" (only for local execution)
+            """,
+        )
+
+        parser.add_argument(
+            "--health-sample-interval",
+            dest="health_sample_interval",
+            type=float,
+            metavar="SECONDS",
+            help="""
+                Time between two checks of the system health, e.g., for thermal
+                throttling and swapping (default: 1s, only for local execution)
+            """,
+        )
+
+        parser.add_argument(
+            "--result-cache",
+            dest="result_cache",
+            metavar="DIR",
+            help="""
+                Reuse the results of runs from the given cache directory
+                if the tool, its command line, the input files, and the limits
+                are unchanged, instead of executing them again,
+                and store the results of executed runs there (only for local execution)
+            """,
+        )
+
+        parser.add_argument(
+            "--result-cache-max-age",
+            dest="result_cache_max_age",
+            type=float,
+            metavar="DAYS",
+            help="Remove results from the cache that were not used for DAYS days",
+        )
+
+        parser.add_argument(
+            "--result-cache-max-size",
+            dest="result_cache_max_size",
+            type=util.parse_memory_value,
+            metavar="BYTES",
+            help="Remove the least recently used results if the cache is larger",
+        )
+
+        parser.add_argument(
+            "--result-cache-verify",
+            dest="result_cache_verify",
+            type=float,
+            default=0,
+            metavar="FRACTION",
+            help="""
+                Execute the given fraction (between 0 and 1) of randomly chosen runs
+                with a cached result anyway and warn if their status differs
+            """,
+        )
+
+        parser.add_argument(
+            "--schedule-by-results",
+            dest="schedule_by_results",
+            action="append",
+            metavar="RESULT_XML",
+            help="""
+                Execute the runs of each run set in order of decreasing wall time,
+                as predicted from the given result file of an earlier execution
+                (only for local execution, can be given multiple times)
+            """,
+        )
+
         parser.add_argument(
             "-c",
             "--limitCores",
@@ -282,6 +440,15 @@ class BenchExec(object):
             "(-1 to disable, default value: 20 MB).",
         )
 
+        parser.add_argument(
+            "--stream-output",
+            dest="stream_output",
+            action="store_true",
+            help="Write only the parts of the tool output that are kept according to "
+            "--maxLogfileSize to the logfiles while the tool runs, "
+            "instead of writing everything and shrinking the logfiles afterwards.",
+        )
+
         parser.add_argument(
             "--filesCountLimit",
             type=int,
@@ -330,6 +497,19 @@ class BenchExec(object):
             help="Set the given date and time as the start time of the benchmark.",
         )
 
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="""
+                Resume an interrupted execution of the benchmark:
+                reuse the existing results in the output path,
+                execute only the runs that have no result yet,
+                and append to the existing output files.
+                The latest previous execution is resumed
+                unless --startTime is given.
+            """,
+        )
+
         parser.add_argument(
             "--version", action="version", version="%(prog)s " + __version__
         )
@@ -355,6 +535,12 @@ class BenchExec(object):
         for example with an implementation that delegates to some cloud service.
         """
         logging.debug("This is benchexec %s.", __version__)
+        if self.config.merge_shards:
+            return sharding
+        if self.config.coordinator:
+            from . import distributedexecution
+
+            return distributedexecution
         from . import localexecution as executor
 
         return executor
@@ -366,10 +552,32 @@ class BenchExec(object):
         @param benchmark_file: the name of a benchmark-definition XML file
         @return: a result value from the executor module
         """
+        start_time = self.config.start_time
+        if self.config.resume and not start_time:
+            start_time = self.find_start_time_of_previous_execution(benchmark_file)
+            if start_time:
+                logging.info(
+                    "Resuming execution of %r started at %s.",
+                    benchmark_file,
+                    start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                )
+            else:
+                logging.info(
+                    "No previous results found for %r, starting from scratch.",
+                    benchmark_file,
+                )
+        elif self.config.merge_shards and not start_time:
+            # use the start time of the shard that was started first
+            for shard_dir in self.config.merge_shards:
+                shard_start_time = self.find_start_time_of_previous_execution(
+                    benchmark_file, shard_dir
+                )
+                if not shard_start_time:
+                    sys.exit(f"No results of {benchmark_file!r} found in {shard_dir}.")
+                if not start_time or shard_start_time < start_time:
+                    start_time = shard_start_time
         benchmark = Benchmark(
-            benchmark_file,
-            self.config,
-            self.config.start_time or util.read_local_time(),
+            benchmark_file, self.config, start_time or util.read_local_time()
         )
         try:
             self.check_existing_results(benchmark)
@@ -406,11 +614,41 @@ class BenchExec(object):
                 logging.warning("Could not add files to git repository: %s", e)
         return result
 
+    def find_start_time_of_previous_execution(self, benchmark_file, output_dir=None):
+        """
+        Find the latest execution of the given benchmark whose results
+        are present in the output path, for resuming it.
+        @param output_dir: a directory to search instead of the output path
+        @return: the start time of this execution or None
+        """
+        name = os.path.basename(benchmark_file)[:-4]  # remove ending ".xml"
+        if self.config.name:
+            name += "." + self.config.name
+        if output_dir is None:
+            prefix = f"{self.config.output_path}{name}"
+        else:
+            prefix = os.path.join(output_dir, name)
+
+        _, latest_result_file = sharding.find_latest_execution(prefix)
+        if latest_result_file is None:
+            return None
+
+        try:
+            starttime = util.read_xml_file(latest_result_file).get("starttime")
+            return datetime.datetime.fromisoformat(starttime)
+        except (BenchExecException, TypeError, ValueError) as e:
+            sys.exit(
+                f"Cannot resume from previous results in {latest_result_file}: {e}"
+            )
+
     def check_existing_results(self, benchmark):
         """
         Check and abort if the target directory for the benchmark results
         already exists in order to avoid overwriting results.
+        If an execution is resumed, existing results are expected and reused.
         """
+        if self.config.resume:
+            return
         if os.path.exists(benchmark.log_folder):
             sys.exit(
                 f"Output directory {benchmark.log_folder} already exists, "
@@ -14,6 +14,7 @@ import signal
 import stat
 import sys
 import tempfile
+import threading
 import time
 
 from benchexec import BenchExecException
@@ -40,6 +41,7 @@ CPUACCT = "cpuacct"
 CPUSET = "cpuset"
 FREEZER = "freezer"
 MEMORY = "memory"
+PERF_EVENT = "perf_event"
 ALL_KNOWN_SUBSYSTEMS = {
     # cgroups for BenchExec
     BLKIO,
@@ -47,19 +49,35 @@ ALL_KNOWN_SUBSYSTEMS = {
     CPUSET,
     FREEZER,
     MEMORY,
+    PERF_EVENT,
     # other cgroups users might want
     "cpu",
     "devices",
     "net_cls",
     "net_prio",
     "hugetlb",
-    "perf_event",
     "pids",
 }
 
 CGROUPS_V1 = 1
 CGROUPS_V2 = 2
 
+_CGROUP2_CONTROLLERS = {
+    BLKIO: "io",
+    CPUSET: "cpuset",
+    MEMORY: "memory",
+    "cpu": "cpu",
+    "hugetlb": "hugetlb",
+    "pids": "pids",
+}
+"""The controllers of cgroups v2 that need to be enabled for using a subsystem."""
+
+_CGROUP2_ALWAYS_AVAILABLE = {CPUACCT, FREEZER, PERF_EVENT}
+"""Subsystems whose files exist in every non-root cgroup of cgroups v2."""
+
+_CGROUP2_FILE_PREFIXES = {BLKIO: "io", CPUACCT: "cpu", FREEZER: "cgroup"}
+"""Prefixes of files in cgroups v2 for subsystems whose files were renamed."""
+
 _PERMISSION_HINT_GROUPS = """
 You need to add your account to the following groups: {0}
 Remember to logout and login again afterwards to make group changes effective."""
@@ -86,16 +104,13 @@ As a temporary workaround, you can also run
 Note that this will grant permissions to more users than typically desired and it will only last until the next reboot."""
 
 _ERROR_MSG_CGROUPS_V2 = """
-Required cgroups are not available because this system is using cgroupsv2 exclusively.
-
-This version of BenchExec does not yet support cgroupsv2.
-Please check at https://github.com/sosy-lab/benchexec/issues/133
-whether a new version of BenchExec with support for cgroupsv2 is available
-and update if applicable.
+Required cgroups are not available on this system with cgroupsv2.
 
-Alternatively, you could try switching back to cgroupsv1
-with the kernel command-line parameter systemd.unified_cgroup_hierarchy=0
-or use BenchExec without the features that need cgroups
+With cgroupsv2, BenchExec needs to be started in a cgroup that is delegated to
+the current user and does not contain any other processes, for example with
+"systemd-run --user --scope --slice=benchexec -p Delegate=yes benchexec ..."
+Furthermore, the required controllers need to be enabled for this cgroup.
+Alternatively, you can use BenchExec without the features that need cgroups
 (i.e., disable cpu-time limit, memory limit, and core limit).
 """
 
@@ -146,6 +161,25 @@ def find_my_cgroups(cgroup_paths=None, fallback=True):
     else:
         my_cgroups = dict(_parse_proc_pid_cgroup(cgroup_paths))
 
+    try:
+        version = _get_cgroup_version()
+    except BenchExecException:
+        version = None
+    if version == CGROUPS_V2:
+        mount = _find_cgroup2_mount()
+        if mount and "" in my_cgroups:
+            # the unified hierarchy is listed with an empty list of subsystems
+            cgroupPath = os.path.join(mount, my_cgroups[""])
+            fallbackPath = os.path.join(mount, CGROUP_FALLBACK_PATH)
+            if (
+                fallback
+                and not os.access(cgroupPath, os.W_OK)
+                and os.path.isdir(fallbackPath)
+            ):
+                cgroupPath = fallbackPath
+            return CgroupV2.from_path(cgroupPath)
+        return CgroupV2({})
+
     cgroupsParents = {}
     for subsystem, mount in _find_cgroup_mounts():
         # Ignore mount points where we do not have any access,
@@ -184,6 +218,21 @@ def _find_cgroup_mounts():
         logging.exception("Cannot read /proc/mounts")
 
 
+def _find_cgroup2_mount():
+    """
+    Return the mountpoint of the unified cgroup hierarchy (cgroups v2) or None.
+    """
+    try:
+        with open("/proc/mounts", "rt") as mountsFile:
+            for mount in mountsFile:
+                mount = mount.split(" ")
+                if mount[2] == "cgroup2":
+                    return mount[1]
+    except OSError:
+        logging.exception("Cannot read /proc/mounts")
+    return None
+
+
 def _find_own_cgroups():
     """
     For all subsystems, return the information in which (sub-)cgroup this process is in.
@@ -258,6 +307,28 @@ def kill_all_tasks_in_cgroup(cgroup):
             time.sleep(i * 0.5)
 
 
+def _recursive_child_cgroups(cgroup):
+    """
+    Return a generator of all child cgroups of the given cgroup, bottom-up.
+    """
+
+    def raise_error(e):
+        raise e
+
+    try:
+        for dirpath, dirs, _files in os.walk(
+            cgroup, topdown=False, onerror=raise_error
+        ):
+            for subCgroup in dirs:
+                yield os.path.join(dirpath, subCgroup)
+    except OSError as e:
+        # some process might have made a child cgroup inaccessible
+        os.chmod(e.filename, stat.S_IRUSR | stat.S_IXUSR)
+        # restart, which might yield already yielded cgroups again,
+        # but this is ok for the callers of _recursive_child_cgroups()
+        yield from _recursive_child_cgroups(cgroup)
+
+
 def remove_cgroup(cgroup):
     if not os.path.exists(cgroup):
         logging.warning("Cannot remove CGroup %s, because it does not exist.", cgroup)
@@ -307,6 +378,16 @@ def _register_process_with_cgrulesengd(pid):
 
 
 class Cgroup(object):
+    """
+    The cgroups of a process or of a run in the separate hierarchies of cgroups v1.
+    Subclasses implement the same interface for other kinds of cgroups.
+    """
+
+    version = CGROUPS_V1
+
+    # whether join_current_thread() can be used
+    can_join_single_thread = True
+
     def __init__(self, cgroupsPerSubsystem):
         assert set(cgroupsPerSubsystem.keys()) <= ALL_KNOWN_SUBSYSTEMS
         assert all(cgroupsPerSubsystem.values())
@@ -465,6 +546,46 @@ class Cgroup(object):
             with open(os.path.join(cgroup, "tasks"), "w") as tasksFile:
                 tasksFile.write(str(pid))
 
+    def join_current_thread(self):
+        """
+        Move the current thread (but not the other threads of this process)
+        into the cgroups represented by this instance.
+        Processes that are created by the current thread afterwards
+        start in these cgroups, without executing any code in other cgroups.
+        May only be called if can_join_single_thread is True.
+        @return: a function without parameters that moves the thread back
+            into its previous cgroups
+        @raise OSError: if the thread could not be moved back later
+        """
+        tid = threading.get_native_id()
+        with open("/proc/thread-self/cgroup", "rt") as ownCgroupsFile:
+            my_cgroups = dict(_parse_proc_pid_cgroup(ownCgroupsFile))
+        mounts = dict(_find_cgroup_mounts())
+        previous_paths = {
+            os.path.join(mounts[subsystem], my_cgroups[subsystem])
+            for subsystem in self.subsystems
+        }
+        for cgroup in previous_paths:
+            # Staying in the cgroups of the run would be fatal,
+            # because the thread would get killed together with the run.
+            if not os.access(os.path.join(cgroup, "tasks"), os.W_OK):
+                raise OSError(
+                    errno.EACCES, "Cannot move thread back into cgroup", cgroup
+                )
+
+        def leave():
+            for cgroup in previous_paths:
+                util.write_file(str(tid), cgroup, "tasks")
+
+        _register_process_with_cgrulesengd(tid)
+        try:
+            for cgroup in self.paths:
+                util.write_file(str(tid), cgroup, "tasks")
+        except BaseException:
+            leave()
+            raise
+        return leave
+
     def get_all_tasks(self, subsystem):
         """
         Return a generator of all PIDs currently in this cgroup for the given subsystem.
@@ -473,6 +594,17 @@ class Cgroup(object):
             for line in tasksFile:
                 yield int(line)
 
+    def is_empty(self):
+        """
+        Check whether this cgroup verifiably contains no processes anymore,
+        such that its counters will not change anymore.
+        @return False if there are processes or if this cannot be determined
+        """
+        try:
+            return all(util.read_file(cgroup, "tasks") == "" for cgroup in self.paths)
+        except OSError:
+            return False
+
     def kill_all_tasks(self):
         """
         Kill all tasks in this cgroup and all its children cgroups forcefully.
@@ -482,23 +614,6 @@ class Cgroup(object):
         # that have been created and manipulated by processes in the run.
         # For example, they could have removed permissions from files and directories.
 
-        def recursive_child_cgroups(cgroup):
-            def raise_error(e):
-                raise e
-
-            try:
-                for dirpath, dirs, _files in os.walk(
-                    cgroup, topdown=False, onerror=raise_error
-                ):
-                    for subCgroup in dirs:
-                        yield os.path.join(dirpath, subCgroup)
-            except OSError as e:
-                # some process might have made a child cgroup inaccessible
-                os.chmod(e.filename, stat.S_IRUSR | stat.S_IXUSR)
-                # restart, which might yield already yielded cgroups again,
-                # but this is ok for the callers of recursive_child_cgroups()
-                yield from recursive_child_cgroups(cgroup)
-
         def try_unfreeze(cgroup):
             try:
                 util.write_file("THAWED", cgroup, "freezer.state", force=True)
@@ -518,7 +633,7 @@ class Cgroup(object):
             cgroup = self.subsystems[FREEZER]
             util.write_file("FROZEN", cgroup, "freezer.state", force=True)
 
-            for child_cgroup in recursive_child_cgroups(cgroup):
+            for child_cgroup in _recursive_child_cgroups(cgroup):
                 with _force_open_read(os.path.join(child_cgroup, "tasks")) as tasks:
                     for task in tasks:
                         util.kill_process(int(task))
@@ -541,7 +656,7 @@ class Cgroup(object):
             # crashes we handle this.
             while True:
                 try:
-                    for child_cgroup in recursive_child_cgroups(cgroup):
+                    for child_cgroup in _recursive_child_cgroups(cgroup):
                         kill_all_tasks_in_cgroup(child_cgroup)
                         remove_cgroup(child_cgroup)
                     break
@@ -553,6 +668,10 @@ class Cgroup(object):
 
             kill_all_tasks_in_cgroup(cgroup)
 
+    def _filename(self, subsystem, option):
+        """Return the name of the file for the given option of the given subsystem."""
+        return f"{subsystem}.{option}"
+
     def has_value(self, subsystem, option):
         """
         Check whether the given value exists in the given subsystem.
@@ -562,7 +681,7 @@ class Cgroup(object):
         """
         assert subsystem in self
         return os.path.isfile(
-            os.path.join(self.subsystems[subsystem], f"{subsystem}.{option}")
+            os.path.join(self.subsystems[subsystem], self._filename(subsystem, option))
         )
 
     def get_value(self, subsystem, option):
@@ -572,7 +691,9 @@ class Cgroup(object):
         Only call this method if the given subsystem is available.
         """
         assert subsystem in self, f"Subsystem {subsystem} is missing"
-        return util.read_file(self.subsystems[subsystem], f"{subsystem}.{option}")
+        return util.read_file(
+            self.subsystems[subsystem], self._filename(subsystem, option)
+        )
 
     def get_file_lines(self, subsystem, option):
         """
@@ -582,7 +703,7 @@ class Cgroup(object):
         """
         assert subsystem in self
         with open(
-            os.path.join(self.subsystems[subsystem], f"{subsystem}.{option}")
+            os.path.join(self.subsystems[subsystem], self._filename(subsystem, option))
         ) as f:
             for line in f:
                 yield line
@@ -596,7 +717,7 @@ class Cgroup(object):
         """
         assert subsystem in self
         return util.read_key_value_pairs_from_file(
-            self.subsystems[subsystem], f"{subsystem}.{filename}"
+            self.subsystems[subsystem], self._filename(subsystem, filename)
         )
 
     def set_value(self, subsystem, option, value):
@@ -606,7 +727,9 @@ class Cgroup(object):
         Only call this method if the given subsystem is available.
         """
         assert subsystem in self
-        util.write_file(str(value), self.subsystems[subsystem], f"{subsystem}.{option}")
+        util.write_file(
+            str(value), self.subsystems[subsystem], self._filename(subsystem, option)
+        )
 
     def remove(self):
         """
@@ -634,3 +757,411 @@ class Cgroup(object):
     def read_allowed_memory_banks(self):
         """Get the list of all memory banks allowed by this cgroup."""
         return util.parse_int_list(self.get_value(CPUSET, "mems"))
+
+    def read_usage_per_cpu(self):
+        """
+        Read the cputime usage of this cgroup per CPU core.
+        CPUACCT cgroup needs to be available.
+        @return a dict from core number to cputime usage in seconds
+        """
+        usage = {}
+        for core, coretime in enumerate(
+            self.get_value(CPUACCT, "usage_percpu").split(" ")
+        ):
+            try:
+                coretime = int(coretime)
+                if coretime != 0:
+                    # convert nanoseconds to seconds
+                    usage[core] = coretime / 1_000_000_000
+            except (OSError, ValueError) as e:
+                logging.debug(
+                    "Could not read CPU time for core %s from kernel: %s", core, e
+                )
+        return usage
+
+    def read_max_mem_usage(self):
+        """
+        Read the peak memory usage (RAM and swap) of this cgroup.
+        MEMORY cgroup needs to be available.
+        Logs a warning if the value is not available.
+        @return memory usage in bytes, or None if not available
+        """
+        # This measurement reads the maximum number of bytes of RAM+Swap the process used.
+        # For more details, c.f. the kernel documentation:
+        # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
+        memUsageFile = "memsw.max_usage_in_bytes"
+        if not self.has_value(MEMORY, memUsageFile):
+            memUsageFile = "max_usage_in_bytes"
+        if not self.has_value(MEMORY, memUsageFile):
+            logging.warning("Memory-usage is not available due to missing files.")
+            return None
+        try:
+            return int(self.get_value(MEMORY, memUsageFile))
+        except OSError as e:
+            if e.errno == errno.ENOTSUP:
+                # kernel responds with operation unsupported if this is disabled
+                logging.critical(
+                    "Kernel does not track swap memory usage, cannot measure memory usage."
+                    " Please set swapaccount=1 on your kernel command line."
+                )
+                return None
+            raise e
+
+    def read_io_stat(self):
+        """
+        Read the amount of I/O of this cgroup. BLKIO cgroup needs to be available.
+        @return a tuple of the number of read and written bytes,
+            or None if not available
+        """
+        blkio_bytes_file = "throttle.io_service_bytes"
+        if not self.has_value(BLKIO, blkio_bytes_file):
+            return None
+        bytes_read = 0
+        bytes_written = 0
+        for blkio_line in self.get_file_lines(BLKIO, blkio_bytes_file):
+            try:
+                dev_no, io_type, bytes_amount = blkio_line.split(" ")
+                if io_type == "Read":
+                    bytes_read += int(bytes_amount)
+                elif io_type == "Write":
+                    bytes_written += int(bytes_amount)
+            except ValueError:
+                pass  # There are irrelevant lines in this file with a different structure
+        return bytes_read, bytes_written
+
+    def read_oom_kill_count(self):
+        """
+        Read how often the kernel killed a process in this cgroup because of OOM.
+        @return the number of kills, or None if not available
+        """
+        # With cgroups v1, we disable the OOM killer and use oomhandler instead.
+        return None
+
+    def read_memory_limit(self):
+        """
+        Read the memory limit that applies to this cgroup,
+        including limits of its parents. MEMORY cgroup needs to be available.
+        @return the limit in bytes, or None if there is no limit
+        """
+        # We use the entries hierarchical_*_limit in memory.stat and not memory.*limit_in_bytes
+        # because the former may be lower if memory.use_hierarchy is enabled.
+        # The limit for memory+swap is always at least the memory limit.
+        for key, value in self.get_key_value_pairs(MEMORY, "stat"):
+            if key == "hierarchical_memory_limit":
+                return int(value)
+        return None
+
+    def read_memory_usage(self):
+        """
+        Read the current memory usage of this cgroup without inactive page cache,
+        which would be reclaimed before the processes need to swap.
+        MEMORY cgroup needs to be available.
+        @return the usage in bytes
+        """
+        usage = int(self.get_value(MEMORY, "usage_in_bytes"))
+        for key, value in self.get_key_value_pairs(MEMORY, "stat"):
+            if key == "total_inactive_file":
+                usage = max(0, usage - int(value))
+        return usage
+
+    def can_account_swap(self):
+        """Check whether the kernel accounts swap usage for this cgroup."""
+        return self.has_value(MEMORY, "memsw.max_usage_in_bytes")
+
+    def set_memory_limit(self, memlimit):
+        """
+        Limit the memory usage (RAM and swap) of this cgroup.
+        MEMORY cgroup needs to be available.
+        @param memlimit: the limit in bytes
+        @return the effective limit as reported by the kernel
+        """
+        limit = "limit_in_bytes"
+        self.set_value(MEMORY, limit, memlimit)
+
+        swap_limit = "memsw.limit_in_bytes"
+        # We need swap limit because otherwise the kernel just starts swapping
+        # out our process if the limit is reached.
+        # Some kernels might not have this feature,
+        # which is ok if there is actually no swap.
+        if not self.has_value(MEMORY, swap_limit):
+            if systeminfo.has_swap():
+                sys.exit(
+                    'Kernel misses feature for accounting swap memory, but machine has swap. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
+                )
+        else:
+            try:
+                self.set_value(MEMORY, swap_limit, memlimit)
+            except OSError as e:
+                if e.errno == errno.ENOTSUP:
+                    # kernel responds with operation unsupported if this is disabled
+                    sys.exit(
+                        'Memory limit specified, but kernel does not allow limiting swap memory. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
+                    )
+                raise e
+
+        return self.get_value(MEMORY, limit)
+
+    def disable_swap(self):
+        """
+        Prevent the processes in this cgroup from being swapped out.
+        MEMORY cgroup needs to be available.
+        """
+        # Note that this disables swapping completely according to
+        # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
+        # (unlike setting the global swappiness to 0).
+        # Our process might get killed because of this.
+        self.set_value(MEMORY, "swappiness", "0")
+
+
+class CgroupV2(Cgroup):
+    """
+    The cgroup of a process or of a run in the unified hierarchy of cgroups v2.
+    All subsystems share the same directory, and subsystems are mapped to the
+    respective controllers and files of cgroups v2,
+    such that this class can be used like Cgroup.
+    """
+
+    version = CGROUPS_V2
+
+    # Only whole processes can be moved between the cgroups of the unified
+    # hierarchy, and CLONE_INTO_CGROUP is not available with os.posix_spawn().
+    can_join_single_thread = False
+
+    @classmethod
+    def from_path(cls, path):
+        """
+        Create an instance for an existing cgroup with all subsystems
+        that can be used for its child cgroups.
+        """
+        try:
+            controllers = util.read_file(path, "cgroup.controllers").split()
+        except OSError:
+            controllers = []
+        subsystems = set(_CGROUP2_ALWAYS_AVAILABLE)
+        subsystems.update(
+            subsystem
+            for subsystem, controller in _CGROUP2_CONTROLLERS.items()
+            if controller in controllers
+        )
+        return cls(dict.fromkeys(subsystems, path))
+
+    def _filename(self, subsystem, option):
+        return f"{_CGROUP2_FILE_PREFIXES.get(subsystem, subsystem)}.{option}"
+
+    def _enable_controllers(self, cgroup, controllers):
+        """Enable the given controllers for all children of the given cgroup."""
+        enabled = util.read_file(cgroup, "cgroup.subtree_control").split()
+        missing = sorted(set(controllers).difference(enabled))
+        if not missing:
+            return
+        content = " ".join("+" + controller for controller in missing)
+        try:
+            util.write_file(content, cgroup, "cgroup.subtree_control")
+        except OSError as e:
+            if e.errno != errno.EBUSY:
+                raise e
+            # Controllers cannot be enabled for cgroups that contain processes.
+            # If only our own process is in the cgroup, we can move it away.
+            self._move_own_process_to_child(cgroup)
+            util.write_file(content, cgroup, "cgroup.subtree_control")
+
+    def _move_own_process_to_child(self, cgroup):
+        pids = util.read_file(cgroup, "cgroup.procs").split()
+        if pids != [str(os.getpid())]:
+            raise OSError(
+                errno.EBUSY,
+                "Cgroup contains other processes than BenchExec, "
+                "cannot enable controllers",
+                cgroup,
+            )
+        child_cgroup = tempfile.mkdtemp(prefix="benchexec_process_", dir=cgroup)
+        util.write_file(str(os.getpid()), child_cgroup, "cgroup.procs")
+        logging.debug("Moved own process to cgroup %s.", child_cgroup)
+
+    def create_fresh_child_cgroup(self, *subsystems):
+        assert set(subsystems).issubset(self.subsystems.keys())
+        if not subsystems:
+            return CgroupV2({})
+        parentCgroup = self.subsystems[subsystems[0]]
+        self._enable_controllers(
+            parentCgroup,
+            {_CGROUP2_CONTROLLERS[s] for s in subsystems if s in _CGROUP2_CONTROLLERS},
+        )
+        cgroup = tempfile.mkdtemp(prefix=CGROUP_NAME_PREFIX, dir=parentCgroup)
+        return CgroupV2(dict.fromkeys(subsystems, cgroup))
+
+    def add_task(self, pid):
+        for cgroup in self.paths:
+            util.write_file(str(pid), cgroup, "cgroup.procs")
+
+    def get_all_tasks(self, subsystem):
+        with open(os.path.join(self.subsystems[subsystem], "cgroup.procs")) as procs:
+            for line in procs:
+                yield int(line)
+
+    def kill_all_tasks(self):
+        """
+        Kill all tasks in this cgroup and all its children cgroups forcefully.
+        Additionally, the children cgroups will be deleted.
+        """
+        for cgroup in self.paths:
+            if os.path.exists(os.path.join(cgroup, "cgroup.kill")):
+                # Kills all processes of the cgroup and its children at once,
+                # without the risk of missing processes that are being forked.
+                util.write_file("1", cgroup, "cgroup.kill", force=True)
+            else:
+                # Kernels before 5.14: freeze everything such that no process
+                # can fork, and kill all processes (killing works while frozen).
+                util.write_file("1", cgroup, "cgroup.freeze", force=True)
+                for child_cgroup in [*_recursive_child_cgroups(cgroup), cgroup]:
+                    with _force_open_read(
+                        os.path.join(child_cgroup, "cgroup.procs")
+                    ) as procs:
+                        for pid in procs:
+                            util.kill_process(int(pid))
+                util.write_file("0", cgroup, "cgroup.freeze", force=True)
+
+            self._wait_until_empty(cgroup)
+            for child_cgroup in _recursive_child_cgroups(cgroup):
+                self._remove_cgroup(child_cgroup)
+
+    def is_empty(self):
+        try:
+            return all(self._is_unpopulated(cgroup) for cgroup in self.paths)
+        except OSError:
+            return False
+
+    def _is_unpopulated(self, cgroup):
+        """Check whether the given cgroup and its children contain no processes."""
+        for key, value in util.read_key_value_pairs_from_file(cgroup, "cgroup.events"):
+            if key == "populated":
+                return int(value) == 0
+        return False
+
+    def _wait_until_empty(self, cgroup):
+        """Wait until all processes in the given cgroup and its children are gone."""
+        delay = 0.001
+        while True:
+            if self._is_unpopulated(cgroup):
+                return
+            if delay > 1:
+                logging.warning(
+                    "Run has left-over processes in cgroup %s, waiting for them.",
+                    cgroup,
+                )
+            # wait for the processes to exit, this might take some time
+            time.sleep(delay)
+            delay = min(delay * 2, 2)
+
+    def _remove_cgroup(self, cgroup):
+        try:
+            os.rmdir(cgroup)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                logging.warning(
+                    "Failed to remove cgroup %s: error %s (%s)",
+                    cgroup,
+                    e.errno,
+                    e.strerror,
+                )
+
+    def remove(self):
+        for cgroup in self.paths:
+            self._remove_cgroup(cgroup)
+
+        del self.paths
+        del self.subsystems
+
+    def read_cputime(self):
+        for key, value in self.get_key_value_pairs(CPUACCT, "stat"):
+            if key == "usage_usec":
+                # convert micro-seconds to seconds
+                return int(value) / 1_000_000
+        raise ValueError("Missing usage_usec in cpu.stat")
+
+    def read_usage_per_cpu(self):
+        return {}  # not available in cgroups v2
+
+    def read_allowed_cpus(self):
+        return util.parse_int_list(self.get_value(CPUSET, "cpus.effective"))
+
+    def read_allowed_memory_banks(self):
+        return util.parse_int_list(self.get_value(CPUSET, "mems.effective"))
+
+    def read_max_mem_usage(self):
+        # memory.peak was added in Linux 5.19 and memory.swap.peak in Linux 6.5,
+        # but swap is disabled for runs anyway.
+        if not self.has_value(MEMORY, "peak"):
+            logging.warning(
+                "Memory-usage is not available because the kernel is too old "
+                "(Linux 5.19 is required)."
+            )
+            return None
+        usage = int(self.get_value(MEMORY, "peak"))
+        if self.has_value(MEMORY, "swap.peak"):
+            usage += int(self.get_value(MEMORY, "swap.peak"))
+        return usage
+
+    def read_io_stat(self):
+        if not self.has_value(BLKIO, "stat"):
+            return None
+        bytes_read = 0
+        bytes_written = 0
+        for line in self.get_file_lines(BLKIO, "stat"):
+            # each line is "major:minor rbytes=... wbytes=... rios=... ..."
+            for entry in line.split()[1:]:
+                key, _, value = entry.partition("=")
+                if key == "rbytes":
+                    bytes_read += int(value)
+                elif key == "wbytes":
+                    bytes_written += int(value)
+        return bytes_read, bytes_written
+
+    def read_oom_kill_count(self):
+        if not self.has_value(MEMORY, "events"):
+            return None
+        for key, value in self.get_key_value_pairs(MEMORY, "events"):
+            if key == "oom_kill":
+                return int(value)
+        return None
+
+    def read_memory_limit(self):
+        # The limits of all parent cgroups apply as well.
+        limit = None
+        cgroup = self.subsystems[MEMORY]
+        while os.path.isfile(os.path.join(cgroup, "memory.max")):
+            value = util.read_file(cgroup, "memory.max")
+            if value != "max":
+                limit = int(value) if limit is None else min(limit, int(value))
+            cgroup = os.path.dirname(cgroup)
+        return limit
+
+    def read_memory_usage(self):
+        usage = int(self.get_value(MEMORY, "current"))
+        for key, value in self.get_key_value_pairs(MEMORY, "stat"):
+            if key == "inactive_file":
+                usage = max(0, usage - int(value))
+        return usage
+
+    def can_account_swap(self):
+        return self.has_value(MEMORY, "swap.max")
+
+    def set_memory_limit(self, memlimit):
+        self.set_value(MEMORY, "max", memlimit)
+
+        # We need to prevent swapping because otherwise the kernel just starts
+        # swapping out our process if the limit is reached, cf. disable_swap().
+        if not self.can_account_swap() and systeminfo.has_swap():
+            sys.exit(
+                'Kernel misses feature for accounting swap memory, but machine has swap. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
+            )
+
+        # Let the kernel kill all processes of the run on OOM, not just one.
+        if self.has_value(MEMORY, "oom.group"):
+            self.set_value(MEMORY, "oom.group", "1")
+
+        return self.get_value(MEMORY, "max")
+
+    def disable_swap(self):
+        if self.can_account_swap():
+            self.set_value(MEMORY, "swap.max", "0")
@@ -407,15 +407,160 @@ def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
     # unchanged during run execution.
     make_bind_mount(b"/", mount_base, recursive=True, private=True)
 
-    # Ensure each special dir is a mountpoint such that the next loop covers it.
+    _create_special_dirs(temp_base, dir_modes)
+    _make_special_dirs_mountpoints(mount_base, dir_modes)
+
+    overlay_count = 0
+
+    for mountpoint, fstype, options, mode, empty_dir in _get_mount_modes(
+        mount_base, dir_modes
+    ):
+        mount_path = mount_base + mountpoint
+        temp_path = temp_base + mountpoint
+        if empty_dir:
+            os.makedirs(temp_base + empty_dir, exist_ok=True)
+
+        if mode == DIR_OVERLAY:
+            overlay_count += 1
+            work_path = work_base + b"/" + str(overlay_count).encode()
+            try:
+                # Previous mount in this place not needed if replaced with overlay dir.
+                libc.umount(mount_path)
+            except OSError as e:
+                logging.debug(e)
+            _make_overlay_dir(mountpoint, mount_path, temp_path, work_path)
+
+        elif mode == DIR_HIDDEN:
+            try:
+                # Previous mount in this place not needed if replaced with hidden dir.
+                libc.umount(mount_path)
+            except OSError as e:
+                logging.debug(e)
+            _make_hidden_dir(mount_path, temp_path)
+
+        else:
+            _remount_dir(mountpoint, mount_path, fstype, options, mode)
+
+
+def build_mount_template(mount_base, dir_modes):
+    """
+    Setup a copy of the system's mount hierarchy below a specified directory
+    that can serve as template for the mount hierarchies of several containers
+    (cf. setup_mount_hierarchy_from_template()).
+    Only the read-only and full-access directory modes are applied,
+    because the hidden and overlay modes need fresh directories for each container.
+    @param mount_base: the base directory of the template
+    @param dir_modes: the directory modes to apply (without mount_base prefix)
+    @return a list of operations for setup_mount_hierarchy_from_template()
+    """
+    # cf. duplicate_mount_hierarchy() for the reasons for a private copy
+    make_bind_mount(b"/", mount_base, recursive=True, private=True)
+    _make_special_dirs_mountpoints(mount_base, dir_modes)
+
+    operations = []
+    # Mountpoints handled so far and whether they need to be created for each container
+    fresh_mountpoints = []
+    for mountpoint, fstype, options, mode, empty_dir in _get_mount_modes(
+        mount_base, dir_modes
+    ):
+        fresh = mode in [DIR_OVERLAY, DIR_HIDDEN]
+        if fresh:
+            operations.append((mode, mountpoint, empty_dir))
+        else:
+            _remount_dir(mountpoint, mount_base + mountpoint, fstype, options, mode)
+            # The closest mountpoint above (i.e., the last one that was handled)
+            # determines whether this mountpoint is part of a subtree that is copied
+            # from the template anyway.
+            parent_fresh = next(
+                (
+                    parent_fresh
+                    for (parent, parent_fresh) in reversed(fresh_mountpoints)
+                    if util.path_is_below(mountpoint, parent)
+                ),
+                True,
+            )
+            if parent_fresh:
+                operations.append((None, mountpoint, empty_dir))
+        fresh_mountpoints.append((mountpoint, fresh))
+    return operations
+
+
+def setup_mount_hierarchy_from_template(
+    template_fd, operations, mount_base, temp_base, work_base, template_base, dir_modes
+):
+    """
+    Setup a mount hierarchy like duplicate_mount_hierarchy() does,
+    but based on a template created by build_mount_template().
+    This only needs to create the hidden and overlay directories
+    and to copy all other parts of the template, which is much faster
+    if there are many mountpoints.
+    @param template_fd: a file descriptor for a detached copy of the template
+        (the result of open_tree() with OPEN_TREE_CLONE)
+    @param operations: the result of build_mount_template()
+    @param mount_base: the base directory of the new mount hierarchy
+    @param temp_base: the base directory for all temporary files
+    @param work_base: the base directory for all overlayfs work files
+    @param template_base: a non-existing directory where the template is attached
+        temporarily
+    @param dir_modes: the directory modes to apply (without mount_base prefix)
+    """
+    os.mkdir(template_base)
+    libc.move_mount(
+        template_fd,
+        b"",
+        libc.AT_FDCWD,
+        template_base,
+        libc.MOVE_MOUNT_F_EMPTY_PATH,
+    )
+    _create_special_dirs(temp_base, dir_modes)
+
+    overlay_count = 0
+    for mode, mountpoint, empty_dir in operations:
+        mount_path = mount_base + mountpoint
+        temp_path = temp_base + mountpoint
+        if empty_dir:
+            os.makedirs(temp_base + empty_dir, exist_ok=True)
+
+        if mode in [DIR_OVERLAY, DIR_HIDDEN]:
+            try:
+                # Remove what was copied from the template in this place
+                # (including everything below, which is copied again if necessary).
+                libc.umount2(mount_path, libc.MNT_DETACH)
+            except OSError as e:
+                logging.debug(e)
+
+        if mode == DIR_OVERLAY:
+            overlay_count += 1
+            work_path = work_base + b"/" + str(overlay_count).encode()
+            _make_overlay_dir(mountpoint, mount_path, temp_path, work_path)
+        elif mode == DIR_HIDDEN:
+            _make_hidden_dir(mount_path, temp_path)
+        else:
+            # Copy the whole subtree of the template, which already has the correct
+            # directory modes except for hidden and overlay directories below it,
+            # and these come later in the list of operations.
+            make_bind_mount(
+                template_base + mountpoint, mount_path, recursive=True, private=True
+            )
+
+    libc.umount2(template_base, libc.MNT_DETACH)
+    os.rmdir(template_base)
+
+
+def _create_special_dirs(temp_base, dir_modes):
+    """Ensure each special dir exists even if we mount a hidden dir as parent."""
+    for special_dir in dir_modes.keys():
+        if special_dir != b"/":
+            os.makedirs(temp_base + special_dir, exist_ok=True)
+
+
+def _make_special_dirs_mountpoints(mount_base, dir_modes):
+    """Ensure each special dir is a mountpoint such that get_mount_points covers it."""
     for special_dir in dir_modes.keys():
         if special_dir == b"/":
-            continue  # handled above
+            continue  # handled by caller
 
         mount_path = mount_base + special_dir
-        temp_path = temp_base + special_dir
-        # Ensure special_dir exists even if we mount a hidden dir as parent.
-        os.makedirs(temp_path, exist_ok=True)
 
         mode = determine_directory_mode(dir_modes, special_dir)
         parent_mode = determine_directory_mode(dir_modes, os.path.dirname(special_dir))
@@ -446,8 +591,14 @@ def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
             else:
                 logging.debug("Failed to make %s a bind mount: %s", mount_path, e)
 
-    overlay_count = 0
 
+def _get_mount_modes(mount_base, dir_modes):
+    """
+    Determine the directory modes of all mountpoints below mount_base.
+    @return a generator of tuples (mountpoint, fstype, options, mode, empty_dir),
+        where mountpoint is without mount_base prefix and empty_dir is a directory
+        that needs to exist as empty directory in the temporary files (or None)
+    """
     for _unused_source, full_mountpoint, fstype, options in list(get_mount_points()):
         if not util.path_is_below(full_mountpoint, mount_base):
             continue
@@ -455,6 +606,7 @@ def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
         mode = determine_directory_mode(dir_modes, mountpoint, fstype)
         if not mode:
             continue
+        empty_dir = None
 
         if not os.path.exists(mountpoint):
             # Mountpoint either does not exist or is in an inaccessible directory.
@@ -491,89 +643,75 @@ def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
                 # kernel will show a mountpoint for a non-existing directory.
                 # This makes nesting containers work better (common example is
                 # /sys/kernel/debug/tracing).
-                os.makedirs(temp_base + mountpoint, exist_ok=True)
-                # Let the rest of this loop iteration actually hide parent.
+                empty_dir = mountpoint
+                # Let the caller actually hide parent.
                 mountpoint = parent
                 mode = DIR_HIDDEN
         else:
             logging.debug("Mounting '%s' as %s", mountpoint.decode(), mode)
 
-        mount_path = mount_base + mountpoint
-        temp_path = temp_base + mountpoint
+        yield mountpoint, fstype, options, mode, empty_dir
 
-        if mode == DIR_OVERLAY:
-            overlay_count += 1
-            work_path = work_base + b"/" + str(overlay_count).encode()
-            os.makedirs(temp_path, exist_ok=True)
-            os.makedirs(work_path, exist_ok=True)
-            try:
-                # Previous mount in this place not needed if replaced with overlay dir.
-                libc.umount(mount_path)
-            except OSError as e:
-                logging.debug(e)
-            try:
-                make_overlay_mount(mount_path, mountpoint, temp_path, work_path)
-            except OSError as e:
-                mp = mountpoint.decode()
-                raise OSError(
-                    e.errno,
-                    f"Creating overlay mount for '{mp}' failed: {os.strerror(e.errno)}. "
-                    f"Please use other directory modes, "
-                    f"for example '--read-only-dir {util.escape_string_shell(mp)}'.",
-                )
 
-        elif mode == DIR_HIDDEN:
-            os.makedirs(temp_path, exist_ok=True)
-            try:
-                # Previous mount in this place not needed if replaced with hidden dir.
-                libc.umount(mount_path)
-            except OSError as e:
-                logging.debug(e)
-            make_bind_mount(temp_path, mount_path)
+def _make_overlay_dir(mountpoint, mount_path, temp_path, work_path):
+    os.makedirs(temp_path, exist_ok=True)
+    os.makedirs(work_path, exist_ok=True)
+    try:
+        make_overlay_mount(mount_path, mountpoint, temp_path, work_path)
+    except OSError as e:
+        mp = mountpoint.decode()
+        raise OSError(
+            e.errno,
+            f"Creating overlay mount for '{mp}' failed: {os.strerror(e.errno)}. "
+            f"Please use other directory modes, "
+            f"for example '--read-only-dir {util.escape_string_shell(mp)}'.",
+        )
 
-        elif mode == DIR_READ_ONLY:
-            try:
+
+def _make_hidden_dir(mount_path, temp_path):
+    os.makedirs(temp_path, exist_ok=True)
+    make_bind_mount(temp_path, mount_path)
+
+
+def _remount_dir(mountpoint, mount_path, fstype, options, mode):
+    """Apply the read-only or full-access mode to an existing mountpoint."""
+    if mode == DIR_READ_ONLY:
+        try:
+            remount_with_additional_flags(mount_path, fstype, options, libc.MS_RDONLY)
+        except OSError as e:
+            if e.errno == errno.EACCES:
+                logging.warning(
+                    "Cannot mount '%s', directory may be missing from container.",
+                    mountpoint.decode(),
+                )
+            else:
+                # If this mountpoint is below an overlay/hidden dir,
+                # re-create mountpoint.
+                # Linux does not support making read-only bind mounts in one step:
+                # https://lwn.net/Articles/281157/
+                # http://man7.org/linux/man-pages/man8/mount.8.html
+                make_bind_mount(mountpoint, mount_path, recursive=True, private=True)
                 remount_with_additional_flags(
                     mount_path, fstype, options, libc.MS_RDONLY
                 )
-            except OSError as e:
-                if e.errno == errno.EACCES:
-                    logging.warning(
-                        "Cannot mount '%s', directory may be missing from container.",
-                        mountpoint.decode(),
-                    )
-                else:
-                    # If this mountpoint is below an overlay/hidden dir,
-                    # re-create mountpoint.
-                    # Linux does not support making read-only bind mounts in one step:
-                    # https://lwn.net/Articles/281157/
-                    # http://man7.org/linux/man-pages/man8/mount.8.html
-                    make_bind_mount(
-                        mountpoint, mount_path, recursive=True, private=True
-                    )
-                    remount_with_additional_flags(
-                        mount_path, fstype, options, libc.MS_RDONLY
-                    )
 
-        elif mode == DIR_FULL_ACCESS:
-            try:
-                # Ensure directory is still a mountpoint by attempting to remount.
-                remount_with_additional_flags(mount_path, fstype, options, 0)
-            except OSError as e:
-                if e.errno == errno.EACCES:
-                    logging.warning(
-                        "Cannot mount '%s', directory may be missing from container.",
-                        mountpoint.decode(),
-                    )
-                else:
-                    # If this mountpoint is below an overlay/hidden dir,
-                    # re-create mountpoint.
-                    make_bind_mount(
-                        mountpoint, mount_path, recursive=True, private=True
-                    )
+    elif mode == DIR_FULL_ACCESS:
+        try:
+            # Ensure directory is still a mountpoint by attempting to remount.
+            remount_with_additional_flags(mount_path, fstype, options, 0)
+        except OSError as e:
+            if e.errno == errno.EACCES:
+                logging.warning(
+                    "Cannot mount '%s', directory may be missing from container.",
+                    mountpoint.decode(),
+                )
+            else:
+                # If this mountpoint is below an overlay/hidden dir,
+                # re-create mountpoint.
+                make_bind_mount(mountpoint, mount_path, recursive=True, private=True)
 
-        else:
-            assert False
+    else:
+        assert False
 
 
 def determine_directory_mode(dir_modes, path, fstype=None):
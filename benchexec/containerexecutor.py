@@ -6,6 +6,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+import array
 import errno
 import glob
 import logging
@@ -16,10 +17,13 @@ import pickle
 import select
 import signal
 import socket
+import struct
 import subprocess
 import sys
 import tempfile
+import threading
 import traceback
+import weakref
 
 from benchexec import __version__
 from benchexec import baseexecutor
@@ -42,6 +46,19 @@ sys.dont_write_bytecode = True  # prevent creation of .pyc files
 _MAX_RESULT_FILE_LOG_COUNT = 1000
 """How many result files to log at most."""
 
+# Error codes from child to parent
+_CHILD_OSERROR = 128
+_CHILD_UNKNOWN_ERROR = 129
+
+# The protocol for the pipes between parent and child/grandchild is that first the
+# parent sends the marker for user mappings, then the grand child sends its outer PID
+# back, and finally the parent sends its completion marker.
+# After the run, the child sends the result of the grand child and then waits
+# for the post_run marker, before it terminates.
+_MARKER_USER_MAPPING_COMPLETED = b"A"
+_MARKER_PARENT_COMPLETED = b"B"
+_MARKER_PARENT_POST_RUN_COMPLETED = b"C"
+
 
 def add_basic_container_args(argument_parser):
     argument_parser.add_argument(
@@ -99,6 +116,19 @@ def add_basic_container_args(argument_parser):
         help="give full access (read/write) to this host directory"
         " to processes inside container",
     )
+    argument_parser.add_argument(
+        "--mount-template",
+        action="store_true",
+        help="prepare the mount hierarchy of the container only once and reuse it "
+        "for all runs, which is faster on systems with many mount points "
+        "(requires Linux 5.2 or newer)",
+    )
+    argument_parser.add_argument(
+        "--prepare-container",
+        action="store_true",
+        help="set up the container for the next run while the current run "
+        "is still executing, such that the next run can start immediately",
+    )
 
 
 def handle_basic_container_args(options, parser=None):
@@ -168,6 +198,8 @@ def handle_basic_container_args(options, parser=None):
         "container_tmpfs": options.tmpfs,
         "container_system_config": options.container_system_config,
         "dir_modes": dir_modes,
+        "mount_template": options.mount_template,
+        "prepare_container": options.prepare_container,
     }
 
 
@@ -308,6 +340,8 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         dir_modes={"/": DIR_OVERLAY, "/run": DIR_HIDDEN, "/tmp": DIR_HIDDEN},
         container_system_config=True,
         container_tmpfs=True,
+        mount_template=False,
+        prepare_container=False,
         *args,
         **kwargs,
     ):
@@ -323,11 +357,22 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         @param container_system_config: Whether to use a special system configuration in
             the container that disables all remote host and user lookups, sets a custom
             hostname, etc.
+        @param mount_template: Whether to prepare the mount hierarchy of the container
+            only once as template and derive the mount hierarchy of each run from it.
+        @param prepare_container: Whether to set up the container for the next run
+            while a run is executing (with the same parameters as the latter).
         """
         super(ContainerExecutor, self).__init__(*args, **kwargs)
         self._use_namespaces = use_namespaces
         if not use_namespaces:
             return
+        self._mount_template_enabled = mount_template
+        self._mount_template = None
+        self._mount_template_lock = threading.Lock()
+        self._prepare_containers = prepare_container
+        self._prepared_container = None  # the one for the next run
+        self._claimed_containers = {}  # the ones for runs that are starting
+        self._prepared_container_lock = threading.Lock()
         self._container_tmpfs = container_tmpfs
         self._container_system_config = container_system_config
         self._uid = (
@@ -430,7 +475,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         # preparations
         temp_dir = None
         if rootDir is None:
-            temp_dir = tempfile.mkdtemp(prefix="BenchExec_run_")
+            temp_dir = self._create_temp_dir()
         if environ is None:
             environ = os.environ.copy()
 
@@ -554,6 +599,182 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         if root_dir is None:
             env.update(self._env_override)
 
+        # If the current directory is within one of the bind mounts we create,
+        # we need to cd into this directory again, otherwise we would not see the
+        # bind mount, but the directory behind it.
+        # Thus we always set cwd to force a change of directory.
+        if root_dir is None:
+            cwd = os.path.abspath(cwd or os.curdir)
+        else:
+            root_dir = os.path.abspath(root_dir)
+            cwd = os.path.abspath(cwd)
+
+        # Everything the container setup depends on, the tool itself is passed later.
+        container_params = (
+            root_dir,
+            memlimit,
+            memory_nodes,
+            output_dir if result_files_patterns else None,
+        )
+        prepared_container = self._take_prepared_container(temp_dir, container_params)
+        if prepared_container is None:
+            prepared_container = self._create_container(
+                temp_dir, container_params, child_setup_fn
+            )
+        child_pid = prepared_container.child_pid
+        from_grandchild = prepared_container.from_grandchild
+        to_grandchild = prepared_container.to_grandchild
+
+        def check_child_exit_code():
+            """Check if the child process terminated cleanly
+            and raise an error otherwise."""
+            child_exitcode, unused_child_rusage = self._wait_for_process(
+                child_pid, args[0]
+            )
+            child_exitcode = util.ProcessExitCode.from_raw(child_exitcode)
+            logging.debug(
+                "Parent: child process of RunExecutor with PID %d terminated with %s.",
+                child_pid,
+                child_exitcode,
+            )
+
+            if child_exitcode:
+                if child_exitcode.value:
+                    if child_exitcode.value == _CHILD_OSERROR:
+                        # This was an OSError in the child,
+                        # details were already logged
+                        raise BenchExecException(
+                            "execution in container failed, check log for details"
+                        )
+                    elif child_exitcode.value == _CHILD_UNKNOWN_ERROR:
+                        raise BenchExecException("unexpected error in container")
+                    raise OSError(
+                        child_exitcode.value, os.strerror(child_exitcode.value)
+                    )
+                raise OSError(
+                    0,
+                    f"Child process of RunExecutor terminated with {child_exitcode}",
+                )
+
+        try:  # parent
+            try:
+                prepared_container.start(args, env, cwd, stdin, stdout, stderr)
+            except OSError:
+                # child terminated prematurely, probably during container setup
+                check_child_exit_code()
+                raise
+
+            try:
+                # Wait with timeout until from_grandchild becomes ready to be read.
+                rlist, _, _ = select.select([from_grandchild], [], [], 60)
+                if from_grandchild not in rlist:
+                    # Timeout has occurred, likely deadlock in child (cf. #656).
+                    logging.warning(
+                        "Child %s not ready after 60s, likely "
+                        "https://github.com/sosy-lab/benchexec/issues/656 occurred. "
+                        "Killing it and trying again.",
+                        child_pid,
+                    )
+                    # As long as we have not sent MARKER_PARENT_COMPLETED, the tool is
+                    # not yet started and it is safe to kill the child and restart.
+                    # Killing child (PID 1 in container) will also kill grandchild if it
+                    # already exists.
+                    util.kill_process(child_pid)
+                    # Open pipes will be close in finally.
+                    # Signal retry to caller.
+                    return None
+
+                # read at most 10 bytes because this is enough for 32bit int
+                grandchild_pid = int(os.read(from_grandchild, 10))
+            except ValueError:
+                # probably empty read, i.e., pipe closed,
+                # i.e., child or grandchild failed
+                check_child_exit_code()
+                assert False, (
+                    "Child process of RunExecutor terminated cleanly"
+                    " but did not send expected data."
+                )
+
+            logging.debug(
+                "Parent: executing %s in grand child with PID %d"
+                " via child with PID %d.",
+                args[0],
+                grandchild_pid,
+                child_pid,
+            )
+
+            # start measurements
+            cgroups.add_task(grandchild_pid)
+            parent_setup = parent_setup_fn()
+
+            # Signal grandchild that setup is finished
+            os.write(to_grandchild, _MARKER_PARENT_COMPLETED)
+
+            # Copy file descriptor, otherwise we could not close from_grandchild in
+            # finally block and would leak a file descriptor in case of exception.
+            from_grandchild_copy = os.dup(from_grandchild)
+            to_grandchild_copy = os.dup(to_grandchild)
+        finally:
+            os.close(from_grandchild)
+            os.close(to_grandchild)
+
+        if self._prepare_containers:
+            # The tool is running now, so this is done in parallel to it.
+            self._prepare_next_container(container_params, child_setup_fn)
+
+        def wait_for_grandchild():
+            # 1024 bytes ought to be enough for everyone^Wour pickled result
+            try:
+                received = os.read(from_grandchild_copy, 1024)
+            except OSError as e:
+                if self.PROCESS_KILLED and e.errno == errno.EINTR:
+                    # Read was interrupted because of Ctrl+C, we just try again
+                    received = os.read(from_grandchild_copy, 1024)
+                else:
+                    raise e
+
+            if not received:
+                # Typically this means the child exited prematurely because an error
+                # occurred, and check_child_exitcode() will handle this.
+                # We close the pipe first, otherwise child could hang infinitely.
+                os.close(from_grandchild_copy)
+                os.close(to_grandchild_copy)
+                check_child_exit_code()
+                assert False, "Child process terminated cleanly without sending result"
+
+            exitcode, ru_child = pickle.loads(received)
+
+            base_path = f"/proc/{child_pid}/root"
+            parent_cleanup = parent_cleanup_fn(
+                parent_setup, util.ProcessExitCode.from_raw(exitcode), base_path
+            )
+
+            if result_files_patterns:
+                # As long as the child process exists
+                # we can access the container file system here
+                self._transfer_output_files(
+                    base_path + temp_dir, cwd, output_dir, result_files_patterns
+                )
+
+            os.close(from_grandchild_copy)
+            os.write(to_grandchild_copy, _MARKER_PARENT_POST_RUN_COMPLETED)
+            os.close(to_grandchild_copy)  # signal child that it can terminate
+            check_child_exit_code()
+
+            return exitcode, ru_child, parent_cleanup
+
+        return grandchild_pid, wait_for_grandchild
+
+    def _create_container(self, temp_dir, container_params, child_setup_fn):
+        """Start the child process of a new container, which sets up the container
+        and then waits until it receives the tool that should be started.
+        This method does not wait for the container setup to finish.
+        @param container_params: a tuple of root_dir, memlimit, memory_nodes, and
+            output_dir (None if there are no result files)
+        @return a _PreparedContainer instance
+        """
+        root_dir, memlimit, memory_nodes, output_dir = container_params
+
         # We have three processes involved:
         # parent: the current Python process in which RunExecutor is executing
         # child: child process in new namespace (PID 1 in inner namespace),
@@ -562,45 +783,31 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         # grandchild: child of child process (PID 2 in inner namespace), exec()s tool
 
         # We need the following communication steps between these proceses:
+        # 0) parent tells child which tool should be started.
         # 1a) grandchild tells parent its PID (in outer namespace).
         # 1b) grandchild tells parent that it is ready and measurement should begin.
         # 2) parent tells grandchild that measurement has begun and tool should
         #    be exec()ed.
         # 3) child tells parent about return value and resource consumption of
         #    grandchild.
+        # 0 is done by sending the command line, environment, working directory, and
+        # the file descriptors for stdin/stdout/stderr through a Unix socket,
+        # such that the container can be set up before the tool is known.
         # 1a and 1b are done together by sending the PID through a pipe.
         # 2 is done by sending a null byte through a pipe.
         # 3 is done by sending a pickled object through the same pipe as #2.
         # We cannot use the same pipe for both directions, because otherwise a sender
         # might read the bytes it has sent itself.
 
-        # Error codes from child to parent
-        CHILD_OSERROR = 128  # noqa: N806 local constant
-        CHILD_UNKNOWN_ERROR = 129  # noqa: N806 local constant
-
         # "downstream" pipe parent->grandchild
         from_parent, to_grandchild = os.pipe()
         # "upstream" pipe grandchild/child->parent
         from_grandchild, to_parent = os.pipe()
+        # socket parent->child for the tool that should be started
+        job_socket, from_parent_job = socket.socketpair()
 
-        # The protocol for these pipes is that first the parent sends the marker for
-        # user mappings, then the grand child sends its outer PID back,
-        # and finally the parent sends its completion marker.
-        # After the run, the child sends the result of the grand child and then waits
-        # for the post_run marker, before it terminates.
-        MARKER_USER_MAPPING_COMPLETED = b"A"  # noqa: N806 local constant
-        MARKER_PARENT_COMPLETED = b"B"  # noqa: N806 local constant
-        MARKER_PARENT_POST_RUN_COMPLETED = b"C"  # noqa: N806 local constant
-
-        # If the current directory is within one of the bind mounts we create,
-        # we need to cd into this directory again, otherwise we would not see the
-        # bind mount, but the directory behind it.
-        # Thus we always set cwd to force a change of directory.
-        if root_dir is None:
-            cwd = os.path.abspath(cwd or os.curdir)
-        else:
-            root_dir = os.path.abspath(root_dir)
-            cwd = os.path.abspath(cwd)
+        # File descriptor for a copy of the mount template, if one is used
+        template_fd = self._clone_mount_template() if root_dir is None else None
 
         def grandchild():
             """Setup everything inside the process that finally exec()s the tool."""
@@ -624,7 +831,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                 # and wait until parent is also ready
                 os.write(to_parent, str(my_outer_pid).encode())
                 received = os.read(from_parent, 1)
-                assert received == MARKER_PARENT_COMPLETED, received
+                assert received == _MARKER_PARENT_COMPLETED, received
             except BaseException as e:
                 # When using runexec, this logging will end up in the output.log file,
                 # where usually the tool output is. This is suboptimal, but probably
@@ -662,16 +869,15 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                 # (if containers are started in parallel).
                 # Thus we do not use the close_fds feature of subprocess.Popen,
                 # but do the same here manually. We keep the relevant ends of our pipes,
-                # and stdin/out/err of child and grandchild.
+                # and receive stdin/out/err of grandchild later.
                 necessary_fds = {
                     sys.stdin,
                     sys.stdout,
                     sys.stderr,
                     to_parent,
                     from_parent,
-                    stdin,
-                    stdout,
-                    stderr,
+                    from_parent_job,
+                    template_fd,
                 } - {None}
                 container.close_open_fds(keep_files=necessary_fds)
 
@@ -692,17 +898,18 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
 
                     # Wait until user mapping is finished,
                     # this is necessary for filesystem writes
-                    received = os.read(from_parent, len(MARKER_USER_MAPPING_COMPLETED))
-                    assert received == MARKER_USER_MAPPING_COMPLETED, received
+                    received = os.read(from_parent, len(_MARKER_USER_MAPPING_COMPLETED))
+                    assert received == _MARKER_USER_MAPPING_COMPLETED, received
 
                     if root_dir is not None:
                         self._setup_root_filesystem(root_dir)
                     else:
                         self._setup_container_filesystem(
                             temp_dir,
-                            output_dir if result_files_patterns else None,
+                            output_dir,
                             memlimit,
                             memory_nodes,
+                            template_fd,
                         )
 
                     # Marking this process as "non-dumpable" (no core dumps) also
@@ -722,7 +929,16 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                         traceback.extract_tb(e.__traceback__, limit=-1)[0].line,
                         e,
                     )
-                    return CHILD_OSERROR
+                    return _CHILD_OSERROR
+
+                # Wait until the tool is known, this is where a prepared container
+                # waits for its run.
+                job = _receive_job(from_parent_job)
+                from_parent_job.close()
+                if job is None:
+                    # Parent discarded this container.
+                    return 0
+                args, env, cwd, stdin, stdout, stderr = job
 
                 try:
                     os.chdir(cwd)
@@ -730,7 +946,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     logging.critical(
                         "Cannot change into working directory inside container: %s", e
                     )
-                    return CHILD_OSERROR
+                    return _CHILD_OSERROR
 
                 container.setup_seccomp_filter()
 
@@ -746,11 +962,11 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     )
                 except (OSError, RuntimeError) as e:
                     logging.critical("Cannot start process: %s", e)
-                    return CHILD_OSERROR
+                    return _CHILD_OSERROR
 
                 # keep capability for unmount if necessary later
                 necessary_capabilities = (
-                    [libc.CAP_SYS_ADMIN] if result_files_patterns else []
+                    [libc.CAP_SYS_ADMIN] if output_dir is not None else []
                 )
                 container.drop_capabilities(keep=necessary_capabilities)
 
@@ -773,7 +989,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     grandchild_result[0],
                 )
 
-                if result_files_patterns:
+                if output_dir is not None:
                     # Remove the bind mount that _setup_container_filesystem added
                     # such that the parent can access the result files.
                     libc.umount(temp_dir.encode())
@@ -797,13 +1013,13 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                 # finished. If the child terminates, the container file system and its
                 # tmpfs go away.
                 received = os.read(from_parent, 1)
-                assert received == MARKER_PARENT_POST_RUN_COMPLETED, received
+                assert received == _MARKER_PARENT_POST_RUN_COMPLETED, received
                 os.close(from_parent)
 
                 return 0
             except OSError:
                 logging.exception("Error in child process of RunExecutor")
-                return CHILD_OSERROR
+                return _CHILD_OSERROR
             except subprocess.SubprocessError as e:
                 # only reason should be "Exception occurred in preexec_fn"
                 if "Exception occurred in preexec_fn" in str(e):
@@ -813,14 +1029,14 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     )
                 else:
                     logging.exception("Error in child process of RunExecutor")
-                return CHILD_UNKNOWN_ERROR
+                return _CHILD_UNKNOWN_ERROR
             except BaseException:
                 # Need to catch everything because this method always needs to return an
                 # int (we are inside a C callback that requires returning int).
                 logging.exception("Error in child process of RunExecutor")
-                return CHILD_UNKNOWN_ERROR
+                return _CHILD_UNKNOWN_ERROR
 
-        try:  # parent
+        try:
             try:
                 child_pid = container.execute_in_namespace(
                     child, use_network_ns=not self._allow_network
@@ -851,149 +1067,134 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                         "Creating namespace for container mode failed: "
                         + os.strerror(e.errno)
                     )
-            logging.debug(
-                "Parent: child process of RunExecutor with PID %d started.", child_pid
-            )
-
-            def check_child_exit_code():
-                """Check if the child process terminated cleanly
-                and raise an error otherwise."""
-                child_exitcode, unused_child_rusage = self._wait_for_process(
-                    child_pid, args[0]
-                )
-                child_exitcode = util.ProcessExitCode.from_raw(child_exitcode)
-                logging.debug(
-                    "Parent: child process of RunExecutor with PID %d"
-                    " terminated with %s.",
-                    child_pid,
-                    child_exitcode,
-                )
-
-                if child_exitcode:
-                    if child_exitcode.value:
-                        if child_exitcode.value == CHILD_OSERROR:
-                            # This was an OSError in the child,
-                            # details were already logged
-                            raise BenchExecException(
-                                "execution in container failed, check log for details"
-                            )
-                        elif child_exitcode.value == CHILD_UNKNOWN_ERROR:
-                            raise BenchExecException("unexpected error in container")
-                        raise OSError(
-                            child_exitcode.value, os.strerror(child_exitcode.value)
-                        )
-                    raise OSError(
-                        0,
-                        f"Child process of RunExecutor terminated with {child_exitcode}",
-                    )
-
+        except BaseException:
+            os.close(from_grandchild)
+            os.close(to_grandchild)
+            job_socket.close()
+            raise
+        finally:
             # Close unnecessary ends of pipes such that read() does not block forever
             # if all other processes have terminated.
             os.close(from_parent)
             os.close(to_parent)
+            from_parent_job.close()
+            if template_fd is not None:
+                os.close(template_fd)
+        logging.debug(
+            "Parent: child process of RunExecutor with PID %d started.", child_pid
+        )
 
+        prepared_container = _PreparedContainer(
+            child_pid,
+            temp_dir,
+            container_params,
+            from_grandchild,
+            to_grandchild,
+            job_socket,
+        )
+        try:
             container.setup_user_mapping(child_pid, uid=self._uid, gid=self._gid)
             # signal child to continue
-            os.write(to_grandchild, MARKER_USER_MAPPING_COMPLETED)
-
-            try:
-                # Wait with timeout until from_grandchild becomes ready to be read.
-                rlist, _, _ = select.select([from_grandchild], [], [], 60)
-                if from_grandchild not in rlist:
-                    # Timeout has occurred, likely deadlock in child (cf. #656).
-                    logging.warning(
-                        "Child %s not ready after 60s, likely "
-                        "https://github.com/sosy-lab/benchexec/issues/656 occurred. "
-                        "Killing it and trying again.",
-                        child_pid,
-                    )
-                    # As long as we have not sent MARKER_PARENT_COMPLETED, the tool is
-                    # not yet started and it is safe to kill the child and restart.
-                    # Killing child (PID 1 in container) will also kill grandchild if it
-                    # already exists.
-                    util.kill_process(child_pid)
-                    # Open pipes will be close in finally.
-                    # Signal retry to caller.
-                    return None
-
-                # read at most 10 bytes because this is enough for 32bit int
-                grandchild_pid = int(os.read(from_grandchild, 10))
-            except ValueError:
-                # probably empty read, i.e., pipe closed,
-                # i.e., child or grandchild failed
-                check_child_exit_code()
-                assert False, (
-                    "Child process of RunExecutor terminated cleanly"
-                    " but did not send expected data."
-                )
-
+            os.write(to_grandchild, _MARKER_USER_MAPPING_COMPLETED)
+        except BaseException:
+            prepared_container.discard()
+            raise
+        return prepared_container
+
+    def _create_temp_dir(self):
+        if self._use_namespaces:
+            with self._prepared_container_lock:
+                prepared_container = self._prepared_container
+                self._prepared_container = None
+                if prepared_container is not None:
+                    # The run gets the temp dir of the prepared container,
+                    # and _take_prepared_container() looks it up again.
+                    prepared_container.claim_temp_dir()
+                    temp_dir = prepared_container.temp_dir
+                    self._claimed_containers[temp_dir] = prepared_container
+                    return temp_dir
+        return super(ContainerExecutor, self)._create_temp_dir()
+
+    def _take_prepared_container(self, temp_dir, container_params):
+        """Return the prepared container for the run with the given temp dir
+        if it exists and was set up with the given parameters, otherwise None."""
+        with self._prepared_container_lock:
+            prepared_container = self._claimed_containers.pop(temp_dir, None)
+        if prepared_container is None:
+            return None
+        if prepared_container.params == container_params:
             logging.debug(
-                "Parent: executing %s in grand child with PID %d"
-                " via child with PID %d.",
-                args[0],
-                grandchild_pid,
-                child_pid,
+                "Using prepared container with PID %d.", prepared_container.child_pid
             )
+            return prepared_container
 
-            # start measurements
-            cgroups.add_task(grandchild_pid)
-            parent_setup = parent_setup_fn()
-
-            # Signal grandchild that setup is finished
-            os.write(to_grandchild, MARKER_PARENT_COMPLETED)
-
-            # Copy file descriptor, otherwise we could not close from_grandchild in
-            # finally block and would leak a file descriptor in case of exception.
-            from_grandchild_copy = os.dup(from_grandchild)
-            to_grandchild_copy = os.dup(to_grandchild)
-        finally:
-            os.close(from_grandchild)
-            os.close(to_grandchild)
-
-        def wait_for_grandchild():
-            # 1024 bytes ought to be enough for everyone^Wour pickled result
-            try:
-                received = os.read(from_grandchild_copy, 1024)
-            except OSError as e:
-                if self.PROCESS_KILLED and e.errno == errno.EINTR:
-                    # Read was interrupted because of Ctrl+C, we just try again
-                    received = os.read(from_grandchild_copy, 1024)
-                else:
-                    raise e
-
-            if not received:
-                # Typically this means the child exited prematurely because an error
-                # occurred, and check_child_exitcode() will handle this.
-                # We close the pipe first, otherwise child could hang infinitely.
-                os.close(from_grandchild_copy)
-                os.close(to_grandchild_copy)
-                check_child_exit_code()
-                assert False, "Child process terminated cleanly without sending result"
-
-            exitcode, ru_child = pickle.loads(received)
-
-            base_path = f"/proc/{child_pid}/root"
-            parent_cleanup = parent_cleanup_fn(
-                parent_setup, util.ProcessExitCode.from_raw(exitcode), base_path
+        logging.debug(
+            "Discarding prepared container with PID %d because it does not match run.",
+            prepared_container.child_pid,
+        )
+        prepared_container.discard()
+        # The container setup might have created files in the temp dir (if no tmpfs
+        # is used), but the run needs an empty one.
+        util.rmtree(temp_dir)
+        os.mkdir(temp_dir, mode=0o700)
+        return None
+
+    def _prepare_next_container(self, container_params, child_setup_fn):
+        """Create a container in advance for the next run,
+        assuming it needs the same container parameters as the current one."""
+        temp_dir = super(ContainerExecutor, self)._create_temp_dir()
+        try:
+            prepared_container = self._create_container(
+                temp_dir, container_params, child_setup_fn
             )
+        except (BenchExecException, OSError) as e:
+            logging.warning("Cannot prepare container for next run: %s", e)
+            util.rmtree(temp_dir, onerror=util.log_rmtree_error)
+            return
 
-            if result_files_patterns:
-                # As long as the child process exists
-                # we can access the container file system here
-                self._transfer_output_files(
-                    base_path + temp_dir, cwd, output_dir, result_files_patterns
-                )
-
-            os.close(from_grandchild_copy)
-            os.write(to_grandchild_copy, MARKER_PARENT_POST_RUN_COMPLETED)
-            os.close(to_grandchild_copy)  # signal child that it can terminate
-            check_child_exit_code()
-
-            return exitcode, ru_child, parent_cleanup
+        with self._prepared_container_lock:
+            previous_container = self._prepared_container
+            self._prepared_container = prepared_container
+        if previous_container is not None:
+            previous_container.discard()
 
-        return grandchild_pid, wait_for_grandchild
+    def _get_mount_template(self):
+        """Return the mount template of this executor, creating it if necessary.
+        @return a _MountTemplate instance or None if no template should be used
+        """
+        with self._mount_template_lock:
+            if self._mount_template_enabled and self._mount_template is None:
+                try:
+                    self._mount_template = _MountTemplate(
+                        self._dir_modes, self._uid, self._gid
+                    )
+                except OSError as e:
+                    logging.warning(
+                        "Cannot prepare mount template for containers, "
+                        "setting up mount hierarchy for each run instead: %s",
+                        e,
+                    )
+                    self._mount_template_enabled = False
+            return self._mount_template
+
+    def _clone_mount_template(self):
+        """Return a file descriptor for a new copy of the mount template or None."""
+        mount_template = self._get_mount_template()
+        if not mount_template:
+            return None
+        try:
+            return mount_template.clone()
+        except OSError as e:
+            logging.warning(
+                "Cannot copy mount template for container, "
+                "setting up mount hierarchy from scratch: %s",
+                e,
+            )
+            return None
 
-    def _setup_container_filesystem(self, temp_dir, output_dir, memlimit, memory_nodes):
+    def _setup_container_filesystem(
+        self, temp_dir, output_dir, memlimit, memory_nodes, template_fd=None
+    ):
         """Setup the filesystem layout in the container.
         As first step, we create a copy of all existing mountpoints in mount_base,
         recursively, and as "private" mounts
@@ -1012,8 +1213,13 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         doing so, and second, we avoid race conditions if someone else changes the
         existing mountpoints.
 
+        If a mount template is used, only the hidden and overlay directories
+        are created and everything else is copied from the template.
+
         @param temp_dir:
             The base directory under which all our directories should be created.
+        @param template_fd:
+            None or a file descriptor for a copy of the mount template.
         """
         # All strings here are bytes to avoid issues
         # if existing mountpoints are invalid UTF-8.
@@ -1040,9 +1246,20 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         os.mkdir(work_base)
 
         # Copy all mounts to mount_base and apply directory modes
-        container.duplicate_mount_hierarchy(
-            mount_base, temp_base, work_base, self._dir_modes
-        )
+        if template_fd is not None:
+            container.setup_mount_hierarchy_from_template(
+                template_fd,
+                self._mount_template.operations,
+                mount_base,
+                temp_base,
+                work_base,
+                os.path.join(temp_dir, b"template"),
+                self._dir_modes,
+            )
+        else:
+            container.duplicate_mount_hierarchy(
+                mount_base, temp_base, work_base, self._dir_modes
+            )
 
         # Now configure some special hard-coded cases
 
@@ -1200,5 +1417,241 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         )
 
 
+class _MountTemplate(object):
+    """
+    A template for the mount hierarchy of containers
+    (cf. container.build_mount_template()).
+    The template is built once and kept alive by a helper process in its own
+    namespaces, which hands out detached copies of it as file descriptors.
+    The helper process terminates if this instance is garbage collected
+    or the current process terminates.
+    """
+
+    def __init__(self, dir_modes, uid, gid):
+        """
+        Build the template (takes as long as setting up the mount hierarchy once).
+        @param dir_modes: the directory modes as bytes, sorted by length
+        @param uid, gid: the user and group IDs used inside the namespace
+        """
+        self._lock = threading.Lock()
+        template_dir = tempfile.mkdtemp(prefix="BenchExec_mount_template_")
+        self._socket, holder_socket = socket.socketpair()
+
+        def holder():
+            """Build the template and hand out copies until the socket is closed."""
+            try:
+                container.close_open_fds(
+                    keep_files={sys.stdout, sys.stderr, holder_socket}
+                )
+                # Wait until user mapping is finished
+                holder_socket.recv(1)
+                try:
+                    operations = container.build_mount_template(
+                        template_dir.encode(), dir_modes
+                    )
+                    _send_message(holder_socket, (operations, None))
+                except OSError as e:
+                    _send_message(holder_socket, (None, str(e)))
+                    return 0
+
+                while holder_socket.recv(1):
+                    tree_fd = libc.open_tree(
+                        libc.AT_FDCWD,
+                        template_dir.encode(),
+                        libc.OPEN_TREE_CLONE
+                        | libc.OPEN_TREE_CLOEXEC
+                        | libc.AT_RECURSIVE,
+                    )
+                    holder_socket.sendmsg(
+                        [b"T"],
+                        [
+                            (
+                                socket.SOL_SOCKET,
+                                socket.SCM_RIGHTS,
+                                array.array("i", [tree_fd]),
+                            )
+                        ],
+                    )
+                    os.close(tree_fd)
+                return 0
+            except BaseException:
+                # Need to catch everything because this method always needs to return an
+                # int (we are inside a C callback that requires returning int).
+                logging.exception("Error in process for mount template")
+                return 1
+
+        try:
+            pid = container.execute_in_namespace(holder, use_network_ns=False)
+        except OSError:
+            self._socket.close()
+            os.rmdir(template_dir)
+            raise
+        finally:
+            holder_socket.close()
+        self._finalizer = weakref.finalize(
+            self, _MountTemplate._close, self._socket, pid, template_dir
+        )
+
+        container.setup_user_mapping(pid, uid=uid, gid=gid)
+        self._socket.send(b"M")
+        self.operations, error = _receive_message(self._socket)
+        if error:
+            self.close()
+            raise OSError(0, error)
+        logging.debug(
+            "Prepared mount template for containers in process %d "
+            "with %d operations per run.",
+            pid,
+            len(self.operations),
+        )
+
+    def clone(self):
+        """
+        Create a new copy of the template.
+        @return a file descriptor of a detached mount tree
+        """
+        fd_size = array.array("i").itemsize
+        with self._lock:
+            self._socket.send(b"C")
+            _msg, ancdata, _flags, _addr = self._socket.recvmsg(
+                1, socket.CMSG_SPACE(fd_size)
+            )
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                return array.array("i", data[:fd_size])[0]
+        raise OSError(errno.EPIPE, "Process for mount template did not send a copy")
+
+    def close(self):
+        """Terminate the helper process and remove the template."""
+        self._finalizer()
+
+    @staticmethod
+    def _close(sock, pid, template_dir):
+        sock.close()  # lets helper process terminate
+        os.waitpid(pid, 0)
+        os.rmdir(template_dir)
+
+
+class _PreparedContainer(object):
+    """
+    A container whose child process was started and sets up the container,
+    but that has not yet received the tool that it should execute.
+    The child process is killed if this instance is garbage collected
+    or the current process terminates before the container is started.
+    """
+
+    def __init__(
+        self, child_pid, temp_dir, params, from_grandchild, to_grandchild, job_socket
+    ):
+        self.child_pid = child_pid
+        self.temp_dir = temp_dir
+        self.params = params
+        self.from_grandchild = from_grandchild
+        self.to_grandchild = to_grandchild
+        self._job_socket = job_socket
+        # the temp dir is deleted together with the container unless a run claims it
+        self._owned_temp_dirs = [temp_dir] if temp_dir else []
+        self._finalizer = weakref.finalize(
+            self,
+            _PreparedContainer._discard,
+            child_pid,
+            from_grandchild,
+            to_grandchild,
+            job_socket,
+            self._owned_temp_dirs,
+        )
+
+    def claim_temp_dir(self):
+        """Hand over the responsibility for deleting the temp dir to the caller."""
+        self._owned_temp_dirs.clear()
+
+    def start(self, args, env, cwd, stdin, stdout, stderr):
+        """
+        Let the container start the given tool, with the same meaning of the
+        parameters as for subprocess.Popen.
+        Afterwards, the caller is responsible for the child process and the pipes.
+        """
+        self._finalizer.detach()
+        try:
+            _send_job(self._job_socket, (args, env, cwd), [stdin, stdout, stderr])
+        finally:
+            self._job_socket.close()
+
+    def discard(self):
+        """Kill the child process and release all resources of this container."""
+        self._finalizer()
+
+    @staticmethod
+    def _discard(child_pid, from_grandchild, to_grandchild, job_socket, temp_dirs):
+        util.kill_process(child_pid)
+        os.waitpid(child_pid, 0)
+        os.close(from_grandchild)
+        os.close(to_grandchild)
+        job_socket.close()
+        for temp_dir in temp_dirs:
+            util.rmtree(temp_dir, onerror=util.log_rmtree_error)
+
+
+def _send_job(sock, job, files):
+    """
+    Send a pickled object and the file descriptors of the given files to another
+    process. Entries of files may also be None or the special values of subprocess
+    like DEVNULL, which are sent as they are.
+    """
+    fds = []
+    file_args = []
+    for file in files:
+        fd = file.fileno() if hasattr(file, "fileno") else file
+        if fd is not None and fd >= 0:
+            file_args.append((True, len(fds)))
+            fds.append(fd)
+        else:
+            file_args.append((False, fd))
+    ancdata = (
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))] if fds else []
+    )
+    sock.sendmsg([b"J"], ancdata)
+    _send_message(sock, job + (file_args,))
+
+
+def _receive_job(sock):
+    """
+    Receive what _send_job() sent, with the file descriptors at the position of the
+    respective files.
+    @return a tuple of the sent object's items followed by the files,
+        or None if the socket was closed without sending anything
+    """
+    fd_size = array.array("i").itemsize
+    msg, ancdata, _flags, _addr = sock.recvmsg(1, socket.CMSG_SPACE(3 * fd_size))
+    if not msg:
+        return None
+    fds = array.array("i")
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - (len(data) % fd_size)])
+    *job, file_args = _receive_message(sock)
+    files = [fds[value] if is_fd else value for is_fd, value in file_args]
+    return tuple(job) + tuple(files)
+
+
+def _send_message(sock, obj):
+    data = pickle.dumps(obj)
+    sock.sendall(struct.pack("!I", len(data)) + data)
+
+
+def _receive_message(sock):
+    def receive(length):
+        data = b""
+        while len(data) < length:
+            chunk = sock.recv(length - len(data))
+            if not chunk:
+                raise OSError(errno.EPIPE, "Other process terminated")
+            data += chunk
+        return data
+
+    (length,) = struct.unpack("!I", receive(4))
+    return pickle.loads(receive(length))
+
+
 if __name__ == "__main__":
     main()
@@ -134,6 +134,8 @@ def _init_container(
     dir_modes,
     container_system_config,
     container_tmpfs,  # ignored, tmpfs is always used
+    mount_template,  # ignored, only one container is created
+    prepare_container,  # ignored, only one container is created
 ):
     """
     Create a fork of this process in a container. This method only returns in the fork,
@@ -0,0 +1,779 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains an executor that distributes the runs of a benchmark
+to worker daemons on several machines instead of executing them locally.
+
+benchexec acts as coordinator (if started with --coordinator) and waits for
+worker daemons (started with benchexec-worker) to connect to it.
+Each worker daemon executes a given number of runs in parallel with RunExecutor,
+using its own assignment of CPU cores and memory banks, and sends back the results
+and the output of the runs. Runs of workers that disconnect or stop sending
+heartbeats are given to other workers.
+
+The workers need to see the tool and the input files under the same paths as the
+coordinator, e.g., because the machines share a file system.
+The protocol consists of JSON objects, one per line, and is not authenticated,
+so it should only be used in trusted networks.
+"""
+
+import argparse
+import base64
+import collections
+import itertools
+import json
+import logging
+import os
+import platform
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from benchexec import __version__
+from benchexec import BenchExecException
+from benchexec import cgroups
+from benchexec import containerexecutor
+from benchexec import resources
+from benchexec import resultcache
+from benchexec.runexecutor import RunExecutor
+from benchexec.pqos import Pqos
+from benchexec import systeminfo
+from benchexec import tooladapter
+from benchexec import util
+
+STOPPED_BY_INTERRUPT = False
+
+# the coordinator of the current benchmark, set by execute_benchmark()
+_coordinator = None
+
+_PROTOCOL_VERSION = 1
+
+# Interval in seconds in which workers send heartbeats,
+# workers that are silent for three intervals are considered gone.
+_HEARTBEAT_INTERVAL = 10
+
+# Interval in seconds in which workers try to connect to the coordinator
+_RECONNECT_INTERVAL = 2
+
+# Number of workers that may disappear while executing a run before giving up the run
+_MAX_ATTEMPTS = 3
+
+
+class _Connection(object):
+    """A socket connection over which JSON messages are sent, one per line."""
+
+    def __init__(self, sock):
+        self.socket = sock
+        self._reader = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        data = json.dumps(message).encode() + b"\n"
+        with self._send_lock:
+            self.socket.sendall(data)
+
+    def receive(self):
+        """Return the next message, or None if the connection was closed."""
+        line = self._reader.readline()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise OSError(f"invalid message: {e}")
+
+    def shutdown(self):
+        """Let pending and future receive() calls return None."""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        self.shutdown()
+        self._reader.close()
+        self.socket.close()
+
+
+# --- coordinator ---
+
+
+def init(config, benchmark):
+    tool_locator = tooladapter.create_tool_locator(config)
+    benchmark.executable = benchmark.tool.executable(tool_locator)
+    benchmark.tool_version = benchmark.tool.version(benchmark.executable)
+
+    local_options = [
+        ("pipeline_run_sets", "--pipeline-run-sets"),
+        ("worker_processes", "--worker-processes"),
+        ("memory_admission_margin", "--memory-admission-margin"),
+        ("result_cache", "--result-cache"),
+        ("schedule_by_results", "--schedule-by-results"),
+    ]
+    for option, name in local_options:
+        if getattr(config, option, None):
+            logging.warning("Ignoring %s, it is supported only locally.", name)
+
+
+def get_system_info():
+    # the system information of the workers is added when they deliver results
+    return None
+
+
+def execute_benchmark(benchmark, output_handler):
+    global _coordinator
+    try:
+        _coordinator = _Coordinator(
+            benchmark.config.coordinator, benchmark, output_handler
+        )
+    except OSError as e:
+        raise BenchExecException(
+            f"Could not listen on {benchmark.config.coordinator}: {e}"
+        )
+    try:
+        for runSet in benchmark.run_sets:
+            if STOPPED_BY_INTERRUPT:
+                break
+
+            if not runSet.should_be_executed():
+                output_handler.output_for_skipping_run_set(runSet)
+
+            elif not runSet.runs:
+                output_handler.output_for_skipping_run_set(
+                    runSet, "because it has no files"
+                )
+
+            else:
+                _execute_run_set(runSet, output_handler)
+    finally:
+        _coordinator.shutdown()
+
+    output_handler.output_after_benchmark(STOPPED_BY_INTERRUPT)
+    return 0
+
+
+def _execute_run_set(runSet, output_handler):
+    walltime_before = time.monotonic()
+    output_handler.output_before_run_set(runSet)
+
+    runs = [run for run in runSet.runs if not run.result_restored]
+    _coordinator.submit(runSet, runs)
+    _coordinator.wait_until_finished(runSet)
+
+    usedWallTime = time.monotonic() - walltime_before
+    if STOPPED_BY_INTERRUPT:
+        output_handler.set_error("interrupted", runSet)
+    output_handler.output_after_run_set(
+        runSet, cputime=_coordinator.cputime[runSet], walltime=usedWallTime
+    )
+
+
+def stop():
+    global STOPPED_BY_INTERRUPT
+    STOPPED_BY_INTERRUPT = True
+    if _coordinator:
+        _coordinator.stop()
+
+
+class _WorkerConnection(object):
+    """The state of a worker daemon that is connected to the coordinator."""
+
+    def __init__(self, connection, address, hello):
+        self.connection = connection
+        self.slots = int(hello["slots"])
+        self.hostname = hello.get("hostname") or address[0]
+        self.systeminfo = hello.get("systeminfo")
+        self.name = f"{self.hostname} ({address[0]}:{address[1]})"
+        self.running = {}  # id -> run
+
+
+class _Coordinator(object):
+    """
+    Accepts connections of worker daemons and hands out the queued runs to them.
+    Runs are sent to a worker as long as it has free slots,
+    and the results are processed by one thread per worker.
+    """
+
+    def __init__(self, address, benchmark, output_handler):
+        self.benchmark = benchmark
+        self.output_handler = output_handler
+        family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+        self.server = socket.create_server(address, family=family)
+        self.address = self.server.getsockname()
+        self.closed = False
+
+        # notified whenever a worker connects or disconnects or a run is finished
+        self.state_changed = threading.Condition()
+        self.workers = []
+        self.queue = collections.deque()
+        self.attempts = collections.Counter()  # number of workers that lost a run
+        self.started_runs = set()
+        self.unfinished_runs = {}  # number of unfinished runs per run set
+        self.cputime = {}  # sum of CPU time of the finished runs per run set
+        self.system_info_stored = set()  # pairs of host name and run set
+        self._run_ids = itertools.count()
+
+        limits = benchmark.rlimits
+        self.run_options = {
+            "cpu_cores": limits.cpu_cores,
+            "memlimit": limits.memory,
+            "hardtimelimit": limits.cputime_hard,
+            "softtimelimit": limits.cputime,
+            "walltimelimit": limits.walltime,
+            "environments": benchmark.environment(),
+            "workingDir": benchmark.working_directory() or os.getcwd(),
+            "maxLogfileSize": benchmark.config.maxLogfileSize,
+            "files_count_limit": benchmark.config.filesCountLimit,
+            "files_size_limit": benchmark.config.filesSizeLimit,
+            "result_files_patterns": benchmark.result_files_patterns,
+        }
+
+        threading.Thread(target=self._accept_workers, daemon=True).start()
+        logging.info(
+            "Waiting for workers to connect to %s:%s.", self.address[0], self.address[1]
+        )
+
+    def _accept_workers(self):
+        while True:
+            try:
+                sock, address = self.server.accept()
+            except OSError:
+                return  # server socket was closed
+            threading.Thread(
+                target=self._handle_worker, args=(sock, address), daemon=True
+            ).start()
+
+    def _handle_worker(self, sock, address):
+        sock.settimeout(3 * _HEARTBEAT_INTERVAL)
+        connection = _Connection(sock)
+        try:
+            hello = connection.receive()
+            if not hello or hello.get("type") != "hello":
+                raise OSError("worker did not identify itself")
+            if hello.get("version") != _PROTOCOL_VERSION:
+                raise OSError(
+                    f"worker uses protocol version {hello.get('version')}, "
+                    f"but {_PROTOCOL_VERSION} is required"
+                )
+            worker = _WorkerConnection(connection, address, hello)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Rejecting worker %s:%s: %s", address[0], address[1], e)
+            connection.close()
+            return
+
+        with self.state_changed:
+            if self.closed:
+                connection.close()
+                return
+            logging.info(
+                "Worker %s connected with %d slots.", worker.name, worker.slots
+            )
+            self.workers.append(worker)
+            self._dispatch()
+            self.state_changed.notify_all()
+
+        reason = "connection closed"
+        try:
+            while True:
+                message = connection.receive()
+                if message is None:
+                    break
+                if message.get("type") == "result":
+                    self._process_result(worker, message)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            reason = str(e) or type(e).__name__
+        self._worker_disconnected(worker, reason)
+
+    def _worker_disconnected(self, worker, reason):
+        with self.state_changed:
+            self.workers.remove(worker)
+            worker.connection.close()
+            if self.closed:
+                return
+            lost_runs = list(worker.running.values())
+            logging.warning(
+                "Worker %s disconnected (%s), re-queueing %d runs.",
+                worker.name,
+                reason,
+                len(lost_runs),
+            )
+            for run in reversed(lost_runs):
+                self.attempts[run] += 1
+                if self.attempts[run] >= _MAX_ATTEMPTS:
+                    logging.error(
+                        "Giving up run %s after %d workers disappeared "
+                        "while executing it.",
+                        run.identifier,
+                        self.attempts[run],
+                    )
+                    self._run_finished(run)
+                else:
+                    self.queue.appendleft(run)
+            self._dispatch()
+            self.state_changed.notify_all()
+
+    def submit(self, runSet, runs):
+        """Queue the given runs of the given run set for execution."""
+        with self.state_changed:
+            self.unfinished_runs[runSet] = len(runs)
+            self.cputime[runSet] = 0
+            self.queue.extend(runs)
+            self._dispatch()
+
+    def _dispatch(self):
+        """Send queued runs to workers with free slots (needs to hold the lock)."""
+        for worker in self.workers:
+            while (
+                self.queue
+                and len(worker.running) < worker.slots
+                and not STOPPED_BY_INTERRUPT
+            ):
+                run = self.queue.popleft()
+                run_id = next(self._run_ids)
+                worker.running[run_id] = run
+                if run not in self.started_runs:
+                    self.started_runs.add(run)
+                    self.output_handler.output_before_run(run)
+                logging.debug('Sending run "%s" to %s.', run.identifier, worker.name)
+                try:
+                    worker.connection.send(
+                        {
+                            "type": "run",
+                            "id": run_id,
+                            "args": run.cmdline(),
+                            **self.run_options,
+                        }
+                    )
+                except OSError:
+                    # the thread of the worker will notice the broken connection
+                    # and re-queue its runs
+                    worker.connection.shutdown()
+                    break
+
+    def _process_result(self, worker, message):
+        with self.state_changed:
+            run = worker.running.pop(message["id"])
+
+        if message.get("error"):
+            logging.critical(
+                "Run %s failed on %s: %s", run.identifier, worker.name, message["error"]
+            )
+        elif message.get("killed"):
+            logging.debug('Run "%s" was killed on %s.', run.identifier, worker.name)
+        else:
+            self._write_output(run, message)
+            values = resultcache.decode_values(message["values"])
+            values["host"] = worker.hostname
+            self._store_system_info(worker, run.runSet)
+            run.set_result(values, ["host"])
+            self.output_handler.output_after_run(run)
+
+        with self.state_changed:
+            self._run_finished(run)
+            self._dispatch()
+            self.state_changed.notify_all()
+
+    def _write_output(self, run, message):
+        os.makedirs(os.path.dirname(run.log_file), exist_ok=True)
+        with open(run.log_file, "wb") as f:
+            f.write(base64.b64decode(message["log"]))
+        for name, content in message.get("files", {}).items():
+            path = os.path.normpath(os.path.join(run.result_files_folder, name))
+            if not path.startswith(run.result_files_folder + os.sep):
+                logging.warning("Ignoring result file %s outside of run.", name)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(base64.b64decode(content))
+
+    def _store_system_info(self, worker, runSet):
+        info = worker.systeminfo
+        with self.state_changed:
+            if not info or (worker.hostname, runSet) in self.system_info_stored:
+                return
+            self.system_info_stored.add((worker.hostname, runSet))
+            self.output_handler.store_system_info(
+                info["os"],
+                info["cpu_model"],
+                info["cpu_number_of_cores"],
+                info["cpu_max_frequency"],
+                info["memory"],
+                worker.hostname,
+                runSet,
+                info.get("environment", {}),
+                info.get("cpu_turboboost"),
+            )
+
+    def _run_finished(self, run):
+        """Count a run as finished (needs to hold the lock)."""
+        self.unfinished_runs[run.runSet] -= 1
+        self.cputime[run.runSet] += run.values.get("cputime") or 0
+
+    def is_running(self):
+        return any(worker.running for worker in self.workers)
+
+    def wait_until_finished(self, runSet):
+        """
+        Wait until all runs of the given run set are finished,
+        or until the execution was stopped and no runs are running anymore.
+        """
+        with self.state_changed:
+            self.state_changed.wait_for(
+                lambda: self.unfinished_runs[runSet] == 0
+                or (STOPPED_BY_INTERRUPT and not self.is_running())
+            )
+
+    def stop(self):
+        """Remove all queued runs and let the workers kill their current runs."""
+        with self.state_changed:
+            self.queue.clear()
+            for worker in self.workers:
+                try:
+                    worker.connection.send({"type": "stop"})
+                except OSError:
+                    pass
+            self.state_changed.notify_all()
+
+    def shutdown(self):
+        """Stop accepting workers and close all connections."""
+        with self.state_changed:
+            self.closed = True
+            self.server.close()
+            for worker in self.workers:
+                # the thread of the worker closes the connection
+                worker.connection.shutdown()
+
+
+# --- worker daemon ---
+
+
+class _WorkerDaemon(object):
+    """
+    A worker that connects to a coordinator and executes the runs it receives
+    with a given number of RunExecutor instances in parallel.
+    """
+
+    def __init__(self, slots, containerargs, use_hyperthreading=True, coreset=None):
+        self.slots = slots
+        self.containerargs = containerargs
+        self.use_hyperthreading = use_hyperthreading
+        self.coreset = coreset
+        self.my_cgroups = cgroups.find_my_cgroups()
+        self.stopped = False
+        self.connection = None
+        self.run_executors = []
+        self._resources_lock = threading.Lock()
+        # cores and memory banks per slot for each combination of limits
+        self._resources = {}
+
+        info = systeminfo.SystemInfo()
+        self.hello = {
+            "type": "hello",
+            "version": _PROTOCOL_VERSION,
+            "slots": slots,
+            "hostname": info.hostname,
+            "systeminfo": vars(info),
+        }
+
+    def serve(self, address):
+        """Connect to the coordinator and execute runs, reconnecting as necessary."""
+        connected = False
+        while not self.stopped:
+            try:
+                sock = socket.create_connection(address)
+            except OSError as e:
+                if connected:
+                    logging.info("Waiting for coordinator %s:%s.", *address)
+                logging.debug("Could not connect to %s:%s: %s", *address, e)
+                connected = False
+                time.sleep(_RECONNECT_INTERVAL)
+                continue
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            connected = True
+            logging.info("Connected to coordinator %s:%s.", *address)
+            self.serve_connection(_Connection(sock))
+
+    def serve_connection(self, connection):
+        """Execute runs received over the given connection until it is closed."""
+        self.connection = connection
+        # RunExecutor instances cannot be used anymore after stop() was called
+        self.run_executors = [
+            RunExecutor(**self.containerargs) for _ in range(self.slots)
+        ]
+        free_slots = queue.Queue()
+        for slot in range(self.slots):
+            free_slots.put(slot)
+        threads = []
+        heartbeat_stopped = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._send_heartbeats, args=(heartbeat_stopped,), daemon=True
+        )
+        try:
+            connection.send(self.hello)
+            heartbeat.start()
+            while not self.stopped:
+                message = connection.receive()
+                if message is None:
+                    break
+                if message.get("type") == "run":
+                    slot = free_slots.get()
+                    thread = threading.Thread(
+                        target=self._execute, args=(slot, message, free_slots)
+                    )
+                    thread.start()
+                    threads.append(thread)
+                elif message.get("type") == "stop":
+                    self._kill_runs()
+        except OSError as e:
+            if not self.stopped:
+                logging.warning("Connection to coordinator failed: %s", e)
+        # nobody is interested in the results of still running runs anymore
+        self._kill_runs()
+        for thread in threads:
+            thread.join()
+        heartbeat_stopped.set()
+        connection.close()
+        logging.info("Disconnected from coordinator.")
+
+    def _send_heartbeats(self, stopped):
+        while not stopped.wait(_HEARTBEAT_INTERVAL):
+            try:
+                self.connection.send({"type": "alive"})
+            except OSError:
+                return
+
+    def _kill_runs(self):
+        for run_executor in self.run_executors:
+            run_executor.stop()
+
+    def stop(self):
+        self.stopped = True
+        self._kill_runs()
+        if self.connection:
+            # may be called from a signal handler while receive() is active
+            self.connection.shutdown()
+
+    def _get_resources(self, slot, cpu_cores, memlimit):
+        """Get the CPU cores and memory banks of a slot for runs with given limits."""
+        with self._resources_lock:
+            if (cpu_cores, memlimit) not in self._resources:
+                coreAssignment = None
+                memoryAssignment = None
+                if cpu_cores:
+                    coreAssignment = resources.get_cpu_cores_per_run(
+                        cpu_cores,
+                        self.slots,
+                        self.use_hyperthreading,
+                        self.my_cgroups,
+                        self.coreset,
+                    )
+                    memoryAssignment = resources.get_memory_banks_per_run(
+                        coreAssignment, self.my_cgroups
+                    )
+                if memlimit:
+                    resources.check_memory_size(
+                        memlimit,
+                        self.slots,
+                        memoryAssignment,
+                        self.my_cgroups,
+                        admission_control=True,
+                    )
+                self._resources[(cpu_cores, memlimit)] = (
+                    coreAssignment,
+                    memoryAssignment,
+                )
+            coreAssignment, memoryAssignment = self._resources[(cpu_cores, memlimit)]
+        return (
+            coreAssignment[slot] if coreAssignment else None,
+            memoryAssignment[slot] if memoryAssignment else None,
+        )
+
+    def _execute(self, slot, message, free_slots):
+        run_executor = self.run_executors[slot]
+        result = {"type": "result", "id": message["id"]}
+        try:
+            with tempfile.TemporaryDirectory(prefix="BenchExec_worker_") as temp_dir:
+                result.update(self._execute_run(run_executor, slot, message, temp_dir))
+        except (BenchExecException, SystemExit) as e:
+            result["error"] = str(e)
+        except BaseException as e:
+            logging.exception("Exception during run execution")
+            result["error"] = f"Exception during run execution: {e}"
+
+        free_slots.put(slot)
+        try:
+            self.connection.send(result)
+        except OSError as e:
+            logging.debug("Could not send result of run: %s", e)
+
+    def _execute_run(self, run_executor, slot, message, temp_dir):
+        cores, memory_nodes = self._get_resources(
+            slot, message["cpu_cores"], message["memlimit"]
+        )
+        log_file = os.path.join(temp_dir, "output.log")
+        output_dir = os.path.join(temp_dir, "files")
+        logging.debug("Executing run with command line %s", message["args"])
+
+        pqos = Pqos()
+        if cores:
+            pqos.start_monitoring([cores])
+        run_result = run_executor.execute_run(
+            message["args"],
+            output_filename=log_file,
+            output_dir=output_dir,
+            result_files_patterns=message["result_files_patterns"],
+            hardtimelimit=message["hardtimelimit"],
+            softtimelimit=message["softtimelimit"],
+            walltimelimit=message["walltimelimit"],
+            cores=cores,
+            memory_nodes=memory_nodes,
+            memlimit=message["memlimit"],
+            environments=message["environments"],
+            workingDir=message["workingDir"],
+            maxLogfileSize=message["maxLogfileSize"],
+            files_count_limit=message["files_count_limit"],
+            files_size_limit=message["files_size_limit"],
+        )
+        run_result.update(pqos.stop_monitoring())
+        if run_executor.PROCESS_KILLED:
+            return {"killed": True}
+
+        if cores:
+            run_result["cpuCores"] = cores
+        if memory_nodes:
+            run_result["memoryNodes"] = memory_nodes
+        return {
+            "killed": False,
+            "values": resultcache.encode_values(run_result),
+            "log": _read_base64(log_file),
+            "files": {
+                os.path.relpath(os.path.join(dirpath, name), output_dir): _read_base64(
+                    os.path.join(dirpath, name)
+                )
+                for dirpath, _, filenames in os.walk(output_dir)
+                for name in filenames
+            },
+        }
+
+
+def _read_base64(path):
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def main(argv=None):
+    """
+    The command-line interface of the worker daemon (benchexec-worker).
+    """
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        fromfile_prefix_chars="@",
+        description="""
+            Worker daemon that connects to a coordinator (benchexec --coordinator)
+            and executes the runs that it receives with resource limits
+            and measurements.
+            Part of BenchExec: https://github.com/sosy-lab/benchexec/
+        """,
+    )
+    parser.add_argument(
+        "coordinator",
+        type=util.parse_address,
+        metavar="HOST:PORT",
+        help="address of the coordinator",
+    )
+    parser.add_argument(
+        "-N",
+        "--numOfThreads",
+        dest="num_of_threads",
+        default=1,
+        type=int,
+        metavar="n",
+        help="Execute n runs in parallel",
+    )
+    parser.add_argument(
+        "--allowedCores",
+        dest="coreset",
+        default=None,
+        type=util.parse_int_list,
+        metavar="N,M-K",
+        help="Limit the set of cores used for runs",
+    )
+    parser.add_argument(
+        "--no-hyperthreading",
+        dest="use_hyperthreading",
+        action="store_false",
+        help="Disable assignment of more than one sibling virtual core to a run",
+    )
+    parser.add_argument(
+        "--version", action="version", version="%(prog)s " + __version__
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("--debug", action="store_true", help="show debug output")
+    verbosity.add_argument("--quiet", action="store_true", help="show only warnings")
+
+    container_args = parser.add_argument_group("optional arguments for run container")
+    container_on_args = container_args.add_mutually_exclusive_group()
+    container_on_args.add_argument(
+        "--container",
+        action="store_true",
+        dest="_ignored_container",
+        help="force isolation of run in container (default)",
+    )
+    container_on_args.add_argument(
+        "--no-container",
+        action="store_false",
+        dest="container",
+        help="disable use of containers for isolation of runs",
+    )
+    containerexecutor.add_basic_container_args(container_args)
+
+    options = parser.parse_args(argv[1:])
+    if options.num_of_threads < 1:
+        parser.error("Number of parallel runs needs to be positive.")
+    if options.debug:
+        util.setup_logging(level=logging.DEBUG)
+    elif options.quiet:
+        util.setup_logging(level=logging.WARNING)
+    else:
+        util.setup_logging(level=logging.INFO)
+
+    containerargs = {}
+    if options.container:
+        containerargs = containerexecutor.handle_basic_container_args(options, parser)
+    containerargs["use_namespaces"] = options.container
+
+    worker = _WorkerDaemon(
+        options.num_of_threads,
+        containerargs,
+        options.use_hyperthreading,
+        options.coreset,
+    )
+
+    def signal_stop(signum, frame):
+        logging.debug("Received signal %d, terminating.", signum)
+        worker.stop()
+
+    for signal_name in ["SIGINT", "SIGQUIT", "SIGTERM"]:
+        util.try_set_signal_handler(signal_name, signal_stop)
+
+    logging.info(
+        "This is benchexec-worker %s on %s with %d slots.",
+        __version__,
+        platform.node(),
+        options.num_of_threads,
+    )
+    worker.serve(options.coordinator)
+
+
+if __name__ == "__main__":
+    main()
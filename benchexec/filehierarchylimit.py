@@ -5,17 +5,37 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import errno
 import logging
 import os
+import stat
+import struct
 import threading
 import time
+import weakref
 
 from benchexec import container
+from benchexec import libc
 from benchexec import util
 
 _CHECK_INTERVAL_SECONDS = 60
+_INCREMENTAL_CHECK_INTERVAL_SECONDS = 1
 _DURATION_WARNING_THRESHOLD = 1
 
+_INOTIFY_EVENT = struct.Struct("iIII")  # struct inotify_event without name
+_INOTIFY_MAX_READS = 16
+_INOTIFY_MASK = (
+    libc.IN_CREATE
+    | libc.IN_DELETE
+    | libc.IN_MODIFY
+    | libc.IN_CLOSE_WRITE
+    | libc.IN_MOVED_FROM
+    | libc.IN_MOVED_TO
+    | libc.IN_ONLYDIR
+    | libc.IN_DONT_FOLLOW
+    | libc.IN_EXCL_UNLINK
+)
+
 
 class FileHierarchyLimitThread(threading.Thread):
     """
@@ -43,6 +63,27 @@ class FileHierarchyLimitThread(threading.Thread):
         self._callback = callbackFn
         self._finished = threading.Event()
 
+        try:
+            self._hierarchy = _InotifyFileHierarchy(path)
+        except OSError as e:
+            logging.debug(
+                "Cannot watch file hierarchy with inotify, "
+                "scanning it periodically instead: %s",
+                e,
+            )
+            self._hierarchy = None
+
+    @property
+    def check_interval(self):
+        """
+        The number of seconds until the next call to check(),
+        which increases if check() has to fall back to scanning the file hierarchy.
+        """
+        if self._hierarchy:
+            # checks are cheap
+            return _INCREMENTAL_CHECK_INTERVAL_SECONDS
+        return _CHECK_INTERVAL_SECONDS
+
     def _check_limit(self, files_count, files_size):
         if self._files_count_limit and files_count > self._files_count_limit:
             reason = "files-count"
@@ -63,46 +104,194 @@ class FileHierarchyLimitThread(threading.Thread):
 
     def run(self):
         while not self._finished.is_set():
-            self._finished.wait(_CHECK_INTERVAL_SECONDS)
-
-            files_count = 0
-            files_size = 0
-            start_time = time.monotonic()
-            for current_dir, _dirs, files in os.walk(self._path):
-                for file in files:
-                    abs_file = os.path.join(current_dir, file)
-                    file = "/" + os.path.relpath(file, self._path)
-                    # file has now the path as visible for tool
-                    if (
-                        not container.is_container_system_config_file(file)
-                        and os.path.isfile(abs_file)
-                        and not os.path.islink(abs_file)
-                    ):
-                        files_count += 1
-                        if self._files_size_limit:
-                            try:
-                                files_size += os.path.getsize(abs_file)
-                            except OSError:
-                                # possibly just deleted
-                                pass
-            if self._check_limit(files_count, files_size):
+            self._finished.wait(self.check_interval)
+            if self.check():
                 return
 
-            duration = time.monotonic() - start_time
+    def check(self):
+        """
+        Check the file hierarchy once and kill the process if a limit is exceeded.
+        @return None or the termination reason if the process was killed
+        """
+        if self._hierarchy:
+            try:
+                self._hierarchy.update()
+            except OSError as e:
+                # e.g., limit for number of inotify watches reached
+                logging.warning(
+                    "Cannot watch file hierarchy with inotify anymore, "
+                    "scanning it periodically instead: %s",
+                    e,
+                )
+                self._hierarchy.close()
+                self._hierarchy = None
+            else:
+                return self._check_limit(
+                    self._hierarchy.files_count, self._hierarchy.files_size
+                )
 
-            logging.debug(
-                "FileHierarchyLimitThread for process %d: "
-                "files count: %d, files size: %d, scan duration %fs",
-                self._pid_to_kill,
-                files_count,
-                files_size,
+        files_count = 0
+        files_size = 0
+        start_time = time.monotonic()
+        for current_dir, _dirs, files in os.walk(self._path):
+            for file in files:
+                file_size = _get_counted_file_size(
+                    self._path, os.path.join(current_dir, file)
+                )
+                if file_size is not None:
+                    files_count += 1
+                    files_size += file_size
+        reason = self._check_limit(files_count, files_size)
+        if reason:
+            return reason
+
+        duration = time.monotonic() - start_time
+
+        logging.debug(
+            "FileHierarchyLimitThread for process %d: "
+            "files count: %d, files size: %d, scan duration %fs",
+            self._pid_to_kill,
+            files_count,
+            files_size,
+            duration,
+        )
+        if duration > _DURATION_WARNING_THRESHOLD:
+            logging.warning(
+                "Scanning file hierarchy for enforcement of limits took %ds.",
                 duration,
             )
-            if duration > _DURATION_WARNING_THRESHOLD:
-                logging.warning(
-                    "Scanning file hierarchy for enforcement of limits took %ds.",
-                    duration,
-                )
+        return None
 
     def cancel(self):
         self._finished.set()
+
+
+def _get_counted_file_size(base_path, abs_file):
+    """
+    Return the size of a file that counts for the limits,
+    or None if the file does not count (or does not exist).
+    """
+    file = "/" + os.path.relpath(abs_file, base_path)
+    # file has now the path as visible for tool
+    if container.is_container_system_config_file(file):
+        return None
+    try:
+        file_stat = os.lstat(abs_file)
+    except OSError:
+        # possibly just deleted
+        return None
+    # only regular files, but not symlinks, count
+    return file_stat.st_size if stat.S_ISREG(file_stat.st_mode) else None
+
+
+class _InotifyFileHierarchy(object):
+    """
+    Keeps track of the files in a file hierarchy and their sizes using inotify,
+    such that the effort for updating the totals depends only on the number of
+    files that were changed, not on the number of all files.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._fd = libc.inotify_init1(libc.IN_NONBLOCK | libc.IN_CLOEXEC)
+        self._finalizer = weakref.finalize(self, os.close, self._fd)
+        self._watched_dirs = {}  # watch descriptor -> directory
+        self._file_sizes = {}  # path -> size of all files that count
+        self.files_size = 0
+        try:
+            self._add_directory(path)
+        except OSError:
+            self.close()
+            raise
+
+    @property
+    def files_count(self):
+        return len(self._file_sizes)
+
+    def close(self):
+        self._finalizer()
+
+    def update(self):
+        """Process all changes that happened since the last call."""
+        changed_files = set()
+        new_dirs = []
+        events_lost = False
+        # Events may arrive faster than we process them, so read at most as much as
+        # the kernel queues by default, to ensure that we return in time.
+        for _ in range(_INOTIFY_MAX_READS):
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & libc.IN_Q_OVERFLOW:
+                    events_lost = True
+                elif mask & libc.IN_IGNORED:
+                    self._watched_dirs.pop(wd, None)
+                elif wd in self._watched_dirs and name:
+                    abs_file = os.path.join(self._watched_dirs[wd], name)
+                    if not mask & libc.IN_ISDIR:
+                        changed_files.add(abs_file)
+                    elif mask & (libc.IN_DELETE | libc.IN_MOVED_FROM):
+                        self._remove_directory(abs_file)
+                    else:
+                        new_dirs.append(abs_file)
+
+        if events_lost:
+            logging.debug("Missed inotify events, scanning file hierarchy again.")
+            self._remove_directory(self._path)
+            self._add_directory(self._path)
+            return
+        for directory in new_dirs:
+            self._add_directory(directory)
+        for abs_file in changed_files:
+            self._update_file(abs_file)
+
+    def _update_file(self, abs_file):
+        self.files_size -= self._file_sizes.pop(abs_file, 0)
+        file_size = _get_counted_file_size(self._path, abs_file)
+        if file_size is not None:
+            self._file_sizes[abs_file] = file_size
+            self.files_size += file_size
+
+    def _add_directory(self, directory):
+        """Watch a directory recursively and add all files in it."""
+        pending_dirs = [directory]
+        while pending_dirs:
+            current_dir = pending_dirs.pop()
+            # The watch needs to exist before the directory is listed,
+            # otherwise we could miss files that are created in between.
+            try:
+                wd = libc.inotify_add_watch(
+                    self._fd, os.fsencode(current_dir), _INOTIFY_MASK
+                )
+                entries = list(os.scandir(current_dir))
+            except OSError as e:
+                if e.errno in [errno.ENOENT, errno.ENOTDIR]:
+                    continue  # already deleted again
+                raise
+            self._watched_dirs[wd] = current_dir
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending_dirs.append(entry.path)
+                else:
+                    self._update_file(entry.path)
+
+    def _remove_directory(self, directory):
+        """Stop watching a directory recursively and remove all files in it."""
+        prefix = os.path.join(directory, "")
+        for wd, watched_dir in list(self._watched_dirs.items()):
+            if watched_dir == directory or watched_dir.startswith(prefix):
+                del self._watched_dirs[wd]
+                try:
+                    libc.inotify_rm_watch(self._fd, wd)
+                except OSError:
+                    pass  # directory already deleted
+        for abs_file in [f for f in self._file_sizes if f.startswith(prefix)]:
+            self.files_size -= self._file_sizes.pop(abs_file)
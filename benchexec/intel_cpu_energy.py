@@ -6,11 +6,15 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import collections
+import glob
 import logging
 import os
 import subprocess
 import signal
 import re
+import struct
+import threading
+from benchexec import util
 from benchexec.util import find_executable2
 from decimal import Decimal
 
@@ -19,14 +23,41 @@ DOMAIN_CORE = "core"
 DOMAIN_UNCORE = "uncore"
 DOMAIN_DRAM = "dram"
 
+_POWERCAP_DIR = "/sys/class/powercap"
+_CPU_DIR = "/sys/devices/system/cpu"
+
+# Model-specific registers for RAPL, cf. Intel SDM Vol. 3B, Section 14.9
+_MSR_RAPL_POWER_UNIT = 0x606
+_MSR_DOMAINS = {
+    DOMAIN_PACKAGE: 0x611,  # MSR_PKG_ENERGY_STATUS
+    DOMAIN_CORE: 0x639,  # MSR_PP0_ENERGY_STATUS
+    DOMAIN_UNCORE: 0x641,  # MSR_PP1_ENERGY_STATUS
+    DOMAIN_DRAM: 0x619,  # MSR_DRAM_ENERGY_STATUS
+}
+
+_SAMPLE_INTERVAL_SECONDS = 10
+"""Counters are read at least this often, such that no wrap-around is missed
+(32-bit MSR counters wrap after about 60s at 1000W)."""
+
 
 class EnergyMeasurement(object):
+    """Measures energy with the external program cpu-energy-meter."""
+
     def __init__(self, executable):
         self._executable = executable
         self._measurement_process = None
 
     @classmethod
     def create_if_supported(cls):
+        """
+        Return an energy measurement that reads the RAPL counters directly
+        (via powercap or MSR) if possible, or one that uses cpu-energy-meter,
+        or None if energy cannot be measured. All of them have the same interface.
+        """
+        counters = _PowercapCounters.find() or _MsrCounters.find()
+        if counters:
+            return RaplEnergyMeasurement(counters)
+
         executable = find_executable2("cpu-energy-meter")
         if executable is None:  # not available on current system
             logging.debug(
@@ -87,6 +118,220 @@ class EnergyMeasurement(object):
         return self._measurement_process is not None
 
 
+class RaplEnergyMeasurement(object):
+    """
+    Measures energy by reading the RAPL energy counters of the CPU in-process.
+    The counters are sampled regularly in a background thread while the measurement
+    is running, such that wrap-arounds of the counters are handled correctly.
+    """
+
+    def __init__(self, counters, sample_interval=_SAMPLE_INTERVAL_SECONDS):
+        """
+        @param counters: a _PowercapCounters or _MsrCounters instance
+        """
+        self._counters = counters
+        self._sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._last_values = None
+        self._consumed = None
+        self._stop_sampling = None
+        self._sampling_thread = None
+
+    def start(self):
+        """Starts the measurement."""
+        assert (
+            not self.is_running()
+        ), "Attempted to start an energy measurement while one was already running."
+        with self._lock:
+            self._last_values = self._counters.read()
+            self._consumed = [0] * len(self._last_values)
+        self._stop_sampling = threading.Event()
+        self._sampling_thread = threading.Thread(
+            target=self._sample_regularly,
+            args=(self._stop_sampling,),
+            name="energy-sampling",
+            daemon=True,
+        )
+        self._sampling_thread.start()
+
+    def _sample_regularly(self, stop_sampling):
+        while not stop_sampling.wait(self._sample_interval):
+            self.sample()
+
+    def sample(self):
+        """Read the counters and add the energy consumed since the last read."""
+        with self._lock:
+            if self._last_values is None:
+                return
+            values = self._counters.read()
+            for i, (before, after) in enumerate(zip(self._last_values, values)):
+                if after < before:
+                    # counter has wrapped around
+                    after += self._counters.wrap_ranges[i]
+                self._consumed[i] += after - before
+            self._last_values = values
+
+    def stop(self):
+        """Stops the measurement and returns the measurement result,
+        if the measurement was running."""
+        if not self.is_running():
+            return None
+        self._stop_sampling.set()
+        self._sampling_thread.join()
+        self.sample()
+
+        consumed_energy = collections.defaultdict(dict)
+        with self._lock:
+            for (cpu, domain), unit, consumed in zip(
+                self._counters.domains, self._counters.units, self._consumed
+            ):
+                # Multiple dies of a package have separate counters.
+                energy = consumed_energy[cpu].get(domain, 0) + consumed * unit
+                consumed_energy[cpu][domain] = energy
+            self._last_values = None
+            self._consumed = None
+        for cpu, domains in consumed_energy.items():
+            for domain, energy in domains.items():
+                logging.debug("energy measurement: cpu%s_%s=%sJ", cpu, domain, energy)
+        return consumed_energy
+
+    def is_running(self):
+        """Returns True if the measurement is currently running, False otherwise."""
+        return self._last_values is not None
+
+
+class _PowercapCounters(object):
+    """
+    The RAPL energy counters as provided by the powercap framework of Linux
+    (/sys/class/powercap/intel-rapl:*), in micro joules.
+    """
+
+    def __init__(self, domains, files, wrap_ranges):
+        """
+        @param domains: a list of (package, domain) tuples
+        @param files: a list of the energy_uj files of the domains
+        @param wrap_ranges: a list of the values at which the counters wrap around
+        """
+        self.domains = domains
+        self.units = [Decimal(1) / 1_000_000] * len(domains)
+        self.wrap_ranges = wrap_ranges
+        self._files = files
+
+    @classmethod
+    def find(cls, base_dir=_POWERCAP_DIR):
+        """Return an instance for all readable RAPL zones or None."""
+        domains = []
+        files = []
+        wrap_ranges = []
+        for zone_dir in sorted(glob.glob(os.path.join(base_dir, "intel-rapl:*"))):
+            zone = os.path.basename(zone_dir).split(":")
+            package_zone_name = util.try_read_file(base_dir, ":".join(zone[:2]), "name")
+            package_match = re.match(r"package-(\d+)", package_zone_name or "")
+            if not package_match:
+                continue  # e.g., psys zone that does not belong to a package
+            domain = DOMAIN_PACKAGE
+            if len(zone) > 2:
+                domain = util.try_read_file(zone_dir, "name")
+                if domain not in [DOMAIN_CORE, DOMAIN_UNCORE, DOMAIN_DRAM]:
+                    continue
+
+            energy_file = os.path.join(zone_dir, "energy_uj")
+            wrap_range = util.try_read_file(zone_dir, "max_energy_range_uj")
+            if util.try_read_file(energy_file) is None or wrap_range is None:
+                # Reading is often restricted to root since CVE-2020-8694.
+                logging.debug("Cannot read RAPL counter %s.", energy_file)
+                return None
+            domains.append((int(package_match.group(1)), domain))
+            files.append(energy_file)
+            wrap_ranges.append(int(wrap_range))
+
+        if not domains:
+            return None
+        logging.debug("Measuring energy with RAPL counters from %s.", base_dir)
+        return cls(domains, files, wrap_ranges)
+
+    def read(self):
+        return [int(util.read_file(file)) for file in self._files]
+
+
+class _MsrCounters(object):
+    """
+    The RAPL energy counters as provided by the model-specific registers of the CPU
+    (/dev/cpu/*/msr), read on the first CPU core of each package.
+    """
+
+    def __init__(self, domains, registers, units):
+        """
+        @param domains: a list of (package, domain) tuples
+        @param registers: a list of (MSR file, MSR address) tuples for the domains
+        @param units: a list of the energy per counter increment in joules
+        """
+        self.domains = domains
+        self.units = units
+        self.wrap_ranges = [2**32] * len(domains)
+        self._registers = registers
+
+    @classmethod
+    def find(cls, cpu_dir=_CPU_DIR, msr_dir="/dev/cpu"):
+        """Return an instance for all readable RAPL domains or None."""
+        try:
+            if not util.check_msr()["read"]:
+                return None
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            logging.debug("Cannot check availability of MSR: %s", e)
+            return None
+
+        first_core_of_package = {}
+        for core_dir in glob.glob(os.path.join(cpu_dir, "cpu[0-9]*")):
+            package = util.try_read_file(core_dir, "topology", "physical_package_id")
+            if package is not None:
+                core = int(os.path.basename(core_dir)[3:])
+                package = int(package)
+                first_core_of_package[package] = min(
+                    core, first_core_of_package.get(package, core)
+                )
+
+        domains = []
+        registers = []
+        units = []
+        for package, core in sorted(first_core_of_package.items()):
+            msr_file = os.path.join(msr_dir, str(core), "msr")
+            try:
+                power_unit = _read_msr(msr_file, _MSR_RAPL_POWER_UNIT)
+            except OSError as e:
+                logging.debug("Cannot read RAPL unit from %s: %s", msr_file, e)
+                return None
+            # bits 12:8 contain the energy unit as 1/2^ESU joules
+            unit = Decimal(1) / (2 ** ((power_unit >> 8) & 0x1F))
+            for domain, address in _MSR_DOMAINS.items():
+                try:
+                    _read_msr(msr_file, address)
+                except OSError:
+                    continue  # domain not supported by this CPU
+                domains.append((package, domain))
+                registers.append((msr_file, address))
+                units.append(unit)
+
+        if not domains:
+            return None
+        logging.debug("Measuring energy with RAPL counters from MSR.")
+        return cls(domains, registers, units)
+
+    def read(self):
+        return [
+            _read_msr(msr_file, address) & 0xFFFFFFFF
+            for msr_file, address in self._registers
+        ]
+
+
+def _read_msr(msr_file, address):
+    fd = os.open(msr_file, os.O_RDONLY)
+    try:
+        return struct.unpack("<Q", os.pread(fd, 8, address))[0]
+    finally:
+        os.close(fd)
+
+
 def format_energy_results(energy):
     """Take the result of an energy measurement and return a flat dictionary that contains all values."""
     if not energy:
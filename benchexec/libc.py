@@ -10,7 +10,18 @@
 """
 
 import ctypes as _ctypes
-from ctypes import c_int, c_uint32, c_long, c_ulong, c_size_t, c_char_p, c_void_p
+from ctypes import (
+    c_int,
+    c_uint,
+    c_uint32,
+    c_uint64,
+    c_long,
+    c_ulong,
+    c_size_t,
+    c_char_p,
+    c_void_p,
+)
+import errno as _errno
 import os as _os
 
 _libc = _ctypes.CDLL("libc.so.6", use_errno=True)
@@ -152,6 +163,39 @@ umount2.errcheck = _check_errno
 # /usr/include/sys/mount.h
 MNT_DETACH = 2
 
+# The syscalls of the new mount API have the same number on all architectures
+# (cf. /usr/include/asm-generic/unistd.h) and older libc versions have no wrappers.
+_SYS_OPEN_TREE = 428
+_SYS_MOVE_MOUNT = 429
+
+_open_tree = _libc["syscall"]  # new function object, independent of other syscalls
+_open_tree.argtypes = [c_long, c_int, c_char_p, c_uint]
+_open_tree.errcheck = _check_errno
+
+
+def open_tree(dirfd, path, flags):
+    """Open a mount tree or create a detached copy of it (Linux 5.2 or newer)."""
+    return _open_tree(_SYS_OPEN_TREE, dirfd, path, flags)
+
+
+_move_mount = _libc["syscall"]
+_move_mount.argtypes = [c_long, c_int, c_char_p, c_int, c_char_p, c_uint]
+_move_mount.errcheck = _check_errno
+
+
+def move_mount(from_dirfd, from_path, to_dirfd, to_path, flags):
+    """Attach a mount tree, e.g., one created by open_tree() (Linux 5.2 or newer)."""
+    return _move_mount(_SYS_MOVE_MOUNT, from_dirfd, from_path, to_dirfd, to_path, flags)
+
+
+# /usr/include/linux/mount.h and /usr/include/linux/fcntl.h
+AT_FDCWD = -100
+AT_EMPTY_PATH = 0x1000
+AT_RECURSIVE = 0x8000
+OPEN_TREE_CLONE = 1
+OPEN_TREE_CLOEXEC = 0o2000000
+MOVE_MOUNT_F_EMPTY_PATH = 0x4
+
 
 pivot_root = _libc.pivot_root
 """Replace root file system with a different directory."""
@@ -197,3 +241,132 @@ PR_GET_SECCOMP = 21
 PR_SET_SECCOMP = 22
 SUID_DUMP_DISABLE = 0
 SUID_DUMP_USER = 1
+
+
+class TimeSpec(_ctypes.Structure):
+    """Structure for a point in time or a time interval (struct timespec)."""
+
+    _fields_ = ("tv_sec", c_long), ("tv_nsec", c_long)
+
+
+class ITimerSpec(_ctypes.Structure):
+    """Structure for the configuration of a timer (struct itimerspec)."""
+
+    _fields_ = ("it_interval", TimeSpec), ("it_value", TimeSpec)
+
+
+timerfd_create = _libc.timerfd_create
+"""Create a timer that notifies via a file descriptor."""
+timerfd_create.argtypes = [c_int, c_int]
+timerfd_create.errcheck = _check_errno
+
+timerfd_settime = _libc.timerfd_settime
+"""Arm or disarm a timer created by timerfd_create()."""
+timerfd_settime.argtypes = [
+    c_int,
+    c_int,
+    _ctypes.POINTER(ITimerSpec),
+    _ctypes.POINTER(ITimerSpec),
+]
+timerfd_settime.errcheck = _check_errno
+
+CLOCK_MONOTONIC = 1  # /usr/include/linux/time.h
+
+# /usr/include/sys/timerfd.h
+TFD_NONBLOCK = 0o4000
+TFD_CLOEXEC = 0o2000000
+
+inotify_init1 = _libc.inotify_init1
+"""Create an inotify instance for watching file-system events."""
+inotify_init1.argtypes = [c_int]
+inotify_init1.errcheck = _check_errno
+
+inotify_add_watch = _libc.inotify_add_watch
+"""Add or modify a watch for a path to an inotify instance."""
+inotify_add_watch.argtypes = [c_int, c_char_p, c_uint32]  # fd, pathname, mask
+inotify_add_watch.errcheck = _check_errno
+
+inotify_rm_watch = _libc.inotify_rm_watch
+"""Remove a watch from an inotify instance."""
+inotify_rm_watch.argtypes = [c_int, c_int]  # fd, wd
+inotify_rm_watch.errcheck = _check_errno
+
+# /usr/include/sys/inotify.h
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+
+class PerfEventAttr(_ctypes.Structure):
+    """Structure for first parameter of perf_event_open() (PERF_ATTR_SIZE_VER0)."""
+
+    _fields_ = (
+        ("type", c_uint32),
+        ("size", c_uint32),
+        ("config", c_uint64),
+        ("sample_period", c_uint64),
+        ("sample_type", c_uint64),
+        ("read_format", c_uint64),
+        ("flags", c_uint64),  # bit field with disabled, inherit, etc.
+        ("wakeup_events", c_uint32),
+        ("bp_type", c_uint32),
+        ("config1", c_uint64),
+    )
+
+
+# perf_event_open() has no wrapper in libc and its number differs between
+# architectures (cf. /usr/include/asm/unistd*.h).
+_SYS_PERF_EVENT_OPEN = {
+    "x86_64": 298,
+    "i386": 336,
+    "i686": 336,
+    "aarch64": 241,
+    "riscv64": 241,
+    "armv7l": 364,
+    "ppc64le": 319,
+    "s390x": 331,
+}.get(_os.uname().machine)
+
+_perf_event_open = _libc["syscall"]
+_perf_event_open.argtypes = [
+    c_long,
+    _ctypes.POINTER(PerfEventAttr),
+    c_int,  # pid
+    c_int,  # cpu
+    c_int,  # group_fd
+    c_ulong,  # flags
+]
+_perf_event_open.errcheck = _check_errno
+
+
+def perf_event_open(attr, pid, cpu, group_fd, flags):
+    """Open a file descriptor for a performance counter."""
+    if _SYS_PERF_EVENT_OPEN is None:
+        raise OSError(_errno.ENOSYS, "perf_event_open() not supported on this machine")
+    return _perf_event_open(_SYS_PERF_EVENT_OPEN, attr, pid, cpu, group_fd, flags)
+
+
+# /usr/include/linux/perf_event.h
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_MISSES = 3
+PERF_COUNT_SW_TASK_CLOCK = 1
+PERF_COUNT_SW_PAGE_FAULTS = 2
+PERF_COUNT_SW_CONTEXT_SWITCHES = 3
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1
+PERF_FORMAT_TOTAL_TIME_RUNNING = 2
+PERF_FLAG_PID_CGROUP = 1 << 2
+PERF_FLAG_FD_CLOEXEC = 1 << 3
@@ -5,10 +5,14 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import collections
 import logging
+import multiprocessing
 import os
 import queue
+import random
 import resource
+import signal
 import sys
 import threading
 import time
@@ -17,6 +21,8 @@ from benchexec import BenchExecException
 from benchexec import cgroups
 from benchexec import containerexecutor
 from benchexec import resources
+from benchexec import resultcache
+from benchexec import scheduling
 from benchexec.runexecutor import RunExecutor
 from benchexec.pqos import Pqos
 from benchexec import systeminfo
@@ -28,6 +34,9 @@ from benchexec.intel_cpu_energy import EnergyMeasurement
 WORKER_THREADS = []
 STOPPED_BY_INTERRUPT = False
 
+# Interval in seconds in which waiting runs check whether they may be started
+_ADMISSION_POLL_INTERVAL = 1
+
 
 def init(config, benchmark):
     config.containerargs = {}
@@ -43,6 +52,15 @@ def init(config, benchmark):
                 "(typically they are unnecessary if a tmpfs is used)."
             )
     config.containerargs["use_namespaces"] = config.container
+    config.containerargs["measure_overhead"] = config.measure_overhead
+    config.containerargs["measure_perf_events"] = config.measure_perf_events
+    config.containerargs["stream_output"] = config.stream_output
+    config.containerargs["health_sample_interval"] = config.health_sample_interval
+
+    if not 0 <= config.result_cache_verify <= 1:
+        sys.exit("Fraction of cached runs to verify needs to be between 0 and 1.")
+    if config.health_sample_interval is not None and config.health_sample_interval <= 0:
+        sys.exit("Interval for checking the system health needs to be positive.")
 
     tool_locator = tooladapter.create_tool_locator(config)
     benchmark.executable = benchmark.tool.executable(tool_locator)
@@ -117,6 +135,7 @@ def execute_benchmark(benchmark, output_handler):
                 benchmark.num_of_threads,
                 memoryAssignment,
                 my_cgroups,
+                admission_control=bool(benchmark.config.memory_admission_margin),
             )
 
     if benchmark.rlimits.cputime:
@@ -133,39 +152,100 @@ def execute_benchmark(benchmark, output_handler):
             "and thus makes the performance unreliable."
         )
 
-    throttle_check = systeminfo.CPUThrottleCheck()
-    swap_check = systeminfo.SwapCheck()
+    runtime_predictor = None
+    if benchmark.config.schedule_by_results:
+        runtime_predictor = scheduling.RuntimePredictor(
+            benchmark.config.schedule_by_results
+        )
 
-    # iterate over run sets
-    for runSet in benchmark.run_sets:
-        if STOPPED_BY_INTERRUPT:
-            break
+    system_health_monitor = systeminfo.get_system_health_monitor(
+        benchmark.config.health_sample_interval
+    )
+    benchmark_start = time.monotonic()
 
-        if not runSet.should_be_executed():
-            output_handler.output_for_skipping_run_set(runSet)
+    # If runs are executed by worker processes, this process does not clone.
+    use_switch_interval_workaround = (
+        not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED
+        and not benchmark.config.worker_processes
+    )
+    if use_switch_interval_workaround:
+        logging.debug(
+            "Using sys.setswitchinterval() workaround for #435 in container "
+            "mode because native callback is not available."
+        )
+        py_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1000)
 
-        elif not runSet.runs:
-            output_handler.output_for_skipping_run_set(
-                runSet, "because it has no files"
+    admission_control = None
+    if benchmark.config.memory_admission_margin:
+        try:
+            admission_control = resources.MemoryAdmissionControl(
+                benchmark.config.memory_admission_margin, my_cgroups, memoryAssignment
             )
+        except (OSError, ValueError) as e:
+            sys.exit(f"Could not read memory information from kernel: {e}")
+
+    result_cache = None
+    if benchmark.config.result_cache:
+        max_age = benchmark.config.result_cache_max_age
+        result_cache = resultcache.ResultCache(
+            benchmark.config.result_cache,
+            max_age=max_age * 24 * 60 * 60 if max_age is not None else None,
+            max_size=benchmark.config.result_cache_max_size,
+        )
 
-        else:
-            run_sets_executed += 1
-            _execute_run_set(
-                runSet,
-                benchmark,
-                output_handler,
-                coreAssignment,
-                memoryAssignment,
-                cpu_packages,
-            )
+    worker_pool = _WorkerPool(
+        benchmark,
+        coreAssignment,
+        memoryAssignment,
+        output_handler,
+        admission_control,
+        result_cache,
+    )
+    if benchmark.config.pipeline_run_sets:
+        _execute_run_sets_pipelined(
+            benchmark, output_handler, worker_pool, runtime_predictor
+        )
+    else:
+        # iterate over run sets
+        for runSet in benchmark.run_sets:
+            if STOPPED_BY_INTERRUPT:
+                break
+
+            if not runSet.should_be_executed():
+                output_handler.output_for_skipping_run_set(runSet)
+
+            elif not runSet.runs:
+                output_handler.output_for_skipping_run_set(
+                    runSet, "because it has no files"
+                )
+
+            else:
+                run_sets_executed += 1
+                _execute_run_set(
+                    runSet,
+                    benchmark,
+                    output_handler,
+                    worker_pool,
+                    cpu_packages,
+                    runtime_predictor,
+                )
+    worker_pool.shutdown()
+    if result_cache:
+        result_cache.evict()
+
+    if use_switch_interval_workaround:
+        sys.setswitchinterval(py_switch_interval)
 
-    if throttle_check.has_throttled():
+    system_health = system_health_monitor.get_statistics(
+        benchmark_start, time.monotonic()
+    )
+    if system_health.get("cpu-throttled"):
         logging.warning(
             "CPU throttled itself during benchmarking due to overheating. "
             "Benchmark results are unreliable!"
         )
-    if swap_check.has_swapped():
+    if system_health.get("swapped"):
         logging.warning(
             "System has swapped during benchmarking. "
             "Benchmark results are unreliable!"
@@ -177,7 +257,12 @@ def execute_benchmark(benchmark, output_handler):
 
 
 def _execute_run_set(
-    runSet, benchmark, output_handler, coreAssignment, memoryAssignment, cpu_packages
+    runSet,
+    benchmark,
+    output_handler,
+    worker_pool,
+    cpu_packages,
+    runtime_predictor,
 ):
     # get times before runSet
     energy_measurement = EnergyMeasurement.create_if_supported()
@@ -188,55 +273,33 @@ def _execute_run_set(
 
     output_handler.output_before_run_set(runSet)
 
-    # put all runs into a queue
-    for run in runSet.runs:
-        _Worker.working_queue.put(run)
-
-    # keep a counter of unfinished runs for the below assertion
-    unfinished_runs = len(runSet.runs)
-    unfinished_runs_lock = threading.Lock()
-
-    def run_finished():
-        nonlocal unfinished_runs
-        with unfinished_runs_lock:
-            unfinished_runs -= 1
-
-    if not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED:
-        logging.debug(
-            "Using sys.setswitchinterval() workaround for #435 in container "
-            "mode because native callback is not available."
-        )
-        py_switch_interval = sys.getswitchinterval()
-        sys.setswitchinterval(1000)
-
-    # create some workers
-    for i in range(min(benchmark.num_of_threads, unfinished_runs)):
-        if STOPPED_BY_INTERRUPT:
-            break
-        cores = coreAssignment[i] if coreAssignment else None
-        memBanks = memoryAssignment[i] if memoryAssignment else None
-        WORKER_THREADS.append(
-            _Worker(benchmark, cores, memBanks, output_handler, run_finished)
-        )
+    # put all runs into a queue, except those with a result from a resumed execution
+    runs = [run for run in runSet.runs if not run.result_restored]
+    if runtime_predictor:
+        runs, predicted_walltimes = _order_runs(runs, benchmark, runtime_predictor)
+    worker_pool.submit(runSet, runs)
 
-    # wait until workers are finished (all tasks done or STOPPED_BY_INTERRUPT)
-    for worker in WORKER_THREADS:
-        worker.join()
-    assert unfinished_runs == 0 or STOPPED_BY_INTERRUPT
+    # wait until all runs are finished (or STOPPED_BY_INTERRUPT)
+    worker_pool.wait_until(lambda: worker_pool.is_finished(runSet))
+    assert worker_pool.is_finished(runSet) or STOPPED_BY_INTERRUPT
 
     # get times after runSet
     walltime_after = time.monotonic()
     energy = energy_measurement.stop() if energy_measurement else None
     usedWallTime = walltime_after - walltime_before
-    ruAfter = resource.getrusage(resource.RUSAGE_CHILDREN)
-    usedCpuTime = (ruAfter.ru_utime + ruAfter.ru_stime) - (
-        ruBefore.ru_utime + ruBefore.ru_stime
-    )
+    if benchmark.config.worker_processes:
+        # tools are children of the worker processes, which are reaped only
+        # at the end of the benchmark and thus missing from our RUSAGE_CHILDREN
+        usedCpuTime = worker_pool.cputime[runSet]
+    else:
+        ruAfter = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usedCpuTime = (ruAfter.ru_utime + ruAfter.ru_stime) - (
+            ruBefore.ru_utime + ruBefore.ru_stime
+        )
     if energy and cpu_packages:
         energy = {pkg: energy[pkg] for pkg in energy if pkg in cpu_packages}
-
-    if not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED:
-        sys.setswitchinterval(py_switch_interval)
+    if runtime_predictor and not STOPPED_BY_INTERRUPT:
+        _log_makespan(runSet, benchmark, predicted_walltimes, usedWallTime)
 
     if STOPPED_BY_INTERRUPT:
         output_handler.set_error("interrupted", runSet)
@@ -245,6 +308,130 @@ def _execute_run_set(
     )
 
 
+def _execute_run_sets_pipelined(
+    benchmark, output_handler, worker_pool, runtime_predictor
+):
+    """
+    Execute all run sets such that the runs of the next run set are started
+    as soon as a worker becomes idle, instead of waiting until the last runs of
+    the current run set are finished. The output of each run set is still
+    produced in the order of the run sets, and its cputime and walltime
+    are measured only for its own runs.
+    Energy is not measured because it cannot be attributed to a single run set.
+    """
+    walltime_before = {}
+    predicted_walltimes = {}
+    # run sets for which no output was produced yet, together with a flag
+    # whether they are skipped and the reason for skipping
+    pending_run_sets = collections.deque()
+
+    def next_output_possible():
+        if not pending_run_sets:
+            return False
+        runSet, skipped, _ = pending_run_sets[0]
+        return skipped or worker_pool.is_finished(runSet)
+
+    def output_run_set(runSet, skipped, reason):
+        if skipped:
+            output_handler.output_for_skipping_run_set(runSet, reason)
+            return
+        end_time = None
+        if worker_pool.is_finished(runSet):
+            walltime_after, end_time = worker_pool.finish_times[runSet]
+            usedWallTime = walltime_after - walltime_before[runSet]
+            if runtime_predictor:
+                _log_makespan(
+                    runSet, benchmark, predicted_walltimes[runSet], usedWallTime
+                )
+        else:  # interrupted
+            usedWallTime = time.monotonic() - walltime_before[runSet]
+            output_handler.set_error("interrupted", runSet)
+        output_handler.output_after_run_set(
+            runSet,
+            cputime=worker_pool.cputime[runSet],
+            walltime=usedWallTime,
+            end_time=None if benchmark.config.start_time else end_time,
+        )
+
+    def wait_until(condition):
+        """Wait until the condition holds, and produce the output of all run sets
+        that are finished meanwhile."""
+        while True:
+            with worker_pool.state_changed:
+                if not worker_pool.wait_until(
+                    lambda: condition() or next_output_possible()
+                ):
+                    return
+                if next_output_possible():
+                    next_output = pending_run_sets.popleft()
+                else:
+                    return
+            output_run_set(*next_output)
+
+    for runSet in benchmark.run_sets:
+        if STOPPED_BY_INTERRUPT:
+            break
+
+        if not runSet.should_be_executed():
+            pending_run_sets.append((runSet, True, None))
+            continue
+        elif not runSet.runs:
+            pending_run_sets.append((runSet, True, "because it has no files"))
+            continue
+
+        # start the run set only if all runs of the previous ones have been started
+        wait_until(worker_pool.all_runs_started)
+        if STOPPED_BY_INTERRUPT:
+            break
+
+        walltime_before[runSet] = time.monotonic()
+        output_handler.output_before_run_set(runSet)
+        runs = [run for run in runSet.runs if not run.result_restored]
+        if runtime_predictor:
+            runs, predicted_walltimes[runSet] = _order_runs(
+                runs, benchmark, runtime_predictor
+            )
+        pending_run_sets.append((runSet, False, None))
+        worker_pool.submit(runSet, runs)
+
+    # wait until all run sets are finished (or STOPPED_BY_INTERRUPT)
+    wait_until(lambda: not pending_run_sets)
+
+    while pending_run_sets:
+        output_run_set(*pending_run_sets.popleft())
+
+
+def _order_runs(runs, benchmark, runtime_predictor):
+    """
+    Order the runs such that those with the longest predicted wall time come first.
+    @return: a tuple of the sorted list of runs and the list of their predicted
+        wall times
+    """
+    predicted_walltimes = runtime_predictor.predict_walltimes(runs)
+    sorted_runs, sorted_walltimes = scheduling.order_longest_first(
+        runs, predicted_walltimes
+    )
+    logging.debug(
+        "Wall time is known for %d of %d runs, predicted makespan is %.1fs "
+        "in original order and %.1fs with longest runs first.",
+        sum(runtime_predictor.predict(run) is not None for run in runs),
+        len(runs),
+        scheduling.predict_makespan(predicted_walltimes, benchmark.num_of_threads),
+        scheduling.predict_makespan(sorted_walltimes, benchmark.num_of_threads),
+    )
+    return sorted_runs, sorted_walltimes
+
+
+def _log_makespan(runSet, benchmark, predicted_walltimes, walltime):
+    """Report the predicted and the actual makespan of a run set."""
+    logging.info(
+        "Predicted makespan of run set %s was %.1fs, actual makespan was %.1fs.",
+        runSet.full_name,
+        scheduling.predict_makespan(predicted_walltimes, benchmark.num_of_threads),
+        walltime,
+    )
+
+
 def stop():
     global STOPPED_BY_INTERRUPT
     STOPPED_BY_INTERRUPT = True
@@ -255,6 +442,136 @@ def stop():
         worker.stop()
 
 
+class _WorkerPool(object):
+    """
+    A pool of workers that is created once per benchmark and reused for all run sets,
+    such that the setup of the workers and their RunExecutor instances
+    is done only once. There is one worker for each core assignment.
+    The pool keeps track of the unfinished runs and the consumed CPU time per run set.
+    If an admission control is given, workers wait before starting a run
+    until the admission control allows it.
+    If a result cache is given, workers reuse cached results instead of executing runs.
+    """
+
+    def __init__(
+        self,
+        benchmark,
+        coreAssignment,
+        memoryAssignment,
+        output_handler,
+        admission_control=None,
+        result_cache=None,
+    ):
+        self.benchmark = benchmark
+        self.coreAssignment = coreAssignment
+        self.memoryAssignment = memoryAssignment
+        self.output_handler = output_handler
+        self.admission_control = admission_control
+        self.result_cache = result_cache
+        self.workers = []
+        self.setup_time = 0
+        self.used_for_run_sets = 0
+
+        # notified whenever a run is started or finished
+        self.state_changed = threading.Condition()
+        self.running_runs = 0
+        self.unfinished_runs = {}  # number of unfinished runs per run set
+        self.cputime = {}  # sum of CPU time of the finished runs per run set
+        # monotonic time and local time when the last run of a run set finished
+        self.finish_times = {}
+
+    def submit(self, runSet, runs):
+        """Queue the given runs of the given run set for execution."""
+        with self.state_changed:
+            self.unfinished_runs[runSet] = len(runs)
+            self.cputime[runSet] = 0
+            if not runs:
+                self.finish_times[runSet] = (time.monotonic(), util.read_local_time())
+            for run in runs:
+                _Worker.working_queue.put(run)
+        if runs:
+            self.used_for_run_sets += 1
+            if not self.workers:
+                self._create_workers()
+
+    def _create_workers(self):
+        setup_start = time.monotonic()
+        for i in range(self.benchmark.num_of_threads):
+            cores = self.coreAssignment[i] if self.coreAssignment else None
+            memBanks = self.memoryAssignment[i] if self.memoryAssignment else None
+            self.workers.append(
+                _Worker(
+                    self.benchmark,
+                    cores,
+                    memBanks,
+                    self.output_handler,
+                    self._run_finished,
+                    self._run_started,
+                    self.result_cache,
+                )
+            )
+        WORKER_THREADS.extend(self.workers)
+        self.setup_time = time.monotonic() - setup_start
+
+    def _run_started(self, run):
+        with self.state_changed:
+            while self.admission_control and not STOPPED_BY_INTERRUPT:
+                if self.admission_control.may_admit(self.running_runs):
+                    break
+                # memory usage changes without notification, so poll regularly
+                self.state_changed.wait(_ADMISSION_POLL_INTERVAL)
+            self.running_runs += 1
+            self.state_changed.notify_all()
+
+    def _run_finished(self, run):
+        runSet = run.runSet
+        with self.state_changed:
+            self.running_runs -= 1
+            self.unfinished_runs[runSet] -= 1
+            self.cputime[runSet] += run.values.get("cputime") or 0
+            if self.unfinished_runs[runSet] == 0:
+                self.finish_times[runSet] = (time.monotonic(), util.read_local_time())
+            self.state_changed.notify_all()
+
+    def is_finished(self, runSet):
+        """Check whether all runs of the given (submitted) run set are finished."""
+        return self.unfinished_runs[runSet] == 0
+
+    def all_runs_started(self):
+        """Check whether all submitted runs were taken by a worker."""
+        return _Worker.working_queue.empty()
+
+    def wait_until(self, condition):
+        """
+        Wait until the given condition holds, or until the execution was stopped
+        and no runs are running anymore.
+        @return: whether the condition holds
+        """
+        with self.state_changed:
+            self.state_changed.wait_for(
+                lambda: condition() or (STOPPED_BY_INTERRUPT and self.running_runs == 0)
+            )
+            return condition()
+
+    def shutdown(self):
+        """Let all workers terminate after their current run and wait for them."""
+        for _worker in self.workers:
+            _Worker.working_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+            if self.benchmark.config.worker_processes:
+                worker.run_executor.close()
+        if self.workers:
+            logging.debug(
+                "Setting up %d workers took %.3fs, they were reused for %d run sets "
+                "instead of being created for each run set (saving about %.3fs).",
+                len(self.workers),
+                self.setup_time,
+                self.used_for_run_sets,
+                self.setup_time * (self.used_for_run_sets - 1),
+            )
+
+
 class _Worker(threading.Thread):
     """
     A Worker is a deamonic thread, that takes jobs from the working_queue and runs them.
@@ -263,24 +580,47 @@ class _Worker(threading.Thread):
     working_queue = queue.Queue()
 
     def __init__(
-        self, benchmark, my_cpus, my_memory_nodes, output_handler, run_finished_callback
+        self,
+        benchmark,
+        my_cpus,
+        my_memory_nodes,
+        output_handler,
+        run_finished_callback,
+        run_started_callback,
+        result_cache=None,
     ):
+        """
+        @param run_finished_callback: called with each run after it was executed
+        @param run_started_callback: called with each run before it is executed,
+            may block until the run is allowed to start
+        @param result_cache: a ResultCache for reusing results of identical runs
+        """
         threading.Thread.__init__(self)  # constuctor of superclass
         self.run_finished_callback = run_finished_callback
+        self.run_started_callback = run_started_callback
         self.benchmark = benchmark
         self.my_cpus = my_cpus
         self.my_memory_nodes = my_memory_nodes
         self.output_handler = output_handler
-        self.run_executor = RunExecutor(**benchmark.config.containerargs)
+        self.result_cache = result_cache
+        if benchmark.config.worker_processes:
+            self.run_executor = _RunExecutorProcess(benchmark.config.containerargs)
+        else:
+            self.run_executor = RunExecutor(**benchmark.config.containerargs)
         self.setDaemon(True)
 
         self.start()
 
     def run(self):
         while not STOPPED_BY_INTERRUPT:
-            try:
-                currentRun = _Worker.working_queue.get_nowait()
-            except queue.Empty:
+            currentRun = _Worker.working_queue.get()
+            if currentRun is None:  # sent by _WorkerPool.shutdown()
+                _Worker.working_queue.task_done()
+                return
+            self.run_started_callback(currentRun)
+            if STOPPED_BY_INTERRUPT:  # while waiting for being started
+                self.run_finished_callback(currentRun)
+                _Worker.working_queue.task_done()
                 return
 
             try:
@@ -293,7 +633,7 @@ class _Worker(threading.Thread):
                 logging.critical(e)
             except BaseException:
                 logging.exception("Exception during run execution")
-            self.run_finished_callback()
+            self.run_finished_callback(currentRun)
             _Worker.working_queue.task_done()
 
     def execute(self, run):
@@ -304,6 +644,21 @@ class _Worker(threading.Thread):
         self.output_handler.output_before_run(run)
         benchmark = self.benchmark
 
+        cache_key = None
+        cached_result = None
+        if self.result_cache:
+            cache_key = self.result_cache.get_key(run)
+            cached_result = self.result_cache.lookup(cache_key, run.log_file)
+            if (
+                cached_result
+                and random.random() >= benchmark.config.result_cache_verify
+            ):
+                logging.debug("Reusing cached result %s for run.", cache_key)
+                run.set_result(cached_result[0])
+                run.values["@resultcache"] = "reused"
+                self.output_handler.output_after_run(run)
+                return None
+
         args = run.cmdline()
         logging.debug("Command line of run is %s", args)
         pqos = Pqos()
@@ -350,7 +705,22 @@ class _Worker(threading.Thread):
         if self.my_memory_nodes:
             run_result["memoryNodes"] = self.my_memory_nodes
 
+        cache_values = dict(run_result)  # set_result() modifies its argument
         run.set_result(run_result)
+        if cache_key:
+            if cached_result:
+                cached_status = cached_result[1]
+                if run.status == cached_status:
+                    run.values["@resultcache"] = "verified"
+                else:
+                    run.values["@resultcache"] = "differs"
+                    logging.warning(
+                        "Run %s produced status %s, but the cached status is %s.",
+                        run.identifier,
+                        run.status,
+                        cached_status,
+                    )
+            self.result_cache.store(cache_key, cache_values, run.status, run.log_file)
         self.output_handler.output_after_run(run)
         return None
 
@@ -358,3 +728,85 @@ class _Worker(threading.Thread):
         # asynchronous call to runexecutor,
         # the worker will stop asap, but not within this method.
         self.run_executor.stop()
+
+
+class _RunExecutorProcess(object):
+    """
+    Proxy for a RunExecutor that lives in a separate worker process,
+    which also runs all the helper threads of the RunExecutor.
+    The runs are passed to the worker process and the results back via a pipe.
+    """
+
+    def __init__(self, containerargs):
+        self.PROCESS_KILLED = False
+        context = multiprocessing.get_context("spawn")
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+            target=_run_executor_process_main,
+            args=(
+                child_connection,
+                containerargs,
+                logging.getLogger().getEffectiveLevel(),
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+
+    def execute_run(self, args, **kwargs):
+        """Execute a run in the worker process, like RunExecutor.execute_run()."""
+        try:
+            self._connection.send((args, kwargs))
+            run_result, self.PROCESS_KILLED, error = self._connection.recv()
+        except (EOFError, OSError) as e:
+            raise BenchExecException(f"Worker process terminated unexpectedly: {e}")
+        if error:
+            raise BenchExecException(error)
+        return run_result
+
+    def stop(self):
+        # The worker process calls stop() on its RunExecutor.
+        if self._process.is_alive():
+            os.kill(self._process.pid, signal.SIGTERM)
+
+    def close(self):
+        """Let the worker process terminate and wait for it."""
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join()
+        self._connection.close()
+
+
+def _run_executor_process_main(connection, containerargs, log_level):
+    """
+    Main function of a worker process started by _RunExecutorProcess:
+    receive runs from the connection, execute them, and send back the results.
+    """
+    util.setup_logging(level=log_level)
+    run_executor = RunExecutor(**containerargs)
+
+    # SIGINT is also received by the main process, which then sends SIGTERM to us.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: run_executor.stop())
+
+    while True:
+        try:
+            run = connection.recv()
+        except EOFError:
+            return
+        if run is None:
+            return
+        args, kwargs = run
+
+        error = None
+        run_result = None
+        try:
+            run_result = run_executor.execute_run(args, **kwargs)
+        except (BenchExecException, SystemExit) as e:
+            error = str(e)
+        except BaseException as e:
+            logging.exception("Exception during run execution")
+            error = f"Exception during run execution: {e}"
+        connection.send((run_result, run_executor.PROCESS_KILLED, error))
@@ -10,12 +10,13 @@ import logging
 import os
 import re
 import sys
-import yaml
 from xml.etree import ElementTree
 
 from benchexec import BenchExecException
 from benchexec import intel_cpu_energy
 from benchexec import result
+from benchexec import scheduling
+from benchexec import sharding
 from benchexec import tooladapter
 from benchexec import util
 
@@ -89,6 +90,8 @@ def substitute_vars(oldList, runSet=None, task_file=None):
 
 def load_task_definition_file(task_def_file):
     """Open and parse a task-definition file in YAML format."""
+    import yaml
+
     try:
         with open(task_def_file) as f:
             task_def = yaml.safe_load(f)
@@ -553,6 +556,10 @@ class RunSet(object):
         self.name = ".".join(filter(None, names))
         self.full_name = self.benchmark.name + (f".{self.name}" if self.name else "")
 
+        # times spent for runs of this run set by a previous (interrupted) execution
+        self.previous_cputime = 0
+        self.previous_walltime = 0
+
         # Currently we store logfiles as "basename.log",
         # so we cannot distinguish sourcefiles in different folder with same basename.
         # For a 'local benchmark' this causes overriding of logfiles after reading them,
@@ -667,8 +674,39 @@ class RunSet(object):
                         rundef_name,
                         selected,
                     )
+
+        if self.benchmark.config.shard:
+            self.select_runs_of_shard(blocks, *self.benchmark.config.shard)
         return blocks
 
+    def select_runs_of_shard(self, blocks, shard, num_shards):
+        """
+        Remove all runs from the given blocks that do not belong to the given shard.
+        If results of earlier executions are given for scheduling,
+        the runs are assigned to shards such that the shards have similar wall times.
+        """
+        runs = [run for block in blocks for run in block.runs]
+        walltimes = None
+        if self.benchmark.config.schedule_by_results:
+            predictor = scheduling.RuntimePredictor(
+                self.benchmark.config.schedule_by_results
+            )
+            walltimes = predictor.predict_walltimes(runs)
+        shards = sharding.assign_shards(
+            [sharding.get_run_id(run) for run in runs], num_shards, walltimes
+        )
+        selected_runs = {id(run) for run, s in zip(runs, shards) if s == shard}
+        for block in blocks:
+            block.runs = [run for run in block.runs if id(run) in selected_runs]
+        logging.info(
+            "Shard %s/%s contains %s of %s runs of run definition %s.",
+            shard,
+            num_shards,
+            len(selected_runs),
+            len(runs),
+            self.real_name,
+        )
+
     def get_task_def_files_from_xml(self, sourcefilesTag, base_dir):
         """Get the task-definition files from the XML definition. Task-definition files are files
         for which we create a run (typically an input file or a YAML task definition).
@@ -1041,6 +1079,9 @@ class Run(object):
         self.status = ""
         self.category = result.CATEGORY_UNKNOWN
 
+        # whether the result was taken from a previous (interrupted) execution
+        self.result_restored = False
+
     def cmdline(self):
         assert (
             self.runSet.benchmark.executable is not None
@@ -1111,6 +1152,32 @@ class Run(object):
                 output, substitutedColumnText
             )
 
+    def restore_result(self, run_xml):
+        """Set the result of this run from the XML element of the same run
+        in a result file of a previous execution of the benchmark.
+        @param run_xml: a <run> element with <column> children
+        """
+        columns = {column.title: column for column in self.columns}
+        for column_xml in run_xml.findall("column"):
+            title = column_xml.get("title")
+            value = column_xml.get("value")
+            if title == "status":
+                self.status = value
+            elif title == "category" and column_xml.get("hidden") == "true":
+                self.category = value
+            elif title in columns:
+                columns[title].value = value
+            elif title in ["cputime", "walltime"]:
+                try:
+                    self.values[title] = float(value.rstrip("s"))
+                except ValueError:
+                    self.values[title] = value
+            elif column_xml.get("hidden") == "true":
+                self.values["@" + title] = value
+            else:
+                self.values[title] = value
+        self.result_restored = True
+
     def _analyze_result(self, exitcode, output, termination_reason):
         """Return status according to result and output of tool."""
 
@@ -93,28 +93,43 @@ class KillProcessOnOomThread(threading.Thread):
             # In an eventfd, there are always 8 bytes for the event number.
             # We just do a blocking read to wait for the event.
             _ = os.read(self._efd, 8)
-            # If read returned, this means the kernel sent us an event.
-            # It does so either on OOM or if the cgroup is removed.
-            if not self._finished.is_set():
-                self._callback("memory")
-                logging.debug(
-                    "Killing process %s due to out-of-memory event from kernel.",
-                    self._pid_to_kill,
-                )
-                util.kill_process(self._pid_to_kill)
-                # Also kill all children of subprocesses directly.
-                with open(os.path.join(self._cgroups[MEMORY], "tasks"), "rt") as tasks:
-                    for task in tasks:
-                        util.kill_process(int(task))
-
-                # We now need to increase the memory limit of this cgroup
-                # to give the process a chance to terminate
-                self._reset_memory_limit("memory.memsw.limit_in_bytes")
-                self._reset_memory_limit("memory.limit_in_bytes")
-
+            self.handle_event()
         finally:
             close(self._efd)
 
+    def fileno(self):
+        """Return the event file descriptor that becomes readable on OOM."""
+        return self._efd
+
+    def handle_event(self):
+        """
+        Handle an event from the kernel after it was read from the event file
+        descriptor. This is also used by the RunSupervisor instead of running
+        this thread.
+        """
+        # If read returned, this means the kernel sent us an event.
+        # It does so either on OOM or if the cgroup is removed.
+        if not self._finished.is_set():
+            self._callback("memory")
+            logging.debug(
+                "Killing process %s due to out-of-memory event from kernel.",
+                self._pid_to_kill,
+            )
+            util.kill_process(self._pid_to_kill)
+            # Also kill all children of subprocesses directly.
+            with open(os.path.join(self._cgroups[MEMORY], "tasks"), "rt") as tasks:
+                for task in tasks:
+                    util.kill_process(int(task))
+
+            # We now need to increase the memory limit of this cgroup
+            # to give the process a chance to terminate
+            self._reset_memory_limit("memory.memsw.limit_in_bytes")
+            self._reset_memory_limit("memory.limit_in_bytes")
+
+    def close(self):
+        """Close the event file descriptor if this thread was not started."""
+        os.close(self._efd)
+
     def _reset_memory_limit(self, limitFile):
         if self._cgroups.has_value(MEMORY, limitFile):
             try:
@@ -10,13 +10,12 @@ import bz2
 import collections
 import datetime
 import io
+import logging
 import os
 import threading
 import time
 import sys
 
-# Need to disable pytype for minidom due to https://github.com/google/pytype/issues/1130
-from xml.dom import minidom  # pytype: disable=pyi-error
 from xml.etree import ElementTree
 import zipfile
 
@@ -81,6 +80,9 @@ class OutputHandler(object):
         self.all_created_files = set()
         self.benchmark = benchmark
         self.statistics = Statistics()
+        # run sets for which output_before_run_set was called, but not yet
+        # output_after_run_set (more than one if run sets are pipelined)
+        self.run_sets_in_progress = []
 
         version = self.benchmark.tool_version
 
@@ -115,8 +117,13 @@ class OutputHandler(object):
         self.xml_file_names = []
 
         if compress_results:
+            # When resuming, we append to the existing archive. If the previous
+            # execution crashed, the archive may lack its central directory, then
+            # zipfile appends a new archive and the old entries become unreachable.
             self.log_zip = zipfile.ZipFile(
-                benchmark.log_zip, mode="w", compression=zipfile.ZIP_DEFLATED
+                benchmark.log_zip,
+                mode="a" if benchmark.config.resume else "w",
+                compression=zipfile.ZIP_DEFLATED,
             )
             self.log_zip_lock = threading.Lock()
             self.all_created_files.add(benchmark.log_zip)
@@ -385,6 +392,9 @@ class OutputHandler(object):
                 if expected_result:
                     run.xml.set("expectedVerdict", expected_result)
 
+        if self.benchmark.config.resume:
+            self._restore_results_of_previous_execution(runSet, xml_file_name)
+
         block_name = runSet.blocks[0].name if len(runSet.blocks) == 1 else None
         runSet.xml = self.runs_to_xml(runSet, runSet.runs, block_name)
         if start_time:
@@ -399,6 +409,88 @@ class OutputHandler(object):
         self.all_created_files.add(runSet.xml_file_name)
         self.xml_file_names.append(runSet.xml_file_name)
 
+    def _restore_results_of_previous_execution(self, runSet, xml_file_name):
+        """
+        Read the results of an interrupted previous execution of the given run set
+        from its result file and mark all runs that are already finished
+        such that they are not executed again.
+        """
+        previous_xml = None
+        for filename in [xml_file_name + ".bz2", xml_file_name]:
+            if os.path.exists(filename):
+                try:
+                    previous_xml = util.read_xml_file(filename)
+                    break
+                except benchexec.BenchExecException as e:
+                    logging.warning("Cannot resume previous execution: %s", e)
+        if previous_xml is None:
+            return
+
+        previous_runs = {
+            _run_xml_key(run_xml): run_xml
+            for run_xml in previous_xml.findall("run")
+            if run_xml.find("column[@title='status']") is not None
+        }
+        if self.compress_results:
+            with self.log_zip_lock:
+                zipped_logs = set(self.log_zip.namelist())
+
+        missing_logs = 0
+        for run in runSet.runs:
+            run_xml = previous_runs.get(_run_xml_key(run.xml))
+            if run_xml is None:
+                continue
+            run.restore_result(run_xml)
+            for elem in run_xml.iter():
+                elem.tail = None  # remove indentation, will be added when writing
+            run.xml = run_xml
+            run.resultline = self.create_output_line(
+                runSet,
+                run.identifier,
+                run.status,
+                util.format_number(run.values.get("cputime"), TIME_PRECISION),
+                util.format_number(run.values.get("walltime"), TIME_PRECISION),
+                run.values.get("host"),
+                run.columns,
+            )
+            self.statistics.add_result(run)
+
+            if self.compress_results:
+                log_file_path = os.path.relpath(
+                    run.log_file, os.path.join(self.benchmark.log_folder, os.pardir)
+                )
+                if log_file_path not in zipped_logs:
+                    missing_logs += 1
+            elif os.path.exists(run.log_file):
+                self.all_created_files.add(run.log_file)
+            else:
+                missing_logs += 1
+
+        restored_runs = [run for run in runSet.runs if run.result_restored]
+        runSet.started_runs = len(restored_runs)
+        # The times of the run set are missing if the previous execution crashed,
+        # then we use the times of its runs instead.
+        runSet.previous_cputime = util.get_seconds_from_xml(previous_xml, "cputime")
+        if runSet.previous_cputime is None:
+            runSet.previous_cputime = sum(
+                run.values.get("cputime") or 0 for run in restored_runs
+            )
+        runSet.previous_walltime = util.get_seconds_from_xml(previous_xml, "walltime")
+        if runSet.previous_walltime is None:
+            runSet.previous_walltime = sum(
+                run.values.get("walltime") or 0 for run in restored_runs
+            )
+
+        util.printOut(
+            f"Reusing results of {len(restored_runs)} runs from previous execution."
+        )
+        if missing_logs:
+            logging.warning(
+                "Log files of %s runs from previous execution are missing, "
+                "probably because the previous execution crashed.",
+                missing_logs,
+            )
+
     def output_for_skipping_run_set(self, runSet, reason=None):
         """
         This function writes a simple message to terminal and logfile,
@@ -453,8 +545,14 @@ class OutputHandler(object):
 
         runSetInfo += titleLine + "\n" + runSet.simpleLine + "\n"
 
-        # write into txt_file
-        self.txt_file.append(runSetInfo)
+        # write into txt_file, but if run sets are pipelined and a previous run set
+        # is still executed, postpone this until its results are written
+        with OutputHandler.print_lock:
+            if self.benchmark.config.pipeline_run_sets and self.run_sets_in_progress:
+                runSet.postponed_run_set_info = runSetInfo
+            else:
+                self.txt_file.append(runSetInfo)
+            self.run_sets_in_progress.append(runSet)
 
     def output_before_run(self, run):
         """
@@ -583,6 +681,13 @@ class OutputHandler(object):
         @params cputime, walltime: accumulated times of the run set
         """
 
+        # Account for the part of the run set that was executed previously
+        # in case this execution was resumed.
+        if cputime is not None:
+            cputime += runSet.previous_cputime
+        if walltime is not None:
+            walltime += runSet.previous_walltime
+
         self.add_values_to_run_set_xml(runSet, cputime, walltime, energy, cache)
 
         if end_time:
@@ -603,7 +708,20 @@ class OutputHandler(object):
                     block_xml.set("endtime", runSet.xml.get("endtime"))
                 self._write_pretty_result_xml_to_file(block_xml, blockFileName)
 
-        self.txt_file.append(self.run_set_to_text(runSet, cputime, walltime, energy))
+        with OutputHandler.print_lock:
+            self.txt_file.append(
+                self.run_set_to_text(runSet, cputime, walltime, energy)
+            )
+            if runSet in self.run_sets_in_progress:
+                self.run_sets_in_progress.remove(runSet)
+            if self.run_sets_in_progress:
+                next_run_set = self.run_sets_in_progress[0]
+                next_run_set_info = getattr(
+                    next_run_set, "postponed_run_set_info", None
+                )
+                if next_run_set_info:
+                    self.txt_file.append(next_run_set_info)
+                    next_run_set.postponed_run_set_info = None
 
     def run_set_to_text(self, runSet, cputime=0, walltime=0, energy={}):
         lines = []
@@ -629,6 +747,7 @@ class OutputHandler(object):
                 runSet, endline, "done", cputime_str, walltime_str, "-", []
             )
         )
+        lines.extend(_overhead_summary(runSet.runs))
 
         return "\n".join(lines) + "\n"
 
@@ -899,6 +1018,10 @@ class OutputHandler(object):
         with io.TextIOWrapper(
             open_func(actual_filename, "wb"), encoding="utf-8"
         ) as file:
+            # Need to disable pytype for minidom due to
+            # https://github.com/google/pytype/issues/1130
+            from xml.dom import minidom  # pytype: disable=pyi-error
+
             rough_string = ElementTree.tostring(xml, encoding="unicode")
             reparsed = minidom.parseString(rough_string)
             doctype = minidom.DOMImplementation().createDocumentType(
@@ -924,6 +1047,51 @@ class OutputHandler(object):
         return filename
 
 
+def _run_xml_key(run_xml):
+    """
+    Return a key that identifies a run by the attributes of its XML element,
+    which are determined by the benchmark definition only.
+    """
+    return tuple(sorted(run_xml.attrib.items()))
+
+
+def _overhead_summary(runs):
+    """
+    Summarize the values "@overhead-<phase>" of the given runs
+    (present if BenchExec was asked to measure its overhead).
+    @return a list of lines with the average and maximum duration of each phase
+    """
+    durations = collections.OrderedDict()
+    for run in runs:
+        total = 0
+        key_found = False
+        for key, value in run.values.items():
+            if key.startswith("@overhead-"):
+                try:
+                    # values restored from result files are strings like "0.01s"
+                    value = float(str(value).rstrip("s"))
+                except ValueError:
+                    continue
+                durations.setdefault(key[len("@overhead-") :], []).append(value)
+                total += value
+                key_found = True
+        if key_found:
+            durations.setdefault("total", []).append(total)
+    if not durations:
+        return []
+
+    durations.move_to_end("total")
+    width = max(map(len, durations)) + 1
+    lines = ["", "Overhead of BenchExec per run (average / maximum):"]
+    for phase, values in durations.items():
+        average = sum(values) / len(values)
+        lines.append(
+            f"  {phase + ':':<{width}} {average * 1000:8.1f} ms / "
+            f"{max(values) * 1000:8.1f} ms"
+        )
+    return lines
+
+
 class Statistics(object):
     def __init__(self):
         self.dic = collections.defaultdict(int)
@@ -0,0 +1,178 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module allows to count performance events (like executed instructions)
+of all processes in a cgroup with the perf_event_open() system call.
+"""
+
+import ctypes
+import errno
+import logging
+import os
+import struct
+
+from benchexec import libc
+
+_HARDWARE_EVENTS = [
+    ("instructions", libc.PERF_TYPE_HARDWARE, libc.PERF_COUNT_HW_INSTRUCTIONS),
+    ("cycles", libc.PERF_TYPE_HARDWARE, libc.PERF_COUNT_HW_CPU_CYCLES),
+    ("cache-misses", libc.PERF_TYPE_HARDWARE, libc.PERF_COUNT_HW_CACHE_MISSES),
+]
+_SOFTWARE_EVENTS = [
+    ("context-switches", libc.PERF_TYPE_SOFTWARE, libc.PERF_COUNT_SW_CONTEXT_SWITCHES),
+    ("page-faults", libc.PERF_TYPE_SOFTWARE, libc.PERF_COUNT_SW_PAGE_FAULTS),
+    ("task-clock", libc.PERF_TYPE_SOFTWARE, libc.PERF_COUNT_SW_TASK_CLOCK),
+]
+ALL_EVENTS = _HARDWARE_EVENTS + _SOFTWARE_EVENTS
+"""All events that can be measured, as tuples of (name, type, config)."""
+
+_NO_PMU_ERRORS = {errno.ENOENT, errno.ENODEV, errno.EOPNOTSUPP}
+"""Error codes of perf_event_open() if hardware events are not supported."""
+
+_READ_FORMAT = libc.PERF_FORMAT_TOTAL_TIME_ENABLED | libc.PERF_FORMAT_TOTAL_TIME_RUNNING
+_COUNTER_VALUE = struct.Struct("=QQQ")  # value, time enabled, time running
+
+
+def _open_counter(event, pid, cpu, flags=0):
+    """
+    Open a counter for the given event.
+    @param event: a tuple from ALL_EVENTS
+    @param pid, cpu, flags: the parameters of perf_event_open()
+    @return: a file descriptor from which _read_counter() can read the value
+    """
+    _, event_type, config = event
+    attr = libc.PerfEventAttr(
+        type=event_type,
+        size=ctypes.sizeof(libc.PerfEventAttr),
+        config=config,
+        read_format=_READ_FORMAT,
+    )
+    return libc.perf_event_open(
+        ctypes.byref(attr), pid, cpu, -1, flags | libc.PERF_FLAG_FD_CLOEXEC
+    )
+
+
+def _read_counter(fd):
+    """
+    Read the value of a counter, extrapolated to the whole time it was enabled
+    (the kernel multiplexes counters if there are more than the hardware supports).
+    """
+    value, time_enabled, time_running = _COUNTER_VALUE.unpack(
+        os.read(fd, _COUNTER_VALUE.size)
+    )
+    if time_running and time_running < time_enabled:
+        return round(value * time_enabled / time_running)
+    return value
+
+
+def _get_cpus():
+    return sorted(os.sched_getaffinity(0))
+
+
+def find_supported_events(cgroup):
+    """
+    Check which events can be counted for the processes in a cgroup,
+    and log a warning if not all of them can.
+    On machines without exposed performance-monitoring unit (e.g., many VMs),
+    only the software events are returned.
+    @param cgroup: the directory of a cgroup in the perf_event hierarchy
+    @return: a list of tuples from ALL_EVENTS
+    """
+    events = []
+    cpu = _get_cpus()[0]
+    cgroup_fd = os.open(cgroup, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    try:
+        for event in ALL_EVENTS:
+            try:
+                os.close(
+                    _open_counter(event, cgroup_fd, cpu, libc.PERF_FLAG_PID_CGROUP)
+                )
+            except OSError as e:
+                if event in _HARDWARE_EVENTS and e.errno in _NO_PMU_ERRORS:
+                    logging.debug("Cannot count %s: %s", event[0], e.strerror)
+                    continue
+                logging.warning("Cannot measure performance counters: %s", e.strerror)
+                return []
+            events.append(event)
+    finally:
+        os.close(cgroup_fd)
+
+    if len(events) < len(ALL_EVENTS):
+        logging.warning(
+            "Hardware performance counters are not available, "
+            "measuring only software events."
+        )
+    return events
+
+
+class PerfEventMeasurement(object):
+    """
+    Counts performance events of all processes in a cgroup.
+    In cgroup mode, the kernel needs one counter per CPU and event,
+    which counts only while a process of the cgroup runs on this CPU.
+    """
+
+    def __init__(self, cgroup, events, cpus=None):
+        """
+        @param cgroup: the directory of a cgroup in the perf_event hierarchy
+        @param events: a list of tuples from ALL_EVENTS, e.g.,
+            as returned by find_supported_events()
+        @param cpus: None or the list of CPU cores on which the processes may run
+        """
+        self._cgroup = cgroup
+        self._events = events
+        self._cpus = cpus or _get_cpus()
+        self._counters = {}
+
+    def start(self):
+        """
+        Open all counters, which count from now on.
+        Events for which this fails are not measured.
+        """
+        assert not self._counters, "perf-event measurement already started"
+        cgroup_fd = os.open(self._cgroup, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+        try:
+            for event in self._events:
+                fds = []
+                try:
+                    for cpu in self._cpus:
+                        fds.append(
+                            _open_counter(
+                                event, cgroup_fd, cpu, libc.PERF_FLAG_PID_CGROUP
+                            )
+                        )
+                except OSError as e:
+                    logging.warning("Cannot count %s: %s", event[0], e.strerror)
+                    for fd in fds:
+                        os.close(fd)
+                    continue
+                self._counters[event[0]] = fds
+        finally:
+            os.close(cgroup_fd)
+
+    def stop(self):
+        """
+        Read and close all counters.
+        @return: a dict with the result values "perf-<event>"
+            (the task clock is given in seconds, all other events as counts)
+        """
+        result = {}
+        for name, fds in self._counters.items():
+            try:
+                value = sum(_read_counter(fd) for fd in fds)
+            except OSError as e:
+                logging.warning("Cannot read counter for %s: %s", name, e.strerror)
+            else:
+                if name == "task-clock":
+                    value /= 1000000000  # nanoseconds
+                result["perf-" + name] = value
+            finally:
+                for fd in fds:
+                    os.close(fd)
+        self._counters = {}
+        return result
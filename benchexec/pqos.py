@@ -7,17 +7,27 @@
 
 """
     This module contains the Pqos class which is used to interact with pqos_wrapper cli
+    (or directly with the resctrl file system of Linux, if available)
     to allocate equal cache for each thread and isolate cache of two individual threads.
 """
 
+import itertools
 import os
 import logging
 import json
 import grp
+import threading
+import time
 from signal import SIGINT
 from subprocess import check_output, CalledProcessError, STDOUT, Popen, PIPE
+from benchexec import util
 from benchexec.util import find_executable2, get_capability, check_msr
 
+RESCTRL_DIR = "/sys/fs/resctrl"
+_RESCTRL_GROUP_PREFIX = "benchexec_"
+_RESCTRL_SAMPLE_INTERVAL_SECONDS = 1
+_RESCTRL_MON_FEATURES = {"mbm_local_bytes": "mbm_local", "mbm_total_bytes": "mbm_total"}
+
 
 class Pqos(object):
     """
@@ -30,9 +40,13 @@ class Pqos(object):
         self.reset_required = False
         self.show_warnings = show_warnings
         self.mon_process = None
+        self.resctrl_monitor = None
+        self.resctrl = None
         self.executable_path = find_executable2("pqos_wrapper")
         if self.executable_path is None:
-            if self.show_warnings:
+            # pqos_wrapper is preferred because it also measures IPC and LLC misses
+            self.resctrl = _Resctrl.find()
+            if self.resctrl is None and self.show_warnings:
                 logging.info(
                     "Unable to find pqos_wrapper, please install it for "
                     "cache allocation and monitoring if your CPU supports Intel RDT "
@@ -117,6 +131,11 @@ class Pqos(object):
 
             @core_assignment: The list of cores assigned to each run
         """
+        if self.resctrl:
+            self.reset_required = self.resctrl.allocate_l3ca(
+                core_assignment, self.show_warnings
+            )
+            return
         if self.check_capacity("l3ca"):
             core_string = self.convert_core_list(core_assignment)
             if self.execute_command(
@@ -133,6 +152,11 @@ class Pqos(object):
 
             @core_assignment: The list of cores assigned to each run
         """
+        if self.resctrl:
+            self.resctrl_monitor = self.resctrl.start_monitoring(
+                core_assignment, self.show_warnings
+            )
+            return
         if self.check_capacity("mon"):
             core_string = self.convert_core_list(core_assignment)
             self.execute_command("mon", "monitor_events", False, "-m", core_string)
@@ -143,7 +167,10 @@ class Pqos(object):
         and resets the RMID for monitored cores to 0
         """
         ret = {}
-        if self.mon_process:
+        if self.resctrl_monitor:
+            ret = self.flatten_mon_data(self.resctrl_monitor.stop())
+            self.resctrl_monitor = None
+        elif self.mon_process:
             self.mon_process.send_signal(SIGINT)
             mon_output = self.mon_process.communicate()
             if self.mon_process.returncode == 0:
@@ -168,6 +195,9 @@ class Pqos(object):
         """
         Reset monitoring RMID to 0 for all cores
         """
+        if self.resctrl:
+            self.resctrl.remove_stale_groups()
+            return
         self.execute_command("mon", "reset_monitoring", True, "-rm")
 
     @staticmethod
@@ -203,7 +233,10 @@ class Pqos(object):
         This method resets all resources to default.
         """
         if self.reset_required:
-            self.execute_command("l3ca", "reset_resources", True, "-r")
+            if self.resctrl:
+                self.resctrl.reset_l3ca()
+            else:
+                self.execute_command("l3ca", "reset_resources", True, "-r")
             self.reset_required = False
 
     def check_for_errors(self):
@@ -235,3 +268,266 @@ class Pqos(object):
                 )
         else:
             logging.warning("Load msr module for using cache allocation/monitoring")
+
+
+class _Resctrl(object):
+    """
+    Cache allocation and monitoring with the resctrl file system of Linux
+    (cf. https://docs.kernel.org/arch/x86/resctrl.html) without pqos_wrapper.
+    Cores are assigned to control and monitoring groups of resctrl,
+    such that processes of the runs (which are in the default group)
+    use the cache partition and RMID of the cores they are running on.
+    """
+
+    _group_counter = itertools.count()
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.l3ca_groups = []
+
+    @classmethod
+    def find(cls, base_dir=RESCTRL_DIR):
+        """Return an instance if resctrl is mounted and usable at base_dir or None."""
+        if not os.path.isdir(os.path.join(base_dir, "info")):
+            return None
+        if not os.access(base_dir, os.W_OK):
+            logging.debug("Cannot use resctrl in %s: no write access.", base_dir)
+            return None
+        return cls(base_dir)
+
+    def _new_group_name(self, kind):
+        return f"{_RESCTRL_GROUP_PREFIX}{os.getpid()}_{kind}{next(self._group_counter)}"
+
+    def allocate_l3ca(self, core_assignment, show_warnings):
+        """
+        Create one control group per run with an equally-sized and
+        non-overlapping part of the L3 cache.
+        @param core_assignment: The list of cores assigned to each run
+        @return: True if cache was allocated
+        """
+        info_dir = os.path.join(self.base_dir, "info", "L3")
+        if not os.path.isdir(info_dir):
+            return False
+        try:
+            cbm_mask = int(util.read_file(info_dir, "cbm_mask"), 16)
+            min_cbm_bits = int(util.try_read_file(info_dir, "min_cbm_bits") or 1)
+            num_closids = int(util.read_file(info_dir, "num_closids"))
+            cache_ids = self._get_l3_cache_ids()
+        except (OSError, ValueError) as e:
+            if show_warnings:
+                logging.warning("Could not set cache allocation...%s", e)
+            return False
+
+        bits_per_run = bin(cbm_mask).count("1") // len(core_assignment)
+        if len(core_assignment) >= num_closids or bits_per_run < min_cbm_bits:
+            if show_warnings:
+                logging.warning(
+                    "Could not set cache allocation..."
+                    "not enough cache partitions available for %s runs",
+                    len(core_assignment),
+                )
+            return False
+
+        lowest_bit = (cbm_mask & -cbm_mask).bit_length() - 1
+        try:
+            for i, cores in enumerate(core_assignment):
+                mask = ((1 << bits_per_run) - 1) << (lowest_bit + i * bits_per_run)
+                group_dir = os.path.join(self.base_dir, self._new_group_name("l3ca"))
+                os.mkdir(group_dir)
+                self.l3ca_groups.append(group_dir)
+                util.write_file(_format_cpus(cores), group_dir, "cpus_list")
+                schemata = ";".join(f"{cache_id}={mask:x}" for cache_id in cache_ids)
+                util.write_file(f"L3:{schemata}\n", group_dir, "schemata")
+        except OSError as e:
+            if show_warnings:
+                logging.warning("Could not set cache allocation...%s", e)
+            self.reset_l3ca()
+            return False
+        logging.debug(
+            "Allocated %s of %s cache ways to each run with resctrl.",
+            bits_per_run,
+            bin(cbm_mask).count("1"),
+        )
+        return True
+
+    def _get_l3_cache_ids(self):
+        for line in util.read_file(self.base_dir, "schemata").splitlines():
+            resource, _, domains = line.strip().partition(":")
+            if resource == "L3":
+                return [domain.split("=")[0] for domain in domains.split(";")]
+        # e.g., only L3CODE and L3DATA if code and data prioritization is enabled
+        raise ValueError("no L3 resource in resctrl schemata")
+
+    def reset_l3ca(self):
+        """Remove the control groups created by allocate_l3ca()."""
+        for group_dir in self.l3ca_groups:
+            _remove_group(group_dir)
+        self.l3ca_groups = []
+
+    def start_monitoring(self, core_assignment, show_warnings):
+        """
+        Start monitoring cache occupancy and memory bandwidth of the given cores.
+        @param core_assignment: The list of cores assigned to each run
+        @return: a _ResctrlMonitor or None
+        """
+        if not os.path.isdir(os.path.join(self.base_dir, "info", "L3_MON")):
+            return None
+        groups = []
+        try:
+            for cores in core_assignment:
+                # Cores of a monitoring group need to be in its parent control group.
+                parent_dir = self._find_control_group(cores)
+                group_dir = os.path.join(
+                    parent_dir, "mon_groups", self._new_group_name("mon")
+                )
+                os.mkdir(group_dir)
+                groups.append((cores, group_dir))
+                util.write_file(_format_cpus(cores), group_dir, "cpus_list")
+        except OSError as e:
+            if show_warnings:
+                logging.warning("Could not monitor events...%s", e)
+            for _, group_dir in groups:
+                _remove_group(group_dir)
+            return None
+        return _ResctrlMonitor(groups)
+
+    def _find_control_group(self, cores):
+        with os.scandir(self.base_dir) as entries:
+            for entry in entries:
+                if entry.name in ["info", "mon_groups", "mon_data"]:
+                    continue
+                cpus = util.try_read_file(entry.path, "cpus_list")
+                if cpus and set(cores) <= set(util.parse_int_list(cpus)):
+                    return entry.path
+        return self.base_dir
+
+    def remove_stale_groups(self):
+        """Remove groups that were left over by BenchExec processes that died."""
+        parent_dirs = [self.base_dir]
+        with os.scandir(self.base_dir) as entries:
+            parent_dirs.extend(entry.path for entry in entries if entry.is_dir())
+        for parent_dir in parent_dirs:
+            for group_dir in [parent_dir, os.path.join(parent_dir, "mon_groups")]:
+                if not os.path.isdir(group_dir):
+                    continue
+                for name in os.listdir(group_dir):
+                    if name.startswith(_RESCTRL_GROUP_PREFIX) and not _is_process_alive(
+                        name[len(_RESCTRL_GROUP_PREFIX) :].split("_")[0]
+                    ):
+                        _remove_group(os.path.join(group_dir, name))
+
+
+class _ResctrlMonitor(object):
+    """
+    Samples the cache occupancy and memory-bandwidth counters
+    of resctrl monitoring groups regularly while a run is executing.
+    """
+
+    def __init__(self, groups):
+        """
+        @param groups: a list of (cores, monitoring group directory) tuples
+        """
+        self._groups = groups
+        self._samples = [[] for _ in groups]
+        self._take_samples()
+        self._stop_sampling = threading.Event()
+        self._sampling_thread = threading.Thread(
+            target=self._sample_regularly, name="resctrl-monitoring", daemon=True
+        )
+        self._sampling_thread.start()
+
+    def _sample_regularly(self):
+        while not self._stop_sampling.wait(_RESCTRL_SAMPLE_INTERVAL_SECONDS):
+            self._take_samples()
+
+    def _take_samples(self):
+        for (_, group_dir), samples in zip(self._groups, self._samples):
+            samples.append((time.monotonic(), _read_mon_data(group_dir)))
+
+    def stop(self):
+        """
+        Stop monitoring, remove the monitoring groups,
+        and return the monitoring data in the format of pqos_wrapper
+        (cache occupancy in KB, memory bandwidth in MB/s).
+        """
+        self._stop_sampling.set()
+        self._sampling_thread.join()
+        self._take_samples()
+        mon_data = []
+        for (cores, group_dir), samples in zip(self._groups, self._samples):
+            _remove_group(group_dir)
+            data = {"cores": cores}
+            occupancy = [values["llc_occupancy"] for _, values in samples]
+            if None not in occupancy:
+                data["llc"] = {
+                    "avg": round(sum(occupancy) / len(occupancy) / 1024),
+                    "max": round(max(occupancy) / 1024),
+                }
+            for feature, key in _RESCTRL_MON_FEATURES.items():
+                bandwidth = _compute_bandwidth(samples, feature)
+                if bandwidth:
+                    data[key] = bandwidth
+            mon_data.append(data)
+        return mon_data
+
+
+def _read_mon_data(group_dir):
+    """
+    Read the monitoring counters of a group, summed up over all L3 cache domains.
+    Unavailable counters (e.g., not supported by the CPU) have the value None.
+    """
+    features = ["llc_occupancy", *_RESCTRL_MON_FEATURES]
+    mon_data_dir = os.path.join(group_dir, "mon_data")
+    try:
+        domains = os.listdir(mon_data_dir)
+    except OSError:
+        return dict.fromkeys(features)
+    result = {}
+    for feature in features:
+        try:
+            result[feature] = sum(
+                int(util.read_file(mon_data_dir, domain, feature)) for domain in domains
+            )
+        except (OSError, ValueError):
+            # file contains "Unavailable" if the counter cannot be read currently
+            result[feature] = None
+    return result
+
+
+def _compute_bandwidth(samples, feature):
+    """Compute average and maximum bandwidth in MB/s from byte counters."""
+    rates = []
+    for (start_time, start), (end_time, end) in zip(samples, samples[1:]):
+        if start[feature] is None or end[feature] is None:
+            return None
+        rates.append(
+            ((end[feature] - start[feature]) / (1024 * 1024), end_time - start_time)
+        )
+    duration = sum(interval for _, interval in rates)
+    if not duration:
+        return None
+    return {
+        "avg": round(sum(size for size, _ in rates) / duration, 3),
+        "max": round(max(size / interval for size, interval in rates if interval), 3),
+    }
+
+
+def _format_cpus(cores):
+    return ",".join(str(core) for core in cores)
+
+
+def _remove_group(group_dir):
+    try:
+        os.rmdir(group_dir)
+    except OSError as e:
+        logging.warning("Could not remove resctrl group %s: %s", group_dir, e)
+
+
+def _is_process_alive(pid):
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        pass
+    return True
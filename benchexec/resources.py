@@ -15,6 +15,7 @@ import logging
 import math
 import os
 import sys
+import time
 
 from benchexec import cgroups
 from benchexec import util
@@ -24,8 +25,21 @@ __all__ = [
     "get_cpu_cores_per_run",
     "get_memory_banks_per_run",
     "get_cpu_package_for_core",
+    "MemoryAdmissionControl",
 ]
 
+_MEMINFO_FILE = "/proc/meminfo"
+_MEMORY_PRESSURE_FILE = "/proc/pressure/memory"
+_VMSTAT_FILE = "/proc/vmstat"
+
+# Percentage of time (over the last 10s) in which some task was stalled on memory,
+# above which no further runs are admitted.
+_MEMORY_PRESSURE_THRESHOLD = 1.0
+
+# Time for which a started run is assumed to use the safety margin of memory,
+# because it typically takes a while until its memory usage becomes measurable.
+_ADMISSION_SETTLE_TIME = 5
+
 
 def get_cpu_cores_per_run(
     coreLimit, num_of_threads, use_hyperthreading, my_cgroups, coreSet=None
@@ -359,7 +373,9 @@ def _get_memory_banks_listed_in_dir(path):
     return [int(entry[4:]) for entry in os.listdir(path) if entry.startswith("node")]
 
 
-def check_memory_size(memLimit, num_of_threads, memoryAssignment, my_cgroups):
+def check_memory_size(
+    memLimit, num_of_threads, memoryAssignment, my_cgroups, admission_control=False
+):
     """Check whether the desired amount of parallel benchmarks fits in the memory.
     Implemented are checks for memory limits via cgroup controller "memory" and
     memory bank restrictions via cgroup controller "cpuset",
@@ -367,7 +383,18 @@ def check_memory_size(memLimit, num_of_threads, memoryAssignment, my_cgroups):
     @param memLimit: the memory limit in bytes per run
     @param num_of_threads: the number of parallel benchmark executions
     @param memoryAssignment: the allocation of memory banks to runs (if not present, all banks are assigned to all runs)
+    @param admission_control: whether runs are admitted based on their measured memory usage,
+        in which case it is only checked that each single run fits in the memory
     """
+
+    def fail_for_all_runs(msg):
+        if admission_control:
+            logging.warning(
+                "%s Parallel runs are admitted only while enough memory is free.", msg
+            )
+        else:
+            sys.exit(msg + " Please reduce the number of threads.")
+
     try:
         # Check amount of memory allowed via cgroups.
         def check_limit(actualLimit):
@@ -377,10 +404,10 @@ def check_memory_size(memLimit, num_of_threads, memoryAssignment, my_cgroups):
                     f"cannot execute runs with {memLimit} bytes of memory."
                 )
             elif actualLimit < memLimit * num_of_threads:
-                sys.exit(
+                fail_for_all_runs(
                     f"Cgroups allow only {actualLimit} bytes of memory to be used, "
                     f"not enough for {num_of_threads} benchmarks with {memLimit} bytes "
-                    f"each. Please reduce the number of threads."
+                    f"each."
                 )
 
         if not os.path.isdir("/sys/devices/system/node/"):
@@ -390,14 +417,9 @@ def check_memory_size(memLimit, num_of_threads, memoryAssignment, my_cgroups):
             return
 
         if cgroups.MEMORY in my_cgroups:
-            # We use the entries hierarchical_*_limit in memory.stat and not memory.*limit_in_bytes
-            # because the former may be lower if memory.use_hierarchy is enabled.
-            for key, value in my_cgroups.get_key_value_pairs(cgroups.MEMORY, "stat"):
-                if (
-                    key == "hierarchical_memory_limit"
-                    or key == "hierarchical_memsw_limit"
-                ):
-                    check_limit(int(value))
+            cgroup_limit = my_cgroups.read_memory_limit()
+            if cgroup_limit is not None:
+                check_limit(cgroup_limit)
 
         # Get list of all memory banks, either from memory assignment or from system.
         if not memoryAssignment:
@@ -428,10 +450,10 @@ def check_memory_size(memLimit, num_of_threads, memoryAssignment, my_cgroups):
                 f"only {totalSize} bytes available."
             )
         usedMem[tuple(mems_of_run)] += memLimit
-        if usedMem[tuple(mems_of_run)] > totalSize:
-            sys.exit(
+        if totalSize < usedMem[tuple(mems_of_run)] <= totalSize + memLimit:
+            fail_for_all_runs(
                 f"Memory banks {mems_of_run} do not have enough memory for all runs, "
-                f"only {totalSize} bytes available. Please reduce the number of threads."
+                f"only {totalSize} bytes available."
             )
 
 
@@ -467,3 +489,136 @@ def get_cores_of_same_package_as(core):
     return util.parse_int_list(
         util.read_file(f"/sys/devices/system/cpu/cpu{core}/topology/core_siblings_list")
     )
+
+
+class MemoryAdmissionControl(object):
+    """
+    Decides whether a further run may be started, based on the measured memory usage
+    of the currently running runs instead of their memory limits.
+    A run is admitted only if the free memory (the memory available to BenchExec
+    minus the measured usage of its cgroup, and at most the memory that the kernel
+    considers available) is at least the safety margin for each recently started run,
+    and if the system has neither swapped since the last check
+    nor is under memory pressure.
+    The hard memory limit of each run is still enforced by RunExecutor.
+    """
+
+    def __init__(self, margin, my_cgroups, memoryAssignment=None):
+        """
+        @param margin: the amount of memory in bytes that needs to be free for each run
+        @param my_cgroups: the cgroups of this process
+        @param memoryAssignment: the allocation of memory banks to runs (optional)
+        """
+        self.margin = margin
+        self.my_cgroups = my_cgroups
+        self.capacity = self._get_capacity(memoryAssignment)
+        self.swap_count = _read_swap_count()
+        self.admission_times = []
+        self.refusing = False
+        logging.debug(
+            "Admitting runs while %s bytes of %s bytes of memory are free.",
+            margin,
+            self.capacity,
+        )
+
+    def _get_capacity(self, memoryAssignment):
+        capacity = _read_meminfo().get("MemTotal")
+        if memoryAssignment:
+            mems = set(itertools.chain(*memoryAssignment))
+            capacity = sum(_get_memory_bank_size(mem) for mem in mems)
+        if cgroups.MEMORY in self.my_cgroups:
+            cgroup_limit = self.my_cgroups.read_memory_limit()
+            if cgroup_limit is not None:
+                capacity = min(capacity, cgroup_limit)
+        return capacity
+
+    def get_free_memory(self):
+        """Return the amount of memory in bytes that is currently free for runs."""
+        free = _read_meminfo().get("MemAvailable", self.capacity)
+        if cgroups.MEMORY in self.my_cgroups:
+            # Like the "working set" of a cgroup, inactive page cache is not counted,
+            # because it would be reclaimed before the runs need to swap.
+            free = min(free, self.capacity - self.my_cgroups.read_memory_usage())
+        return free
+
+    def may_admit(self, running_runs):
+        """
+        Check whether a further run may be started, and if so, count it as started.
+        If no run is running, a run is always admitted to guarantee progress.
+        @param running_runs: the number of currently running runs
+        @return: a boolean value
+        """
+        now = time.monotonic()
+        self.admission_times = [
+            t for t in self.admission_times if now - t < _ADMISSION_SETTLE_TIME
+        ]
+        reason = self._get_reason_for_refusal(len(self.admission_times) + 1)
+        if reason and running_runs > 0:
+            if not self.refusing:
+                logging.debug("Not starting further runs yet: %s.", reason)
+            self.refusing = True
+            return False
+        self.refusing = False
+        self.admission_times.append(now)
+        return True
+
+    def _get_reason_for_refusal(self, starting_runs):
+        try:
+            swap_count = _read_swap_count()
+            has_swapped = any(
+                value > self.swap_count.get(key, 0) for key, value in swap_count.items()
+            )
+            self.swap_count = swap_count
+            if has_swapped:
+                return "system has swapped"
+
+            pressure = _read_memory_pressure()
+            if pressure is not None and pressure > _MEMORY_PRESSURE_THRESHOLD:
+                return f"memory pressure is {pressure}%"
+
+            free = self.get_free_memory()
+        except (OSError, ValueError) as e:
+            logging.warning("Cannot read memory usage from kernel: %s", e)
+            return "memory usage is unknown"
+
+        if free < self.margin * starting_runs:
+            return f"only {free} bytes of memory are free"
+        return None
+
+
+def _read_meminfo():
+    """Read /proc/meminfo and return a dict with the sizes in bytes."""
+    result = {}
+    for key, value in util.read_key_value_pairs_from_file(_MEMINFO_FILE):
+        value = value.strip()
+        if value.endswith(" kB"):
+            result[key.rstrip(":")] = int(value[:-3]) * 1024
+    return result
+
+
+def _read_swap_count():
+    return {
+        k: int(v)
+        for k, v in util.read_key_value_pairs_from_file(_VMSTAT_FILE)
+        if k in ["pswpin", "pswpout"]
+    }
+
+
+def _read_memory_pressure():
+    """
+    Read the percentage of time in the last 10s in which some task was stalled
+    on memory, or return None if the kernel does not provide pressure information.
+    """
+    try:
+        lines = util.read_file(_MEMORY_PRESSURE_FILE).splitlines()
+    except OSError:
+        # file is missing or pressure stall information is disabled
+        return None
+    for line in lines:
+        kind, *values = line.split()
+        if kind == "some":
+            for value in values:
+                key, _, number = value.partition("=")
+                if key == "avg10":
+                    return float(number)
+    raise ValueError(f"Unexpected content of {_MEMORY_PRESSURE_FILE}: {lines}")
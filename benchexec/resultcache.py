@@ -0,0 +1,249 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains a cache for results of runs, such that runs that are identical
+to runs of earlier executions do not need to be executed again.
+Runs are identified by a hash of everything that influences their result:
+the files of the tool, the command line, the input files, the resource limits,
+and the configuration of the execution (e.g., of the container).
+"""
+
+import datetime
+import decimal
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from benchexec import BenchExecException
+from benchexec import util
+
+_RESULT_FILE = "result.json"
+_LOG_FILE = "output.log"
+
+# version of the format of cache entries, part of the key
+_CACHE_FORMAT = "2"
+
+
+class ResultCache(object):
+    """
+    A directory with the results of runs, where each entry is stored
+    in a subdirectory named after the key of the run and contains the result values
+    as returned by RunExecutor.execute_run(), the status of the run,
+    and the log file of the run.
+    """
+
+    def __init__(self, directory, max_age=None, max_size=None):
+        """
+        @param directory: the directory of the cache, created if missing
+        @param max_age: entries that were not used for this number of seconds are removed
+        @param max_size: the maximum size of the cache in bytes
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.max_size = max_size
+        self._program_files_hashes = {}
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            raise BenchExecException(f"Could not create result cache {directory}: {e}")
+
+    def get_key(self, run):
+        """
+        Compute the key of a run, which is a hash of the tool's program files,
+        the command line, the environment, the input files, the resource limits,
+        and the options of benchexec that influence the execution of the run.
+        """
+        benchmark = run.runSet.benchmark
+        h = hashlib.sha256()
+        h.update(_CACHE_FORMAT.encode())
+        h.update(self._get_program_files_hash(benchmark).encode())
+        _update_with_values(h, run.cmdline())
+        _update_with_values(h, sorted(benchmark.environment().items()))
+        _update_with_values(h, benchmark.working_directory() or "")
+        _update_with_values(h, benchmark.rlimits)
+        config = benchmark.config
+        _update_with_values(
+            h,
+            sorted(
+                (key, sorted(value.items()) if isinstance(value, dict) else value)
+                for key, value in config.containerargs.items()
+            ),
+        )
+        _update_with_values(
+            h, (config.filesCountLimit, config.filesSizeLimit, config.maxLogfileSize)
+        )
+        for input_file in sorted(set(run.sourcefiles).union(run.required_files)):
+            _update_with_file(h, input_file)
+        return h.hexdigest()
+
+    def _get_program_files_hash(self, benchmark):
+        executable = benchmark.executable
+        with self._lock:
+            if executable not in self._program_files_hashes:
+                h = hashlib.sha256()
+                for program_file in sorted(benchmark.tool.program_files(executable)):
+                    _update_with_file(h, program_file)
+                self._program_files_hashes[executable] = h.hexdigest()
+            return self._program_files_hashes[executable]
+
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def lookup(self, key, log_file):
+        """
+        Look up the result of the run with the given key,
+        and if present, copy the stored log file to the given file name.
+        @return: a tuple of the dict of result values and the status,
+            or None if no result is stored
+        """
+        entry_dir = self._entry_dir(key)
+        result_file = os.path.join(entry_dir, _RESULT_FILE)
+        try:
+            with open(result_file, "rt") as f:
+                entry = json.load(f)
+            values = decode_values(entry["values"])
+            status = entry["status"]
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            shutil.copyfile(os.path.join(entry_dir, _LOG_FILE), log_file)
+            # mark as recently used for eviction
+            os.utime(result_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Ignoring invalid entry %s of result cache: %s", key, e)
+            return None
+        return values, status
+
+    def store(self, key, values, status, log_file):
+        """
+        Store the result values, the status, and the log file of the run
+        with the given key, replacing any existing entry.
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            # create entry in a temporary directory and move it atomically
+            tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry_dir))
+            try:
+                shutil.copyfile(log_file, os.path.join(tmp_dir, _LOG_FILE))
+                entry = {"values": encode_values(values), "status": status}
+                with open(os.path.join(tmp_dir, _RESULT_FILE), "wt") as f:
+                    json.dump(entry, f)
+                if os.path.isdir(entry_dir):
+                    shutil.rmtree(entry_dir)
+                os.rename(tmp_dir, entry_dir)
+            finally:
+                if os.path.isdir(tmp_dir):
+                    shutil.rmtree(tmp_dir)
+        except OSError as e:
+            logging.warning("Could not store result in result cache: %s", e)
+
+    def evict(self):
+        """
+        Remove entries that were not used for longer than the maximum age,
+        and the least recently used entries while the cache is larger than its maximum size.
+        """
+        entries = []  # tuples of last usage, size, and directory
+        for prefix_dir in os.scandir(self.directory):
+            if not prefix_dir.is_dir():
+                continue
+            for entry in os.scandir(prefix_dir.path):
+                try:
+                    last_used = os.stat(os.path.join(entry.path, _RESULT_FILE)).st_mtime
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                except OSError:
+                    # incomplete entry, possibly still being written
+                    continue
+                entries.append((last_used, size, entry.path))
+        entries.sort()
+
+        now = time.time()
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for last_used, size, entry_dir in entries:
+            too_old = self.max_age is not None and now - last_used > self.max_age
+            too_large = self.max_size is not None and total_size > self.max_size
+            if not too_old and not too_large:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            removed += 1
+        if removed:
+            logging.debug(
+                "Removed %d entries from result cache, it now has %d entries "
+                "with %d bytes.",
+                removed,
+                len(entries) - removed,
+                total_size,
+            )
+
+
+def _update_with_values(h, value):
+    # The separator prevents that different values produce the same input.
+    h.update(repr(value).encode())
+    h.update(b"\0")
+
+
+def _update_with_file(h, path):
+    """Hash the name and the content of a file, or of all files in a directory."""
+    if os.path.isdir(path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                _update_with_file(h, os.path.join(dirpath, filename))
+        return
+    _update_with_values(h, path)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    except OSError as e:
+        raise BenchExecException(f"Could not hash file {path} for result cache: {e}")
+    h.update(b"\0")
+
+
+def encode_values(values):
+    """
+    Convert a dict of result values as returned by RunExecutor.execute_run()
+    into a form that can be serialized as JSON.
+    """
+    values = dict(values)
+    exitcode = values.get("exitcode")
+    if exitcode is not None:
+        values["exitcode"] = exitcode.raw
+    if "starttime" in values:
+        values["starttime"] = values["starttime"].isoformat()
+    if "cpuenergy" in values:
+        values["cpuenergy"] = {
+            pkg: {domain: str(value) for domain, value in domains.items()}
+            for pkg, domains in values["cpuenergy"].items()
+        }
+    return values
+
+
+def decode_values(values):
+    """Restore a dict of result values that was converted by encode_values()."""
+    exitcode = values.get("exitcode")
+    if exitcode is not None:
+        values["exitcode"] = util.ProcessExitCode.from_raw(exitcode)
+    if "starttime" in values:
+        values["starttime"] = datetime.datetime.fromisoformat(values["starttime"])
+    if "cpuenergy" in values:
+        values["cpuenergy"] = {
+            int(pkg): {
+                domain: decimal.Decimal(value) for domain, value in domains.items()
+            }
+            for pkg, domains in values["cpuenergy"].items()
+        }
+    return values
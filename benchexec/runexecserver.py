@@ -0,0 +1,355 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module implements the server mode of runexec,
+in which a single long-lived process executes many runs
+that are requested as JSON objects.
+"""
+
+import decimal
+import json
+import logging
+import os
+import socket
+import threading
+
+from benchexec import intel_cpu_energy
+from benchexec.runexecutor import RunExecutorPool
+
+_RUN_ARGS = {
+    "output_filename",
+    "error_filename",
+    "write_header",
+    "hardtimelimit",
+    "softtimelimit",
+    "walltimelimit",
+    "memlimit",
+    "memory_nodes",
+    "environments",
+    "workingDir",
+    "maxLogfileSize",
+    "files_count_limit",
+    "files_size_limit",
+    "output_dir",
+    "result_files_patterns",
+}
+"""Keys of a request that are passed as arguments to RunExecutor.execute_run()."""
+
+_REQUEST_KEYS = _RUN_ARGS | {"id", "args", "input", "cores", "cpu_cores"}
+
+
+class RunExecServer(object):
+    """
+    Executes runs that are requested as JSON objects (one per line),
+    and writes the result of each run as a JSON object (one per line)
+    as soon as the run has finished.
+    Runs are executed concurrently on disjoint sets of CPU cores
+    with a pool of RunExecutor instances that are reused for later runs.
+    A request has the following keys:
+    - "args" (required): the command line of the run,
+    - "id": an arbitrary value that is copied to the response,
+    - "input": the name of a file that is used as stdin of the run,
+    - "cores": the list of CPU cores to use for the run,
+    - "cpu_cores": the number of CPU cores to use for the run
+      (they are chosen by the server, only if "cores" is not given),
+    - the parameters of RunExecutor.execute_run() in _RUN_ARGS.
+    Runs that request neither "cores" nor "cpu_cores" are executed exclusively.
+    A response has the keys "id" and either "result" or "error".
+    """
+
+    def __init__(self, create_executor, default_run_args={}, cores=None):
+        """
+        @param create_executor: a function that returns a new RunExecutor
+        @param default_run_args: arguments for execute_run()
+            that are used if a request does not specify them
+        @param cores: None or the list of CPU cores that runs may use
+            (default: all cores that are available to RunExecutor)
+        """
+        self._executor_pool = RunExecutorPool(create_executor)
+        self._default_run_args = default_run_args
+        self._run_threads = set()
+        self._run_threads_lock = threading.Lock()
+        self._finished = threading.Event()
+        self._stopped = False
+
+        executor = self._executor_pool.get()
+        self._executor_pool.put(executor)
+        self._allowed_cores = cores
+        self._cores = _CoreAllocator(cores or executor.cpus)
+
+    def serve_stream(self, input_stream, output_stream):
+        """
+        Execute the runs requested in the given input stream and
+        write the results to the given output stream.
+        Returns after the input stream was closed and all runs are finished,
+        or after stop() was called.
+        """
+        output_lock = threading.Lock()
+
+        def send(response):
+            with output_lock:
+                output_stream.write(response + "\n")
+                output_stream.flush()
+
+        def serve():
+            try:
+                self._serve_requests(input_stream, send)
+            finally:
+                self._finished.set()
+
+        threading.Thread(target=serve, name="runexec-server", daemon=True).start()
+        self._finished.wait()
+        self._wait_for_runs()
+
+    def serve_socket(self, path):
+        """
+        Listen on a Unix socket at the given path and execute the runs
+        requested on each connection, writing the results back to the connection.
+        Returns only after stop() was called.
+        """
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server_socket.bind(path)
+            server_socket.listen()
+            logging.info("Waiting for run requests on socket %s.", path)
+            threading.Thread(
+                target=self._accept_connections,
+                args=(server_socket,),
+                name="runexec-server",
+                daemon=True,
+            ).start()
+            self._finished.wait()
+            self._wait_for_runs()
+        finally:
+            server_socket.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _accept_connections(self, server_socket):
+        while True:
+            try:
+                connection, _ = server_socket.accept()
+            except OSError as e:
+                if not self._stopped:
+                    logging.error("Could not accept connection on socket: %s", e)
+                    self.stop()
+                return
+            threading.Thread(
+                target=self._serve_connection,
+                args=(connection,),
+                name="runexec-server-connection",
+                daemon=True,
+            ).start()
+
+    def _serve_connection(self, connection):
+        send_lock = threading.Lock()
+
+        def send(response):
+            with send_lock:
+                try:
+                    connection.sendall(response.encode() + b"\n")
+                except OSError as e:
+                    logging.warning("Could not send result to client: %s", e)
+
+        with connection, connection.makefile("r") as input_stream:
+            self._serve_requests(input_stream, send)
+
+    def _serve_requests(self, input_stream, send):
+        """Execute all requests from the input stream and wait for the runs."""
+        run_threads = []
+        for line in input_stream:
+            if self._stopped:
+                break
+            thread = self._start_run(line, send) if line.strip() else None
+            run_threads = [t for t in run_threads + [thread] if t and t.is_alive()]
+        for thread in run_threads:
+            thread.join()
+
+    def _start_run(self, line, send):
+        """
+        Parse a request and start executing it after the requested cores are free.
+        @return: the thread in which the run is executed, or None for invalid requests
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not a JSON object")
+            request_id = request.get("id")
+            run_args, cores, cores_count = self._parse_request(request)
+            reserved_cores = self._cores.acquire(cores, cores_count)
+        except (TypeError, ValueError) as e:
+            send(_format_response(request_id, error=f"Invalid request: {e}"))
+            return None
+
+        thread = threading.Thread(
+            target=self._execute_run,
+            args=(request_id, run_args, reserved_cores, send),
+            name=f"runexec-server-run-{request_id}",
+            daemon=True,
+        )
+        with self._run_threads_lock:
+            self._run_threads.add(thread)
+        thread.start()
+        return thread
+
+    def _parse_request(self, request):
+        unknown_keys = set(request) - _REQUEST_KEYS
+        if unknown_keys:
+            raise ValueError(f"unknown keys {', '.join(sorted(unknown_keys))}")
+        args = request.get("args")
+        if (
+            not isinstance(args, list)
+            or not args
+            or not all(isinstance(arg, str) for arg in args)
+        ):
+            raise ValueError('"args" needs to be a non-empty list of strings')
+        cores = request.get("cores")
+        if cores is not None and (
+            not isinstance(cores, list) or not all(_is_int(core) for core in cores)
+        ):
+            raise ValueError('"cores" needs to be a list of integers')
+        cores_count = request.get("cpu_cores")
+        if cores_count is not None and not _is_int(cores_count):
+            raise ValueError('"cpu_cores" needs to be an integer')
+        if cores is not None and cores_count is not None:
+            raise ValueError('"cores" and "cpu_cores" cannot be used together')
+
+        run_args = dict(self._default_run_args)
+        run_args.update((key, request[key]) for key in _RUN_ARGS & request.keys())
+        run_args["args"] = args
+        run_args["stdin"] = request.get("input")
+        return run_args, cores, cores_count
+
+    def _execute_run(self, request_id, run_args, reserved_cores, send):
+        executor = self._executor_pool.get()
+        stdin = None
+        try:
+            if reserved_cores is not None:
+                run_args["cores"] = sorted(reserved_cores)
+            elif self._allowed_cores:
+                run_args["cores"] = self._allowed_cores
+            if run_args["stdin"] is not None:
+                stdin = open(run_args["stdin"], "rt")
+            run_args["stdin"] = stdin
+            result = executor.execute_run(**run_args)
+            response = _format_response(request_id, result=result)
+        except SystemExit as e:
+            # RunExecutor.execute_run() calls sys.exit() for invalid arguments
+            response = _format_response(request_id, error=str(e))
+        except Exception as e:
+            logging.debug("Execution of run %s failed.", request_id, exc_info=True)
+            response = _format_response(request_id, error=str(e))
+        finally:
+            if stdin:
+                stdin.close()
+            self._executor_pool.put(executor)
+            self._cores.release(reserved_cores)
+        send(response)
+        with self._run_threads_lock:
+            self._run_threads.discard(threading.current_thread())
+
+    def _wait_for_runs(self):
+        with self._run_threads_lock:
+            run_threads = list(self._run_threads)
+        for thread in run_threads:
+            thread.join()
+
+    def stop(self):
+        """Kill all currently executing runs and stop accepting new requests."""
+        self._stopped = True
+        self._executor_pool.stop()
+        self._finished.set()
+
+
+class _CoreAllocator(object):
+    """Reserves disjoint sets of CPU cores for runs that are executed concurrently."""
+
+    def __init__(self, cores):
+        """
+        @param cores: None or the list of all CPU cores that may be reserved
+        """
+        self._all_cores = frozenset(cores or [])
+        self._free_cores = set(self._all_cores)
+        self._exclusive = False
+        self._condition = threading.Condition()
+
+    def acquire(self, cores=None, count=None):
+        """
+        Wait until the requested cores are free and reserve them.
+        If neither cores nor count are given, all cores are reserved.
+        @param cores: None or the list of cores to reserve
+        @param count: None or the number of cores to reserve
+        @return: the set of reserved cores, or None if all cores were reserved
+        """
+        with self._condition:
+            if cores is not None:
+                cores = set(cores)
+                if not cores or not cores <= self._all_cores:
+                    raise ValueError(f"cores {sorted(cores)} cannot be used")
+                self._condition.wait_for(
+                    lambda: not self._exclusive and cores <= self._free_cores
+                )
+            elif count is not None:
+                if not _is_int(count) or not 0 < count <= len(self._all_cores):
+                    raise ValueError(f"cannot reserve {count} cores")
+                self._condition.wait_for(
+                    lambda: not self._exclusive and len(self._free_cores) >= count
+                )
+                cores = set(sorted(self._free_cores)[:count])
+            else:
+                self._condition.wait_for(
+                    lambda: not self._exclusive and self._free_cores == self._all_cores
+                )
+                self._exclusive = True
+                return None
+            self._free_cores -= cores
+            return cores
+
+    def release(self, cores):
+        """Release cores that were reserved by acquire()."""
+        with self._condition:
+            if cores is None:
+                self._exclusive = False
+            else:
+                self._free_cores |= cores
+            self._condition.notify_all()
+
+
+def _is_int(value):
+    # bool is a subclass of int, but JSON's true and false are not valid numbers
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _format_response(request_id, result=None, error=None):
+    """Return the response for a request as a line of JSON."""
+    response = {"id": request_id}
+    if error is not None:
+        response["error"] = error
+    else:
+        result = dict(result)
+        exit_code = result.pop("exitcode", None)
+        if exit_code is not None and exit_code.value is not None:
+            result["returnvalue"] = exit_code.value
+        if exit_code is not None and exit_code.signal is not None:
+            result["exitsignal"] = exit_code.signal
+        if "starttime" in result:
+            result["starttime"] = result["starttime"].isoformat()
+        result.update(
+            intel_cpu_energy.format_energy_results(result.pop("cpuenergy", None))
+        )
+        response["result"] = result
+    return json.dumps(response, default=_to_json)
+
+
+def _to_json(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f"Value {value!r} cannot be converted to JSON")
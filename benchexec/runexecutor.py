@@ -7,28 +7,39 @@
 
 import argparse
 import collections
+import contextlib
 import datetime
-import errno
 import logging
-import multiprocessing
 import os
+import queue
+import select
 import signal
 import subprocess
 import sys
 import threading
 import time
-import tempfile
 from typing import cast, Optional
 
 from benchexec import __version__
 from benchexec import baseexecutor
 from benchexec import BenchExecException
 from benchexec import containerexecutor
-from benchexec.cgroups import BLKIO, CPUACCT, CPUSET, FREEZER, MEMORY, find_my_cgroups
+from benchexec.cgroups import (
+    BLKIO,
+    CGROUPS_V1,
+    CPUACCT,
+    CPUSET,
+    FREEZER,
+    MEMORY,
+    PERF_EVENT,
+    find_my_cgroups,
+)
 from benchexec.filehierarchylimit import FileHierarchyLimitThread
 from benchexec import intel_cpu_energy
 from benchexec import oomhandler
+from benchexec import perfevents
 from benchexec import resources
+from benchexec import supervisor
 from benchexec import systeminfo
 from benchexec import util
 
@@ -37,6 +48,8 @@ sys.dont_write_bytecode = True  # prevent creation of .pyc files
 _WALLTIME_LIMIT_DEFAULT_OVERHEAD = 30  # seconds more than cputime limit
 _BYTE_FACTOR = 1000  # byte in kilobyte
 _LOG_SHRINK_MARKER = "\n\n\nWARNING: YOUR LOGFILE WAS TOO LONG, SOME LINES IN THE MIDDLE WERE REMOVED.\n\n\n\n"
+_LOG_STREAM_SHRINK_MARKER = "\n\n\nWARNING: YOUR LOGFILE WAS TOO LONG, SOME LINES IN THE MIDDLE WERE REMOVED.\n({} bytes were removed)\n\n\n\n"
+_LOG_SHRINK_TOLERANCE = 500  # bytes by which output may exceed limit without shrinking
 
 
 def main(argv=None):
@@ -112,6 +125,12 @@ def main(argv=None):
         help="shrink output file to approximately this size if necessary "
         "(by removing lines from the middle of the output)",
     )
+    io_args.add_argument(
+        "--stream-output",
+        action="store_true",
+        help="pass output of command through a pipe and write only what is kept "
+        "according to --maxOutputSize, instead of shrinking the output file afterwards",
+    )
     io_args.add_argument(
         "--filesCountLimit",
         type=int,
@@ -172,13 +191,65 @@ def main(argv=None):
         metavar="DIR",
         help="working directory for executing the command (default is current directory)",
     )
+    environment_args.add_argument(
+        "--measure-overhead",
+        action="store_true",
+        help="report the time that runexec spends before and after executing "
+        "the command, split by phase",
+    )
+    environment_args.add_argument(
+        "--perf-events",
+        dest="measure_perf_events",
+        action="store_true",
+        help="count performance events of the command with perf_event_open "
+        "(e.g., executed instructions, cache misses, and page faults)",
+    )
+    environment_args.add_argument(
+        "--health-sample-interval",
+        type=float,
+        metavar="SECONDS",
+        help="time between two checks of the system health "
+        "(e.g., for thermal throttling and swapping, default: 1s)",
+    )
 
-    baseexecutor.add_basic_executor_options(parser)
+    server_args = parser.add_argument_group("optional arguments for server mode")
+    server_args.add_argument(
+        "--server",
+        action="store_true",
+        help="instead of executing a single command, read run requests as JSON "
+        "objects from stdin (one per line), execute them concurrently on disjoint "
+        "cores, and write their results as JSON objects to stdout (one per line). "
+        "The other options are used as defaults for all runs.",
+    )
+    server_args.add_argument(
+        "--server-socket",
+        metavar="PATH",
+        help="like --server, but read requests from and write results to "
+        "connections on a Unix socket that is created at PATH",
+    )
+
+    baseexecutor.add_basic_executor_options(parser, args_required=False)
 
     options = parser.parse_args(argv[1:])
     baseexecutor.handle_basic_executor_options(options, parser)
     logging.debug("This is runexec %s.", __version__)
 
+    server_mode = options.server or options.server_socket
+    if server_mode:
+        if options.args:
+            parser.error("A command line cannot be given in server mode.")
+        if options.input:
+            parser.error(
+                "--input cannot be used in server mode, specify it for each run."
+            )
+    elif not options.args:
+        parser.error("the following arguments are required: ARG")
+    if (
+        options.health_sample_interval is not None
+        and options.health_sample_interval <= 0
+    ):
+        parser.error("--health-sample-interval needs to be positive.")
+
     if options.container:
         container_options = containerexecutor.handle_basic_container_args(
             options, parser
@@ -224,12 +295,23 @@ def main(argv=None):
         cgroup_values[(subsystem, option)] = value
         cgroup_subsystems.add(subsystem)
 
-    executor = RunExecutor(
-        cleanup_temp_dir=options.cleanup,
-        additional_cgroup_subsystems=list(cgroup_subsystems),
-        use_namespaces=options.container,
-        **container_options,
-    )
+    def create_executor():
+        return RunExecutor(
+            cleanup_temp_dir=options.cleanup,
+            additional_cgroup_subsystems=list(cgroup_subsystems),
+            measure_overhead=options.measure_overhead,
+            stream_output=options.stream_output,
+            measure_perf_events=options.measure_perf_events,
+            health_sample_interval=options.health_sample_interval,
+            use_namespaces=options.container,
+            **container_options,
+        )
+
+    if server_mode:
+        _run_server(create_executor, options, cgroup_values, container_output_options)
+        return
+
+    executor = create_executor()
 
     # Ensure that process gets killed on interrupt/kill signal,
     # and avoid KeyboardInterrupt because it could occur anywhere.
@@ -296,30 +378,114 @@ def main(argv=None):
     print_optional_result("memory", "B")
     print_optional_result("blkio-read", "B")
     print_optional_result("blkio-write", "B")
+    print_optional_result("cpu-throttled")
+    print_optional_result("swapped")
+    print_optional_result("cpufreq-avg", "Hz")
+    for key in result.keys():
+        if key.startswith("overhead-"):
+            print(f"{key}={result[key]:.6f}s")
+    for key in sorted(result.keys()):
+        if key == "perf-task-clock":
+            print(f"{key}={result[key]:.9f}s")
+        elif key.startswith("perf-"):
+            print(f"{key}={result[key]}")
     energy = intel_cpu_energy.format_energy_results(result.get("cpuenergy"))
     for energy_key, energy_value in energy.items():
         print(f"{energy_key}={energy_value}J")
 
 
+def _run_server(create_executor, options, cgroup_values, container_output_options):
+    """Execute runs requested on stdin or a socket until stopped (runexec --server)."""
+    from benchexec import runexecserver
+
+    server = runexecserver.RunExecServer(
+        create_executor,
+        default_run_args=dict(
+            output_filename=options.output,
+            hardtimelimit=options.timelimit,
+            softtimelimit=options.softtimelimit,
+            walltimelimit=options.walltimelimit,
+            memlimit=options.memlimit,
+            memory_nodes=options.memoryNodes,
+            cgroupValues=cgroup_values,
+            workingDir=options.dir,
+            maxLogfileSize=options.maxOutputSize,
+            files_count_limit=options.filesCountLimit,
+            files_size_limit=options.filesSizeLimit,
+            **container_output_options,
+        ),
+        cores=options.cores,
+    )
+
+    def signal_handler_stop(signum, frame):
+        server.stop()
+
+    signal.signal(signal.SIGTERM, signal_handler_stop)
+    signal.signal(signal.SIGQUIT, signal_handler_stop)
+    signal.signal(signal.SIGINT, signal_handler_stop)
+
+    if not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED and options.container:
+        logging.debug(
+            "Using sys.setswitchinterval() workaround for #435 in container "
+            "mode because native callback is not available."
+        )
+        sys.setswitchinterval(1000)
+
+    if options.server_socket:
+        server.serve_socket(options.server_socket)
+    else:
+        server.serve_stream(sys.stdin, sys.stdout)
+
+
 class RunExecutor(containerexecutor.ContainerExecutor):
     # --- object initialization ---
 
     def __init__(
-        self, cleanup_temp_dir=True, additional_cgroup_subsystems=[], *args, **kwargs
+        self,
+        cleanup_temp_dir=True,
+        additional_cgroup_subsystems=[],
+        measure_overhead=False,
+        stream_output=False,
+        measure_perf_events=False,
+        health_sample_interval=None,
+        *args,
+        **kwargs,
     ):
         """
         Create an instance of of RunExecutor.
         @param cleanup_temp_dir Whether to remove the temporary directories created for the run.
         @param additional_cgroup_subsystems List of additional cgroup subsystems that should be required and used for runs.
+        @param measure_overhead Whether to add the durations of the phases of each run that are overhead of RunExecutor to the result as "overhead-<phase>".
+        @param stream_output Whether to pass the output of the tool through a pipe and write only the parts that are kept according to maxLogfileSize, instead of writing everything and shrinking the output file after the run.
+        @param measure_perf_events Whether to count performance events of each run (like executed instructions) and add them to the result as "perf-<event>".
+        @param health_sample_interval None or the number of seconds between two samples of the system health (like thermal throttling), which is shared by all instances in this process.
         """
         super(RunExecutor, self).__init__(*args, **kwargs)
+        # for creating further instances in execute_runs()
+        self._init_args = (
+            cleanup_temp_dir,
+            additional_cgroup_subsystems,
+            measure_overhead,
+            stream_output,
+            measure_perf_events,
+            health_sample_interval,
+            *args,
+        )
+        self._init_kwargs = kwargs
+        self._executor_pool = None
         self._termination_reason = None
         self._should_cleanup_temp_dir = cleanup_temp_dir
         self._cgroup_subsystems = additional_cgroup_subsystems
+        self._measure_overhead = measure_overhead
+        self._stream_output = stream_output
+        self._measure_perf_events = measure_perf_events
 
         self._energy_measurement = (
             intel_cpu_energy.EnergyMeasurement.create_if_supported()
         )
+        self._system_health_monitor = systeminfo.get_system_health_monitor(
+            health_sample_interval
+        )
 
         self._init_cgroups()
 
@@ -360,9 +526,7 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         if MEMORY not in self.cgroups:
             logging.warning("Cannot measure memory consumption without memory cgroup.")
         else:
-            if systeminfo.has_swap() and (
-                not self.cgroups.has_value(MEMORY, "memsw.max_usage_in_bytes")
-            ):
+            if systeminfo.has_swap() and not self.cgroups.can_account_swap():
                 logging.warning(
                     "Kernel misses feature for accounting swap memory, but machine has swap. "
                     "Memory usage may be measured inaccurately. "
@@ -370,6 +534,18 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                     '"sudo swapoff -a".'
                 )
 
+        self._perf_events = []
+        if self._measure_perf_events:
+            self.cgroups.require_subsystem(PERF_EVENT)
+            if PERF_EVENT in self.cgroups:
+                self._perf_events = perfevents.find_supported_events(
+                    self.cgroups[PERF_EVENT]
+                )
+            else:
+                logging.warning(
+                    "Cannot measure performance counters without perf_event cgroup."
+                )
+
         self.cgroups.require_subsystem(CPUSET)
         self.cpus = None  # to indicate that we cannot limit cores
         self.memory_nodes = None  # to indicate that we cannot limit cores
@@ -382,9 +558,7 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             logging.debug("List of available CPU cores is %s.", self.cpus)
 
             try:
-                self.memory_nodes = util.parse_int_list(
-                    self.cgroups.get_value(CPUSET, "mems")
-                )
+                self.memory_nodes = self.cgroups.read_allowed_memory_banks()
             except ValueError as e:
                 logging.warning(
                     "Could not read available memory nodes from kernel: %s", str(e)
@@ -415,6 +589,8 @@ class RunExecutor(containerexecutor.ContainerExecutor):
 
         # Setup cgroups, need a single call to create_cgroup() for all subsystems
         subsystems = [BLKIO, CPUACCT, FREEZER, MEMORY] + self._cgroup_subsystems
+        if self._perf_events:
+            subsystems.append(PERF_EVENT)
         if my_cpus is not None or memory_nodes is not None:
             subsystems.append(CPUSET)
         subsystems = [s for s in subsystems if s in self.cgroups]
@@ -455,40 +631,12 @@ class RunExecutor(containerexecutor.ContainerExecutor):
 
         # Setup memory limit
         if memlimit is not None:
-            limit = "limit_in_bytes"
-            cgroups.set_value(MEMORY, limit, memlimit)
-
-            swap_limit = "memsw.limit_in_bytes"
-            # We need swap limit because otherwise the kernel just starts swapping
-            # out our process if the limit is reached.
-            # Some kernels might not have this feature,
-            # which is ok if there is actually no swap.
-            if not cgroups.has_value(MEMORY, swap_limit):
-                if systeminfo.has_swap():
-                    sys.exit(
-                        'Kernel misses feature for accounting swap memory, but machine has swap. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
-                    )
-            else:
-                try:
-                    cgroups.set_value(MEMORY, swap_limit, memlimit)
-                except OSError as e:
-                    if e.errno == errno.ENOTSUP:
-                        # kernel responds with operation unsupported if this is disabled
-                        sys.exit(
-                            'Memory limit specified, but kernel does not allow limiting swap memory. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
-                        )
-                    raise e
-
-            memlimit = cgroups.get_value(MEMORY, limit)
+            memlimit = cgroups.set_memory_limit(memlimit)
             logging.debug("Effective memory limit is %s bytes.", memlimit)
 
         if MEMORY in cgroups:
             try:
-                # Note that this disables swapping completely according to
-                # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
-                # (unlike setting the global swappiness to 0).
-                # Our process might get killed because of this.
-                cgroups.set_value(MEMORY, "swappiness", "0")
+                cgroups.disable_swap()
             except OSError as e:
                 logging.warning(
                     "Could not disable swapping for benchmarked process: %s", e
@@ -550,9 +698,17 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         return output_file
 
     def _setup_cgroup_time_limit(
-        self, hardtimelimit, softtimelimit, walltimelimit, cgroups, cores, pid_to_kill
+        self,
+        hardtimelimit,
+        softtimelimit,
+        walltimelimit,
+        cgroups,
+        cores,
+        pid_to_kill,
+        supervised_run=None,
     ):
         """Start time-limit handler.
+        @param supervised_run: None or the SupervisedRun that should enforce the limit
         @return None or the time-limit handler for calling cancel()
         """
         if any([hardtimelimit, softtimelimit, walltimelimit]):
@@ -566,21 +722,32 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 cores=cores,
                 callbackFn=self._set_termination_reason,
             )
+            if supervised_run:
+                supervised_run.add_time_limit(timelimitThread)
+                return None
             timelimitThread.start()
             return timelimitThread
         return None
 
-    def _setup_cgroup_memory_limit(self, memlimit, cgroups, pid_to_kill):
+    def _setup_cgroup_memory_limit(
+        self, memlimit, cgroups, pid_to_kill, supervised_run=None
+    ):
         """Start memory-limit handler.
+        @param supervised_run: None or the SupervisedRun that should enforce the limit
         @return None or the memory-limit handler for calling cancel()
         """
-        if memlimit is not None:
+        # With cgroups v2, the kernel kills all processes of the run on OOM,
+        # and _get_cgroup_measurements() checks whether this happened.
+        if memlimit is not None and cgroups.version == CGROUPS_V1:
             try:
                 oomThread = oomhandler.KillProcessOnOomThread(
                     cgroups=cgroups,
                     pid_to_kill=pid_to_kill,
                     callbackFn=self._set_termination_reason,
                 )
+                if supervised_run:
+                    supervised_run.add_event_handler(oomThread)
+                    return None
                 oomThread.start()
                 return oomThread
             except OSError as e:
@@ -594,7 +761,11 @@ class RunExecutor(containerexecutor.ContainerExecutor):
     def _setup_file_hierarchy_limit(
         self, files_count_limit, files_size_limit, temp_dir, cgroups, pid_to_kill
     ):
-        """Start thread that enforces any file-hiearchy limits."""
+        """
+        Start thread that enforces any file-hiearchy limits.
+        This is not done by the RunSupervisor because scanning the file hierarchy
+        can take a long time, which would delay the supervision of all other runs.
+        """
         if files_count_limit is not None or files_size_limit is not None:
             file_hierarchy_limit_thread = FileHierarchyLimitThread(
                 self._get_result_files_base(temp_dir),
@@ -753,6 +924,10 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             if files_size_limit < 0:
                 sys.exit(f"Invalid files-size limit {files_size_limit}.")
 
+        if walltimelimit is not None:
+            # such that the system health is known for the whole run
+            self._system_health_monitor.keep_history(walltimelimit)
+
         try:
             return self._execute(
                 args,
@@ -790,6 +965,143 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             logging.debug("Source of this OSError is:", exc_info=True)
             return {"terminationreason": "failed"}
 
+    def execute_runs(
+        self,
+        runs,
+        cpu_cores_per_run=None,
+        parallel_runs=1,
+        memlimit=None,
+        use_hyperthreading=True,
+        cores=None,
+    ):
+        """
+        Start executing a batch of runs in parallel and return immediately.
+        The available CPU cores are split among the parallel runs
+        like benchexec does it (with resources.get_cpu_cores_per_run()
+        and resources.get_memory_banks_per_run()).
+        Each of the parallel_runs worker threads uses its own RunExecutor instance
+        (with the same parameters as this instance) and its own cores
+        and starts the next run as soon as the previous run has finished.
+        This instance must not be used for other runs until all runs are finished,
+        but stop() kills all runs of the batch.
+        @param runs: an iterable of dicts with the keyword arguments for execute_run()
+            for each run, except for cores and memory_nodes
+        @param cpu_cores_per_run: None or the number of CPU cores for each run
+            (if None, all runs may use all cores)
+        @param parallel_runs: the number of runs that are executed in parallel
+        @param memlimit: None or the memory limit in bytes for each run
+            (runs may override it with a smaller limit)
+        @param use_hyperthreading: whether runs may use sibling cores of hyper-threading
+        @param cores: None or the list of CPU cores that runs may use (default: all)
+        @return: a list of concurrent.futures.Future instances (in the same order as
+            the given runs) that provide the results of execute_run()
+        """
+        import concurrent.futures
+
+        runs = list(runs)
+        for run in runs:
+            if "cores" in run or "memory_nodes" in run:
+                raise ValueError(
+                    "Runs executed with execute_runs() cannot specify cores "
+                    "or memory nodes, these are assigned automatically."
+                )
+
+        if cpu_cores_per_run is not None:
+            core_assignment = resources.get_cpu_cores_per_run(
+                cpu_cores_per_run,
+                parallel_runs,
+                use_hyperthreading,
+                self.cgroups,
+                cores,
+            )
+            memory_assignment = resources.get_memory_banks_per_run(
+                core_assignment, self.cgroups
+            )
+        else:
+            core_assignment = [cores] * parallel_runs
+            memory_assignment = None
+        if memlimit is not None:
+            resources.check_memory_size(
+                memlimit, parallel_runs, memory_assignment, self.cgroups
+            )
+
+        pending_runs = queue.SimpleQueue()
+        futures = []
+        for run in runs:
+            future = concurrent.futures.Future()
+            pending_runs.put((future, run))
+            futures.append(future)
+
+        if self._executor_pool is None or self._executor_pool.stopped:
+            # the executors of a stopped pool would not execute runs anymore
+            self._executor_pool = RunExecutorPool(
+                lambda: RunExecutor(*self._init_args, **self._init_kwargs)
+            )
+        executor_pool = self._executor_pool
+        worker_count = min(parallel_runs, len(futures))
+        running_workers = [worker_count]
+        running_workers_lock = threading.Lock()
+
+        # cf. localexecution.execute_benchmark()
+        use_switch_interval_workaround = (
+            self._use_namespaces
+            and worker_count > 1
+            and not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED
+        )
+        if use_switch_interval_workaround:
+            logging.debug(
+                "Using sys.setswitchinterval() workaround for #435 in container "
+                "mode because native callback is not available."
+            )
+            py_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(1000)
+
+        def worker_finished():
+            with running_workers_lock:
+                running_workers[0] -= 1
+                if running_workers[0] == 0 and use_switch_interval_workaround:
+                    sys.setswitchinterval(py_switch_interval)
+
+        def execute_pending_runs(executor, cores_of_worker, memory_nodes_of_worker):
+            try:
+                while True:
+                    try:
+                        future, run = pending_runs.get_nowait()
+                    except queue.Empty:
+                        return
+                    if executor_pool.stopped:
+                        future.cancel()  # stop() was called, do not start more runs
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    run_args = {"memlimit": memlimit}
+                    run_args.update(run)
+                    try:
+                        result = executor.execute_run(
+                            cores=cores_of_worker,
+                            memory_nodes=memory_nodes_of_worker,
+                            **run_args,
+                        )
+                    except BaseException as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+            finally:
+                executor_pool.put(executor)
+                worker_finished()
+
+        for i in range(worker_count):
+            threading.Thread(
+                target=execute_pending_runs,
+                args=(
+                    executor_pool.get(),
+                    core_assignment[i],
+                    memory_assignment[i] if memory_assignment else None,
+                ),
+                name=f"RunExecutor-batch-{i}",
+                daemon=True,
+            ).start()
+        return futures
+
     def _execute(
         self,
         args,
@@ -815,9 +1127,13 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         This method executes the command line and waits for the termination of it,
         handling all setup and cleanup, but does not check whether arguments are valid.
         """
+        overhead = _OverheadTimer()
+        supervised_run = None
         timelimitThread = None
         oomThread = None
         file_hierarchy_limit_thread = None
+        perf_event_measurement = None
+        output_writers = []
 
         if self._energy_measurement is not None:
             # Calculate which packages we should use for energy measurements
@@ -844,6 +1160,7 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 self._energy_measurement.start()
             starttime = util.read_local_time()
             walltime_before = time.monotonic()
+            overhead.stop("container-setup")
             return starttime, walltime_before
 
         def postParent(preParent_result, exit_code, base_path):
@@ -862,11 +1179,14 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             # But if we do not have freezer, it is safer to just let all processes run
             # until the container is killed.
             if FREEZER in cgroups:
-                cgroups.kill_all_tasks()
+                with overhead.measure("kill-tasks"):
+                    cgroups.kill_all_tasks()
 
             # For a similar reason, we cancel all limits. Otherwise a run could have
             # terminationreason=walltime because copying output files took a long time.
             # Can be removed if #433 gets implemented properly.
+            if supervised_run:
+                supervised_run.cancel()
             if timelimitThread:
                 timelimitThread.cancel()
             if oomThread:
@@ -874,18 +1194,21 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             if file_hierarchy_limit_thread:
                 file_hierarchy_limit_thread.cancel()
 
+            # The output file is complete only after the output writers are finished.
+            for output_writer in output_writers:
+                output_writer.finish()
+
             if exit_code.value not in [0, 1]:
                 _get_debug_output_after_crash(output_filename, base_path)
 
-            return starttime, walltime, energy
-
-        def preSubprocess():
-            """Setup that is executed in the forked process before the actual tool is started."""
-            os.setpgrp()  # make subprocess to group-leader
+            overhead.start("output-transfer")
+            return starttime, walltime_before, walltime, energy
 
         # preparations that are not time critical
-        cgroups = self._setup_cgroups(cores, memlimit, memory_nodes, cgroup_values)
-        temp_dir = tempfile.mkdtemp(prefix="BenchExec_run_")
+        with overhead.measure("cgroup-setup"):
+            cgroups = self._setup_cgroups(cores, memlimit, memory_nodes, cgroup_values)
+        with overhead.measure("tempdir-setup"):
+            temp_dir = self._create_temp_dir()
         run_environment = self._setup_environment(environments)
         outputFile = self._setup_output_file(
             output_filename, args, write_header=write_header
@@ -897,23 +1220,38 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 error_filename, args, write_header=write_header
             )
 
+        tool_stdout = outputFile
+        tool_stderr = errorFile
+        if self._stream_output and max_output_size is not None and max_output_size >= 0:
+            output_writers.append(_BoundedOutputWriter(outputFile, max_output_size))
+            tool_stdout = tool_stderr = output_writers[0].pipe_for_writing
+            if errorFile is not outputFile:
+                output_writers.append(_BoundedOutputWriter(errorFile, max_output_size))
+                tool_stderr = output_writers[1].pipe_for_writing
+
         pid = None
         returnvalue = 0
         ru_child = None
         self._termination_reason = None
         result = collections.OrderedDict()
 
-        throttle_check = systeminfo.CPUThrottleCheck(cores)
-        swap_check = systeminfo.SwapCheck()
-
         logging.debug("Starting process.")
 
         try:
+            if PERF_EVENT in cgroups:
+                # The cgroup is still empty, so counting starts with the tool.
+                with overhead.measure("cgroup-setup"):
+                    perf_event_measurement = perfevents.PerfEventMeasurement(
+                        cgroups[PERF_EVENT], self._perf_events, cores or self.cpus
+                    )
+                    perf_event_measurement.start()
+
+            overhead.start("container-setup")
             pid, result_fn = self._start_execution(
                 args=args,
                 stdin=stdin,
-                stdout=outputFile,
-                stderr=errorFile,
+                stdout=tool_stdout,
+                stderr=tool_stderr,
                 env=run_environment,
                 cwd=workingDir,
                 temp_dir=temp_dir,
@@ -921,7 +1259,7 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 memory_nodes=memory_nodes,
                 cgroups=cgroups,
                 parent_setup_fn=preParent,
-                child_setup_fn=preSubprocess,
+                child_setup_fn=os.setpgrp,  # make subprocess to group-leader
                 parent_cleanup_fn=postParent,
                 **kwargs,
             )
@@ -929,16 +1267,37 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             with self.SUB_PROCESS_PIDS_LOCK:
                 self.SUB_PROCESS_PIDS.add(pid)
 
+            # Only the tool should keep the pipes open, such that the writers see EOF.
+            for output_writer in output_writers:
+                output_writer.close_pipe_for_writing()
+
+            run_supervisor = supervisor.RunSupervisor.get_instance()
+            if run_supervisor:
+                supervised_run = run_supervisor.supervise(pid)
+
             timelimitThread = self._setup_cgroup_time_limit(
-                hardtimelimit, softtimelimit, walltimelimit, cgroups, cores, pid
+                hardtimelimit,
+                softtimelimit,
+                walltimelimit,
+                cgroups,
+                cores,
+                pid,
+                supervised_run,
+            )
+            oomThread = self._setup_cgroup_memory_limit(
+                memlimit, cgroups, pid, supervised_run
             )
-            oomThread = self._setup_cgroup_memory_limit(memlimit, cgroups, pid)
             file_hierarchy_limit_thread = self._setup_file_hierarchy_limit(
                 files_count_limit, files_size_limit, temp_dir, cgroups, pid
             )
 
             # wait until process has terminated
-            returnvalue, ru_child, (starttime, walltime, energy) = result_fn()
+            (
+                returnvalue,
+                ru_child,
+                (starttime, walltime_before, walltime, energy),
+            ) = result_fn()
+            overhead.stop("output-transfer")
             if starttime:
                 result["starttime"] = starttime
             result["walltime"] = walltime
@@ -949,6 +1308,9 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             with self.SUB_PROCESS_PIDS_LOCK:
                 self.SUB_PROCESS_PIDS.discard(pid)
 
+            if supervised_run:
+                supervised_run.cancel()
+
             if timelimitThread:
                 timelimitThread.cancel()
 
@@ -960,7 +1322,11 @@ class RunExecutor(containerexecutor.ContainerExecutor):
 
             # Make sure to kill all processes if there are still some
             # (needs to come early to avoid accumulating more CPU time)
-            cgroups.kill_all_tasks()
+            with overhead.measure("kill-tasks"):
+                cgroups.kill_all_tasks()
+
+            for output_writer in output_writers:
+                output_writer.finish()
 
             # normally subprocess closes file, we do this again after all tasks terminated
             outputFile.close()
@@ -968,11 +1334,19 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 errorFile.close()
 
             # measurements are not relevant in case of failure, but need to come before cgroup cleanup
-            self._get_cgroup_measurements(cgroups, ru_child, result)
+            with overhead.measure("measurements"):
+                try:
+                    self._get_cgroup_measurements(cgroups, ru_child, result)
+                finally:
+                    # always stop to close the counters even if the above failed
+                    if perf_event_measurement:
+                        result.update(perf_event_measurement.stop())
             logging.debug("Cleaning up cgroups.")
-            cgroups.remove()
+            with overhead.measure("cgroup-cleanup"):
+                cgroups.remove()
 
-            self._cleanup_temp_dir(temp_dir)
+            with overhead.measure("tempdir-cleanup"):
+                self._cleanup_temp_dir(temp_dir)
 
             if timelimitThread:
                 _try_join_cancelled_thread(timelimitThread)
@@ -985,21 +1359,35 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 self._energy_measurement.stop()
 
         # cleanup steps that are only relevant in case of success
-        if throttle_check.has_throttled():
+        system_health = self._system_health_monitor.get_statistics(
+            walltime_before, walltime_before + walltime, cores
+        )
+        if system_health.pop("cpu-throttled", False):
             logging.warning(
                 "CPU throttled itself during benchmarking due to overheating. "
                 "Benchmark results are unreliable!"
             )
-        if swap_check.has_swapped():
+            result["cpu-throttled"] = True
+        if system_health.pop("swapped", False):
             logging.warning(
                 "System has swapped during benchmarking. "
                 "Benchmark results are unreliable!"
             )
+            result["swapped"] = True
+        result.update(system_health)
+
+        if output_writers:
+            for output_writer in output_writers:
+                if output_writer.removed_bytes:
+                    logging.warning(
+                        "Output of tool was too big, removed %s bytes from the middle.",
+                        output_writer.removed_bytes,
+                    )
+        else:
+            if error_filename is not None:
+                _reduce_file_size_if_necessary(error_filename, max_output_size)
 
-        if error_filename is not None:
-            _reduce_file_size_if_necessary(error_filename, max_output_size)
-
-        _reduce_file_size_if_necessary(output_filename, max_output_size)
+            _reduce_file_size_if_necessary(output_filename, max_output_size)
 
         result["exitcode"] = util.ProcessExitCode.from_raw(returnvalue)
         if energy:
@@ -1016,6 +1404,10 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             # does not always run even in case of OOM. We detect this there and report OOM.
             result["terminationreason"] = "memory"
 
+        if self._measure_overhead:
+            for phase, duration in overhead.durations.items():
+                result["overhead-" + phase] = duration
+
         return result
 
     def _get_cgroup_measurements(self, cgroups, ru_child, result):
@@ -1028,19 +1420,24 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         cputime_wait = ru_child.ru_utime + ru_child.ru_stime if ru_child else 0
         cputime_cgroups = None
         if CPUACCT in cgroups:
-            # We want to read the value from the cgroup.
-            # The documentation warns about outdated values.
-            # So we read twice with 0.1s time difference,
-            # and continue reading as long as the values differ.
-            # This has never happened except when interrupting the script with Ctrl+C,
-            # but just try to be on the safe side here.
-            tmp = cgroups.read_cputime()
-            tmp2 = None
-            while tmp != tmp2:
-                time.sleep(0.1)
-                tmp2 = tmp
+            if cgroups.is_empty():
+                # Without processes in the cgroup no CPU time can be accounted anymore,
+                # so the value is final (this is the usual case after kill_all_tasks).
+                cputime_cgroups = cgroups.read_cputime()
+            else:
+                # We want to read the value from the cgroup.
+                # The documentation warns about outdated values.
+                # So we read twice with 0.1s time difference,
+                # and continue reading as long as the values differ.
+                # This has never happened except when interrupting the script with
+                # Ctrl+C, but just try to be on the safe side here.
                 tmp = cgroups.read_cputime()
-            cputime_cgroups = tmp
+                tmp2 = None
+                while tmp != tmp2:
+                    time.sleep(0.1)
+                    tmp2 = tmp
+                    tmp = cgroups.read_cputime()
+                cputime_cgroups = tmp
 
             # Usually cputime_cgroups seems to be 0.01s greater than cputime_wait.
             # Furthermore, cputime_wait might miss some subprocesses,
@@ -1063,57 +1460,21 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             else:
                 result["cputime"] = cputime_cgroups
 
-            for core, coretime in enumerate(
-                cgroups.get_value(CPUACCT, "usage_percpu").split(" ")
-            ):
-                try:
-                    coretime = int(coretime)
-                    if coretime != 0:
-                        # convert nanoseconds to seconds
-                        result[f"cputime-cpu{core}"] = coretime / 1_000_000_000
-                except (OSError, ValueError) as e:
-                    logging.debug(
-                        "Could not read CPU time for core %s from kernel: %s", core, e
-                    )
+            for core, coretime in cgroups.read_usage_per_cpu().items():
+                result[f"cputime-cpu{core}"] = coretime
 
         if MEMORY in cgroups:
-            # This measurement reads the maximum number of bytes of RAM+Swap the process used.
-            # For more details, c.f. the kernel documentation:
-            # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
-            memUsageFile = "memsw.max_usage_in_bytes"
-            if not cgroups.has_value(MEMORY, memUsageFile):
-                memUsageFile = "max_usage_in_bytes"
-            if not cgroups.has_value(MEMORY, memUsageFile):
-                logging.warning("Memory-usage is not available due to missing files.")
-            else:
-                try:
-                    result["memory"] = int(cgroups.get_value(MEMORY, memUsageFile))
-                except OSError as e:
-                    if e.errno == errno.ENOTSUP:
-                        # kernel responds with operation unsupported if this is disabled
-                        logging.critical(
-                            "Kernel does not track swap memory usage, cannot measure memory usage."
-                            " Please set swapaccount=1 on your kernel command line."
-                        )
-                    else:
-                        raise e
+            memory_usage = cgroups.read_max_mem_usage()
+            if memory_usage is not None:
+                result["memory"] = memory_usage
+
+            if cgroups.read_oom_kill_count():
+                self._set_termination_reason("memory")
 
         if BLKIO in cgroups:
-            blkio_bytes_file = "throttle.io_service_bytes"
-            if cgroups.has_value(BLKIO, blkio_bytes_file):
-                bytes_read = 0
-                bytes_written = 0
-                for blkio_line in cgroups.get_file_lines(BLKIO, blkio_bytes_file):
-                    try:
-                        dev_no, io_type, bytes_amount = blkio_line.split(" ")
-                        if io_type == "Read":
-                            bytes_read += int(bytes_amount)
-                        elif io_type == "Write":
-                            bytes_written += int(bytes_amount)
-                    except ValueError:
-                        pass  # There are irrelevant lines in this file with a different structure
-                result["blkio-read"] = bytes_read
-                result["blkio-write"] = bytes_written
+            io_stat = cgroups.read_io_stat()
+            if io_stat is not None:
+                result["blkio-read"], result["blkio-write"] = io_stat
 
         logging.debug(
             "Resource usage of run: walltime=%s, cputime=%s, cgroup-cputime=%s, memory=%s",
@@ -1128,6 +1489,8 @@ class RunExecutor(containerexecutor.ContainerExecutor):
     def stop(self):
         self._set_termination_reason("killed")
         super(RunExecutor, self).stop()
+        if self._executor_pool:
+            self._executor_pool.stop()
 
 
 def _reduce_file_size_if_necessary(fileName, maxSize):
@@ -1144,7 +1507,7 @@ def _reduce_file_size_if_necessary(fileName, maxSize):
         )
         return  # disabled, nothing to do
 
-    if fileSize < (maxSize + 500):
+    if fileSize < (maxSize + _LOG_SHRINK_TOLERANCE):
         logging.debug(
             "Size of logfile '%s' is %s bytes, nothing to do.", fileName, fileSize
         )
@@ -1201,6 +1564,189 @@ def _get_debug_output_after_crash(output_filename, base_path):
         )
 
 
+class RunExecutorPool(object):
+    """
+    A pool of RunExecutor instances for executing runs concurrently,
+    such that instances are reused for later runs instead of creating new ones.
+    """
+
+    def __init__(self, create_executor):
+        """
+        @param create_executor: a function that returns a new RunExecutor
+        """
+        self._create_executor = create_executor
+        self._executors = []
+        self._idle_executors = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self.stopped = False
+
+    def get(self):
+        """Return an idle executor, which is created if necessary."""
+        try:
+            return self._idle_executors.get_nowait()
+        except queue.Empty:
+            executor = self._create_executor()
+            with self._lock:
+                self._executors.append(executor)
+                if self.stopped:
+                    executor.stop()
+            return executor
+
+    def put(self, executor):
+        """Return an executor from get() to the pool after its run has finished."""
+        self._idle_executors.put(executor)
+
+    def stop(self):
+        """Kill the runs of all executors of this pool, including those created later."""
+        with self._lock:
+            self.stopped = True
+            for executor in self._executors:
+                executor.stop()
+
+
+class _OverheadTimer(object):
+    """
+    Accumulates the durations of the phases of a run that are overhead of RunExecutor,
+    i.e., the time spent before and after the actual tool is executed.
+    """
+
+    def __init__(self):
+        self.durations = collections.OrderedDict()
+        self._start_times = {}
+
+    def start(self, phase):
+        self._start_times[phase] = time.monotonic()
+
+    def stop(self, phase):
+        """Stop measuring a phase, does nothing if the phase was not started."""
+        start_time = self._start_times.pop(phase, None)
+        if start_time is not None:
+            self.durations[phase] = (
+                self.durations.get(phase, 0) + time.monotonic() - start_time
+            )
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        self.start(phase)
+        try:
+            yield
+        finally:
+            self.stop(phase)
+
+
+class _BoundedOutputWriter(threading.Thread):
+    """
+    Copies the output of the tool from a pipe to the output file while the tool runs,
+    but writes only the first and the last max_size/2 bytes if there is too much
+    output, such that the output never takes up more space than this on disk.
+    This gives the same result as _reduce_file_size_if_necessary(), except that the
+    marker states how many bytes were removed.
+    """
+
+    _CHUNK_SIZE = 65536
+
+    def __init__(self, output_file, max_size):
+        super(_BoundedOutputWriter, self).__init__(name="output-writer")
+        self.daemon = True
+        self._output = output_file.buffer
+        self._max_size = max_size
+        self._head = bytearray()  # the output as long as it is small enough
+        self._tail = collections.deque()  # last chunks after _head was written
+        self._tail_size = 0
+        self.removed_bytes = 0
+        self._read_fd, self.pipe_for_writing = os.pipe()
+        self._stop_read_fd, self._stop_write_fd = os.pipe()
+        self._finished = False
+        self.start()
+
+    def close_pipe_for_writing(self):
+        """Close the write end of the pipe in this process (the tool keeps it open)."""
+        if self.pipe_for_writing is not None:
+            os.close(self.pipe_for_writing)
+            self.pipe_for_writing = None
+
+    def finish(self):
+        """
+        Write what the tool has written so far and stop copying, even if some
+        processes still have the pipe open. Can be called multiple times.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        self.close_pipe_for_writing()
+        os.write(self._stop_write_fd, b"S")
+        self.join()
+        os.close(self._stop_read_fd)
+        os.close(self._stop_write_fd)
+        self._output.flush()
+
+    def run(self):
+        try:
+            while True:
+                ready, _, _ = select.select([self._read_fd, self._stop_read_fd], [], [])
+                if self._read_fd not in ready:
+                    # stop requested, copy only what is already available
+                    os.set_blocking(self._read_fd, False)
+                    try:
+                        while self._add(os.read(self._read_fd, self._CHUNK_SIZE)):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    break
+                if not self._add(os.read(self._read_fd, self._CHUNK_SIZE)):
+                    break  # EOF
+            self._write_tail()
+        except OSError as e:
+            logging.warning("Could not write output of tool: %s", e)
+        finally:
+            os.close(self._read_fd)
+
+    def _add(self, data):
+        """Handle a chunk of output, return False on EOF."""
+        if not data:
+            return False
+        if self._head is not None:
+            self._head += data
+            if len(self._head) < self._max_size + _LOG_SHRINK_TOLERANCE:
+                return True
+            # Too much output, keep the first half (up to the last complete line)
+            # and continue with collecting the tail.
+            head_size = self._max_size // 2
+            line_end = self._head.rfind(b"\n", 0, head_size)
+            if line_end >= 0:
+                head_size = line_end + 1
+            self._output.write(self._head[:head_size])
+            data = bytes(self._head[head_size:])
+            self._head = None
+
+        self._tail.append(data)
+        self._tail_size += len(data)
+        # drop complete chunks that are not needed for the tail
+        while (
+            self._tail and self._tail_size - len(self._tail[0]) >= self._max_size // 2
+        ):
+            self._tail_size -= len(self._tail[0])
+            self.removed_bytes += len(self._tail.popleft())
+        return True
+
+    def _write_tail(self):
+        if self._head is not None:
+            # all output fits
+            self._output.write(self._head)
+            return
+
+        tail = b"".join(self._tail)
+        tail_start = len(tail) - self._max_size // 2
+        line_start = tail.find(b"\n", tail_start) + 1
+        if 0 < line_start < len(tail):
+            tail_start = line_start
+        self.removed_bytes += tail_start
+        self._output.write(
+            _LOG_STREAM_SHRINK_MARKER.format(self.removed_bytes).encode()
+        )
+        self._output.write(tail[tail_start:])
+
+
 def _try_join_cancelled_thread(thread):
     """Join a thread, but if the thread doesn't terminate for some time, ignore it
     instead of waiting infinitely."""
@@ -1239,6 +1785,8 @@ class _TimelimitThread(threading.Thread):
         if cores:
             self.cpuCount = len(cores)
         else:
+            import multiprocessing
+
             try:
                 self.cpuCount = multiprocessing.cpu_count()
             except NotImplementedError:
@@ -1262,48 +1810,60 @@ class _TimelimitThread(threading.Thread):
 
     def run(self):
         while not self.finished.is_set():
-            usedCpuTime = self.read_cputime() if CPUACCT in self.cgroups else 0
-            remainingCpuTime = self.timelimit - usedCpuTime
-            remainingSoftCpuTime = self.softtimelimit - usedCpuTime
-            remainingWallTime = self.latestKillTime - time.monotonic()
-            logging.debug(
-                "TimelimitThread for process %s: used CPU time: %s, remaining CPU time: %s, "
-                "remaining soft CPU time: %s, remaining wall time: %s.",
-                self.pid_to_kill,
-                usedCpuTime,
-                remainingCpuTime,
-                remainingSoftCpuTime,
-                remainingWallTime,
-            )
-            if remainingCpuTime <= 0:
-                self.callback("cputime")
-                logging.debug(
-                    "Killing process %s due to CPU time timeout.", self.pid_to_kill
-                )
-                util.kill_process(self.pid_to_kill)
-                self.finished.set()
+            remainingTime = self.check()
+            if remainingTime is None:
                 return
-            if remainingWallTime <= 0:
-                self.callback("walltime")
-                logging.warning(
-                    "Killing process %s due to wall time timeout.", self.pid_to_kill
-                )
-                util.kill_process(self.pid_to_kill)
-                self.finished.set()
-                return
-
-            if remainingSoftCpuTime <= 0:
-                self.callback("cputime-soft")
-                # soft time limit violated, ask process to terminate
-                util.kill_process(self.pid_to_kill, signal.SIGTERM)
-                self.softtimelimit = self.timelimit
+            self.finished.wait(remainingTime)
 
-            remainingTime = min(
-                remainingCpuTime / self.cpuCount,
-                remainingSoftCpuTime / self.cpuCount,
-                remainingWallTime,
+    def check(self):
+        """
+        Check the time limits once and kill the process if necessary.
+        This is also used by the RunSupervisor instead of running this thread.
+        @return the number of seconds after which the next check should happen,
+            or None if the process was killed
+        """
+        usedCpuTime = self.read_cputime() if CPUACCT in self.cgroups else 0
+        remainingCpuTime = self.timelimit - usedCpuTime
+        remainingSoftCpuTime = self.softtimelimit - usedCpuTime
+        remainingWallTime = self.latestKillTime - time.monotonic()
+        logging.debug(
+            "TimelimitThread for process %s: used CPU time: %s, remaining CPU time: %s, "
+            "remaining soft CPU time: %s, remaining wall time: %s.",
+            self.pid_to_kill,
+            usedCpuTime,
+            remainingCpuTime,
+            remainingSoftCpuTime,
+            remainingWallTime,
+        )
+        if remainingCpuTime <= 0:
+            self.callback("cputime")
+            logging.debug(
+                "Killing process %s due to CPU time timeout.", self.pid_to_kill
             )
-            self.finished.wait(remainingTime + 1)
+            util.kill_process(self.pid_to_kill)
+            self.finished.set()
+            return None
+        if remainingWallTime <= 0:
+            self.callback("walltime")
+            logging.warning(
+                "Killing process %s due to wall time timeout.", self.pid_to_kill
+            )
+            util.kill_process(self.pid_to_kill)
+            self.finished.set()
+            return None
+
+        if remainingSoftCpuTime <= 0:
+            self.callback("cputime-soft")
+            # soft time limit violated, ask process to terminate
+            util.kill_process(self.pid_to_kill, signal.SIGTERM)
+            self.softtimelimit = self.timelimit
+
+        remainingTime = min(
+            remainingCpuTime / self.cpuCount,
+            remainingSoftCpuTime / self.cpuCount,
+            remainingWallTime,
+        )
+        return remainingTime + 1
 
     def cancel(self):
         self.finished.set()
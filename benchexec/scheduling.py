@@ -0,0 +1,109 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains helpers for choosing the order in which runs are executed,
+based on the wall time of the same tasks in results of earlier executions.
+"""
+
+import collections
+import heapq
+import logging
+import os
+
+from benchexec import util
+
+
+class RuntimePredictor(object):
+    """
+    Predicts the wall time of runs from the wall time of the same tasks
+    in existing result files (as produced by benchexec).
+    Tasks are identified by their name and their properties.
+    If a task occurs several times, the mean of its wall times is used.
+    """
+
+    def __init__(self, result_files):
+        """
+        @param result_files: a list of names of result XML files (optionally compressed)
+        """
+        import statistics
+
+        walltimes = collections.defaultdict(list)
+        for result_file in result_files:
+            for run_xml in util.read_xml_file(result_file).findall("run"):
+                walltime = util.get_seconds_from_xml(run_xml, "walltime")
+                if walltime is not None:
+                    walltimes[_task_id_of_run_xml(run_xml, result_file)].append(
+                        walltime
+                    )
+        self.predictions = {
+            task_id: statistics.mean(values) for task_id, values in walltimes.items()
+        }
+        logging.debug(
+            "Loaded wall times of %d tasks from %d result files.",
+            len(self.predictions),
+            len(result_files),
+        )
+
+    def predict(self, run):
+        """
+        Return the predicted wall time of a run in seconds,
+        or None if the task of the run is unknown.
+        """
+        return self.predictions.get(_task_id_of_run(run))
+
+    def predict_walltimes(self, runs):
+        """
+        Return the list of predicted wall times for the given runs.
+        Runs with unknown tasks are assigned the mean of the known predictions.
+        """
+        import statistics
+
+        predictions = [self.predict(run) for run in runs]
+        known = [p for p in predictions if p is not None]
+        fallback = statistics.mean(known) if known else 0
+        return [fallback if p is None else p for p in predictions]
+
+
+def order_longest_first(runs, walltimes):
+    """
+    Sort the given runs by decreasing (predicted) wall time
+    (longest-processing-time-first scheduling).
+    The order of runs with the same wall time is kept.
+    @return: a tuple of the sorted list of runs and the list of their wall times
+    """
+    order = sorted(range(len(runs)), key=lambda i: walltimes[i], reverse=True)
+    return [runs[i] for i in order], [walltimes[i] for i in order]
+
+
+def predict_makespan(walltimes, workers):
+    """
+    Compute the makespan that results from executing jobs with the given wall times
+    in the given order by the given number of workers, assuming that each worker
+    takes the next job as soon as it is idle.
+    """
+    if workers < 1:
+        raise ValueError("Need at least one worker.")
+    finish_times = [0] * min(workers, len(walltimes))
+    heapq.heapify(finish_times)
+    for walltime in walltimes:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + walltime)
+    return max(finish_times, default=0)
+
+
+def _task_id_of_run_xml(run_xml, result_file):
+    name = run_xml.get("name")
+    if run_xml.get("files", "[]") != "[]":
+        # task name is a path relative to the result file
+        name = os.path.abspath(os.path.join(os.path.dirname(result_file), name))
+    return name, run_xml.get("properties", "")
+
+
+def _task_id_of_run(run):
+    name = os.path.abspath(run.identifier) if run.sourcefiles else run.identifier
+    properties = " ".join(sorted(prop.name for prop in run.properties))
+    return name, properties
@@ -0,0 +1,329 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains the support for splitting a benchmark into shards
+that are executed on different machines, and for merging the results of the shards.
+
+Each run is assigned to a shard in a way that only depends on the run itself
+(or on the historical wall times of all runs), such that all machines agree
+on the assignment without communicating.
+The merging is implemented as an executor (like benchexec.localexecution)
+that takes the results of all runs from the outputs of the shards instead of
+executing them, such that all output files are produced as usual.
+"""
+
+import argparse
+import datetime
+import glob
+import heapq
+import logging
+import os
+import shutil
+import zipfile
+
+from benchexec import BenchExecException
+from benchexec import tooladapter
+from benchexec import util
+
+STOPPED_BY_INTERRUPT = False
+
+# outputs of the shards that are merged, filled by init()
+_shard_outputs = []
+
+
+def parse_shard(s):
+    """
+    Parse a shard specification of the form "K/N" (shard K of N shards).
+    @return: a tuple (K, N) with 1 <= K <= N
+    """
+    try:
+        shard, num_shards = map(int, s.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{s}', expected 'K/N'.")
+    if not 1 <= shard <= num_shards:
+        raise argparse.ArgumentTypeError(
+            f"Invalid shard '{s}', K needs to be between 1 and N."
+        )
+    return shard, num_shards
+
+
+def get_run_id(run):
+    """
+    Get a string that identifies a run of a run set independently of the machine
+    and the output directory.
+    """
+    base_dir = run.runSet.benchmark.base_dir
+    if run.sourcefiles:
+        name = os.path.relpath(run.identifier, base_dir)
+    else:
+        name = run.identifier
+    properties = " ".join(sorted(prop.name for prop in run.properties))
+    return "\0".join([name, properties, " ".join(run.specific_options)])
+
+
+def assign_shards(run_ids, num_shards, walltimes=None):
+    """
+    Assign runs to shards.
+    Without wall times, each run is assigned to a shard based on a hash of its id,
+    which distributes the runs evenly in expectation.
+    With wall times, the runs are assigned greedily to the shard with the least
+    total wall time, starting with the longest run (ties are broken by the hash).
+    @param run_ids: a list of ids of runs as returned by get_run_id()
+    @param num_shards: the number of shards
+    @param walltimes: an optional list of (predicted) wall times of the runs
+    @return: a list with the index of the shard (starting with 1) for each run
+    """
+    import hashlib
+
+    hashes = [
+        int.from_bytes(hashlib.sha256(run_id.encode()).digest()[:8], "big")
+        for run_id in run_ids
+    ]
+    if walltimes is None:
+        return [h % num_shards + 1 for h in hashes]
+
+    shards = [None] * len(run_ids)
+    loads = [(0, shard) for shard in range(1, num_shards + 1)]
+    for i in sorted(range(len(run_ids)), key=lambda i: (-walltimes[i], hashes[i])):
+        load, shard = heapq.heappop(loads)
+        shards[i] = shard
+        heapq.heappush(loads, (load + walltimes[i], shard))
+    return shards
+
+
+def find_latest_execution(output_prefix):
+    """
+    Find the latest execution of a benchmark whose results are present
+    in the output path, as given by the prefix of its output files,
+    i.e., the output path and the name of the benchmark.
+    @return: a tuple of the base name of the output files and one result file,
+        or (None, None)
+    """
+    latest_instance = None
+    latest_result_file = None
+    for result_file in glob.iglob(glob.escape(output_prefix) + ".*.results.*"):
+        if not result_file.endswith((".xml", ".xml.bz2")):
+            continue
+        instance = result_file[len(output_prefix) + 1 :].split(".", 1)[0]
+        try:
+            datetime.datetime.strptime(instance, util.TIMESTAMP_FILENAME_FORMAT)
+        except ValueError:
+            continue  # not a result file of this benchmark
+        if latest_instance is None or instance > latest_instance:
+            latest_instance = instance
+            latest_result_file = result_file
+    if latest_instance is None:
+        return None, None
+    return f"{output_prefix}.{latest_instance}", latest_result_file
+
+
+def _run_id_of_run_xml(run_xml, result_file, base_dir):
+    name = run_xml.get("name")
+    if run_xml.get("files"):
+        # name is relative to the result file
+        name = os.path.relpath(
+            os.path.join(os.path.dirname(result_file), name), base_dir
+        )
+    properties = run_xml.get("properties", "")
+    return "\0".join([name, properties, run_xml.get("options", "")])
+
+
+class _ShardOutput(object):
+    """The output files of one shard."""
+
+    def __init__(self, base_name):
+        self.base_name = base_name
+        self.log_zip = None
+        if os.path.exists(base_name + ".logfiles.zip"):
+            self.log_zip = zipfile.ZipFile(base_name + ".logfiles.zip")
+
+    def read_run_set_result(self, runSet):
+        """Return the result XML of the given run set of this shard, or None."""
+        result_file = f"{self.base_name}.results.{runSet.name}.xml"
+        for filename in [result_file + ".bz2", result_file]:
+            if os.path.exists(filename):
+                return filename, util.read_xml_file(filename)
+        return None, None
+
+    def copy_log_file(self, run, benchmark):
+        """Copy the log file of the given run from this shard to the merged output."""
+        log_file_path = os.path.relpath(run.log_file, benchmark.log_folder)
+        os.makedirs(os.path.dirname(run.log_file), exist_ok=True)
+        if self.log_zip:
+            zip_path = f"{os.path.basename(self.base_name)}.logfiles/{log_file_path}"
+            try:
+                with self.log_zip.open(zip_path) as src, open(
+                    run.log_file, "wb"
+                ) as dst:
+                    shutil.copyfileobj(src, dst)
+                return
+            except KeyError:
+                pass
+        src = os.path.join(f"{self.base_name}.logfiles", log_file_path)
+        if os.path.exists(src):
+            shutil.copyfile(src, run.log_file)
+        else:
+            logging.warning("Log file of run %s is missing in shard.", run.identifier)
+            util.write_file("", run.log_file)
+
+    def copy_result_files(self, run, benchmark):
+        """Copy the result files of the given run from this shard, if present."""
+        result_files_path = os.path.relpath(
+            run.result_files_folder, benchmark.result_files_folder
+        )
+        src = os.path.join(f"{self.base_name}.files", result_files_path)
+        if os.path.isdir(src):
+            shutil.copytree(src, run.result_files_folder)
+
+    def close(self):
+        if self.log_zip:
+            self.log_zip.close()
+
+
+def find_shard_outputs(benchmark_name, shard_dirs):
+    """
+    Find the base names of the output files of the latest execution
+    of the given benchmark in each of the given directories.
+    """
+    base_names = []
+    for shard_dir in shard_dirs:
+        base_name, _ = find_latest_execution(os.path.join(shard_dir, benchmark_name))
+        if base_name is None:
+            raise BenchExecException(
+                f"No results of benchmark {benchmark_name} found in {shard_dir}."
+            )
+        base_names.append(base_name)
+    return base_names
+
+
+def init(config, benchmark):
+    global _shard_outputs
+    _shard_outputs = [
+        _ShardOutput(base_name)
+        for base_name in find_shard_outputs(benchmark.name, config.merge_shards)
+    ]
+    for shard_output in _shard_outputs:
+        logging.info("Merging results from %s.", shard_output.base_name)
+
+    # take the tool version from the results, the tool was executed by the shards
+    _, result_file = find_latest_execution(
+        os.path.join(config.merge_shards[0], benchmark.name)
+    )
+    benchmark.tool_version = util.read_xml_file(result_file).get("version")
+    try:
+        tool_locator = tooladapter.create_tool_locator(config)
+        benchmark.executable = benchmark.tool.executable(tool_locator)
+    except BenchExecException as e:
+        logging.debug("Tool executable not available for merging shards: %s", e)
+
+
+def get_system_info():
+    # the system information of the shards is taken from their results
+    return None
+
+
+def execute_benchmark(benchmark, output_handler):
+    try:
+        for runSet in benchmark.run_sets:
+            if STOPPED_BY_INTERRUPT:
+                break
+            if not runSet.should_be_executed():
+                output_handler.output_for_skipping_run_set(runSet)
+            elif not runSet.runs:
+                output_handler.output_for_skipping_run_set(
+                    runSet, "because it has no files"
+                )
+            else:
+                _merge_run_set(runSet, benchmark, output_handler)
+    finally:
+        for shard_output in _shard_outputs:
+            shard_output.close()
+
+    output_handler.output_after_benchmark(STOPPED_BY_INTERRUPT)
+    return 0
+
+
+def _merge_run_set(runSet, benchmark, output_handler):
+    shard_runs = {}  # run id -> (shard output, run XML)
+    start_times = []
+    end_times = []
+    cputime = 0
+    walltime = 0
+    for shard_output in _shard_outputs:
+        result_file, run_set_xml = shard_output.read_run_set_result(runSet)
+        if run_set_xml is None:
+            logging.warning(
+                "Results of run set %s are missing in %s.",
+                runSet.name,
+                shard_output.base_name,
+            )
+            continue
+
+        for systeminfo in run_set_xml.findall("systeminfo"):
+            _add_system_info(output_handler, systeminfo)
+        if run_set_xml.get("starttime"):
+            start_times.append(
+                datetime.datetime.fromisoformat(run_set_xml.get("starttime"))
+            )
+        if run_set_xml.get("endtime"):
+            end_times.append(
+                datetime.datetime.fromisoformat(run_set_xml.get("endtime"))
+            )
+        # the shards ran in parallel, so the CPU times add up but the wall times not
+        cputime += util.get_seconds_from_xml(run_set_xml, "cputime") or 0
+        walltime = max(
+            walltime, util.get_seconds_from_xml(run_set_xml, "walltime") or 0
+        )
+
+        for run_xml in run_set_xml.findall("run"):
+            if run_xml.find("column[@title='status']") is not None:
+                run_id = _run_id_of_run_xml(run_xml, result_file, benchmark.base_dir)
+                shard_runs[run_id] = (shard_output, run_xml)
+
+    output_handler.output_before_run_set(
+        runSet, start_time=min(start_times, default=None)
+    )
+    missing_runs = 0
+    for run in runSet.runs:
+        shard_output, run_xml = shard_runs.get(get_run_id(run), (None, None))
+        if run_xml is None:
+            missing_runs += 1
+            continue
+        shard_output.copy_log_file(run, benchmark)
+        shard_output.copy_result_files(run, benchmark)
+        run.restore_result(run_xml)
+        output_handler.output_after_run(run)
+
+    if missing_runs:
+        logging.warning(
+            "Results of %d runs of run set %s are missing in all shards.",
+            missing_runs,
+            runSet.name,
+        )
+        output_handler.set_error("missing runs", runSet)
+    output_handler.output_after_run_set(
+        runSet,
+        cputime=cputime,
+        walltime=walltime,
+        end_time=max(end_times, default=None),
+    )
+
+
+def _add_system_info(output_handler, systeminfo):
+    hostname = systeminfo.get("hostname")
+    for existing in output_handler.xml_header.findall("systeminfo"):
+        if existing.get("hostname") == hostname:
+            return
+    for elem in systeminfo.iter():
+        elem.tail = None  # remove indentation, will be added when writing
+    output_handler.xml_header.append(systeminfo)
+
+
+def stop():
+    global STOPPED_BY_INTERRUPT
+    STOPPED_BY_INTERRUPT = True
@@ -0,0 +1,268 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains a supervisor that enforces the limits of all runs
+that are executed by this process from a single thread with an epoll loop,
+instead of starting separate threads for the time limit and the memory limit
+of each run.
+Deadlines are implemented with timerfds, out-of-memory events are received
+through the eventfd of the OOM handler, and the termination of each run
+is observed with a pidfd.
+"""
+
+import logging
+import os
+import select
+import threading
+
+from benchexec import libc
+
+_NANOSECONDS_PER_SECOND = 1000 * 1000 * 1000
+
+
+def _create_timerfd():
+    return libc.timerfd_create(
+        libc.CLOCK_MONOTONIC, libc.TFD_NONBLOCK | libc.TFD_CLOEXEC
+    )
+
+
+class RunSupervisor(object):
+    """
+    The thread that waits for all events relevant for the limits of runs
+    and calls the respective handlers.
+    There is at most one instance per process, use get_instance() to access it.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Return the supervisor of this process and start it if necessary.
+        @return a RunSupervisor instance, or None if this system does not support it
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                try:
+                    cls._instance = cls()
+                except (AttributeError, OSError) as e:
+                    logging.debug(
+                        "Cannot supervise runs with an event loop, "
+                        "falling back to threads: %s",
+                        e,
+                    )
+                    cls._instance = False
+            return cls._instance or None
+
+    @classmethod
+    def _reset_instance(cls):
+        # The thread of the supervisor does not exist in a forked child process.
+        cls._instance = None
+        cls._instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._epoll = select.epoll()
+        try:
+            os.close(_create_timerfd())  # check that timerfds are supported
+        except BaseException:
+            self._epoll.close()
+            raise
+        self._handlers = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._loop, name="RunSupervisor", daemon=True).start()
+
+    def _register(self, fd, handler):
+        with self._lock:
+            self._handlers[fd] = handler
+            self._epoll.register(fd, select.EPOLLIN)
+
+    def _unregister(self, fd):
+        with self._lock:
+            self._handlers.pop(fd, None)
+            try:
+                self._epoll.unregister(fd)
+            except OSError:
+                pass
+
+    def _loop(self):
+        while True:
+            for fd, _event in self._epoll.poll():
+                with self._lock:
+                    handler = self._handlers.get(fd)
+                # Handlers need to cope with spurious events,
+                # e.g., if a file descriptor was closed and reused in the meantime.
+                if handler:
+                    try:
+                        handler()
+                    except Exception:
+                        logging.exception("Error during supervision of run.")
+
+    def supervise(self, pid):
+        """
+        Start supervising the limits of a process.
+        @param pid: the PID of the process that is killed if a limit is exceeded
+        @return a SupervisedRun for adding limits and for calling cancel()
+        """
+        return SupervisedRun(self, pid)
+
+
+os.register_at_fork(after_in_child=RunSupervisor._reset_instance)
+
+
+class SupervisedRun(object):
+    """
+    The limits of a single process that are enforced by the RunSupervisor.
+    All limits are cancelled as soon as the process terminates,
+    or when cancel() is called.
+    """
+
+    def __init__(self, supervisor, pid):
+        self._supervisor = supervisor
+        self._pid = pid
+        self._watches = []
+        self._lock = threading.Lock()
+        self._cancelled = False
+        try:
+            self._pidfd = os.pidfd_open(pid)
+        except (AttributeError, OSError) as e:
+            # Limits are still cancelled by the caller after the process terminated.
+            logging.debug("Cannot open pidfd for process %s: %s", pid, e)
+            self._pidfd = None
+        else:
+            supervisor._register(self._pidfd, self._process_terminated)
+
+    def add_time_limit(self, time_limit):
+        """
+        Enforce a time limit, which is checked immediately and then repeatedly.
+        @param time_limit: an object whose method check() checks the limit and returns
+            the number of seconds until the next check or None if it is finished
+        """
+        self._add_watch(_TimerWatch(self._supervisor, time_limit.check, 0))
+
+    def add_event_handler(self, event_handler):
+        """
+        Wait for a single event on a file descriptor.
+        The supervisor takes ownership of the file descriptor.
+        @param event_handler: an object with methods fileno(), handle_event(),
+            and close(), like oomhandler.KillProcessOnOomThread
+        """
+        self._add_watch(_EventWatch(self._supervisor, event_handler))
+
+    def _add_watch(self, watch):
+        with self._lock:
+            if not self._cancelled:
+                self._watches.append(watch)
+                return
+        watch.cancel()
+
+    def _process_terminated(self):
+        # Events can be spurious, so check whether the pidfd is really readable.
+        with self._lock:
+            if self._cancelled:
+                return
+            readable, _, _ = select.select([self._pidfd], [], [], 0)
+        if readable:
+            logging.debug("Process %s terminated, cancelling its limits.", self._pid)
+            self.cancel()
+
+    def cancel(self):
+        """
+        Stop enforcing all limits of this run.
+        When this method returns, no handler of this run is executing anymore.
+        """
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            watches = self._watches
+            self._watches = []
+            if self._pidfd is not None:
+                self._supervisor._unregister(self._pidfd)
+                os.close(self._pidfd)
+                self._pidfd = None
+        for watch in watches:
+            watch.cancel()
+
+
+class _Watch(object):
+    """Base class for a file descriptor that is watched by the RunSupervisor."""
+
+    def __init__(self, supervisor, fd):
+        self._supervisor = supervisor
+        self._fd = fd
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def _event(self):
+        with self._lock:
+            if not self._cancelled:
+                self._handle_event()
+
+    def cancel(self):
+        with self._lock:
+            if not self._cancelled:
+                self._close()
+
+    def _close(self):
+        self._cancelled = True
+        self._supervisor._unregister(self._fd)
+        os.close(self._fd)
+
+
+class _TimerWatch(_Watch):
+    """Calls a function after a delay that is determined by its previous call."""
+
+    def __init__(self, supervisor, check_fn, delay):
+        super(_TimerWatch, self).__init__(supervisor, _create_timerfd())
+        self._check_fn = check_fn
+        self._arm(delay)
+        supervisor._register(self._fd, self._event)
+
+    def _arm(self, delay):
+        spec = libc.ITimerSpec()
+        # a value of 0 would disarm the timer, so use at least one nanosecond
+        nanoseconds = max(int(delay * _NANOSECONDS_PER_SECOND), 1)
+        spec.it_value.tv_sec, spec.it_value.tv_nsec = divmod(
+            nanoseconds, _NANOSECONDS_PER_SECOND
+        )
+        libc.timerfd_settime(self._fd, 0, spec, None)
+
+    def _handle_event(self):
+        try:
+            os.read(self._fd, 8)
+        except BlockingIOError:
+            return  # spurious event, timer has not expired
+        delay = self._check_fn()
+        if delay is None:
+            self._close()
+        else:
+            self._arm(delay)
+
+
+class _EventWatch(_Watch):
+    """Passes a single event on a file descriptor to a handler."""
+
+    def __init__(self, supervisor, event_handler):
+        super(_EventWatch, self).__init__(supervisor, event_handler.fileno())
+        self._event_handler = event_handler
+        os.set_blocking(self._fd, False)
+        supervisor._register(self._fd, self._event)
+
+    def _handle_event(self):
+        try:
+            os.read(self._fd, 8)
+        except BlockingIOError:
+            return  # spurious event
+        self._event_handler.handle_event()
+        self._close()
+
+    def _close(self):
+        self._cancelled = True
+        self._supervisor._unregister(self._fd)
+        self._event_handler.close()
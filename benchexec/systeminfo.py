@@ -9,12 +9,17 @@
 This module allows to retrieve information about the current system.
 """
 
+import array
+import bisect
+import collections
 from decimal import Decimal
 import glob
 import logging
+import math
 import os
-import platform
 import sys
+import threading
+import time
 
 from benchexec import util
 
@@ -24,17 +29,27 @@ __all__ = [
     "CPUThrottleCheck",
     "SystemInfo",
     "SwapCheck",
+    "SystemHealthMonitor",
+    "get_system_health_monitor",
 ]
 
 _TURBO_BOOST_FILE = "/sys/devices/system/cpu/cpufreq/boost"
 _TURBO_BOOST_FILE_PSTATE = "/sys/devices/system/cpu/intel_pstate/no_turbo"
 
+_HEALTH_SAMPLE_INTERVAL_SECONDS = 1
+_HEALTH_BUFFER_SIZE = 1800
+
+_system_health_monitor = None
+_system_health_monitor_lock = threading.Lock()
+
 
 class SystemInfo(object):
     def __init__(self):
         """
         This function finds some information about the computer.
         """
+        import platform
+
         # get info about OS
         self.hostname = platform.node()
         self.os = platform.platform(aliased=True)
@@ -107,6 +122,7 @@ class SystemInfo(object):
 class CPUThrottleCheck(object):
     """
     Class for checking whether the CPU has throttled during some time period.
+    Deprecated, prefer SystemHealthMonitor.
     """
 
     def __init__(self, cores=None):
@@ -147,6 +163,7 @@ class CPUThrottleCheck(object):
 class SwapCheck(object):
     """
     Class for checking whether the system has swapped during some period.
+    Deprecated, prefer SystemHealthMonitor.
     """
 
     def __init__(self):
@@ -175,6 +192,265 @@ class SwapCheck(object):
         return False
 
 
+_HealthSample = collections.namedtuple(
+    "HealthSample", "time throttle_counts swap_count frequencies load"
+)
+"""A sample of the system health. Values per core are stored in an array
+(with -1 for missing values) in the order of SystemHealthMonitor.cores."""
+
+
+class SystemHealthMonitor(object):
+    """
+    Monitors the system health (thermal throttling of CPUs, swapping,
+    CPU frequencies, and system load) by sampling it regularly in a background thread
+    into a ring buffer, such that it can be checked for arbitrary time periods
+    (like the execution of a run) without costs per period.
+    Each process should use only the instance from get_system_health_monitor().
+    """
+
+    def __init__(
+        self,
+        sample_interval=_HEALTH_SAMPLE_INTERVAL_SECONDS,
+        buffer_size=_HEALTH_BUFFER_SIZE,
+        cpu_dir="/sys/devices/system/cpu",
+        proc_dir="/proc",
+    ):
+        """
+        Create an instance that monitors all CPU cores of the system.
+        @param sample_interval: the time between two samples in seconds
+        @param buffer_size: the number of samples that are kept
+        """
+        self.sample_interval = sample_interval
+        self.cores = sorted(
+            int(os.path.basename(core_dir)[3:])
+            for core_dir in glob.glob(os.path.join(cpu_dir, "cpu[0-9]*"))
+        )
+        self._throttle_fds = [
+            [
+                fd
+                for fd in map(
+                    _open_for_sampling,
+                    glob.glob(
+                        os.path.join(
+                            cpu_dir,
+                            f"cpu{core}",
+                            "thermal_throttle",
+                            "*_throttle_count",
+                        )
+                    ),
+                )
+                if fd is not None
+            ]
+            for core in self.cores
+        ]
+        self._frequency_fds = [
+            _open_for_sampling(
+                os.path.join(cpu_dir, f"cpu{core}", "cpufreq", "scaling_cur_freq")
+            )
+            for core in self.cores
+        ]
+        self._vmstat_fd = _open_for_sampling(os.path.join(proc_dir, "vmstat"))
+        self._loadavg_fd = _open_for_sampling(os.path.join(proc_dir, "loadavg"))
+
+        self._lock = threading.Lock()
+        self._samples = collections.deque(maxlen=buffer_size)
+        self._first_sample = None
+        self._stop_sampling = threading.Event()
+        self._sampling_thread = None
+
+    def start(self):
+        """Take the first sample and start sampling regularly in the background."""
+        self._first_sample = self.sample()
+        self._sampling_thread = threading.Thread(
+            target=self._sample_regularly, name="system-health-monitor", daemon=True
+        )
+        self._sampling_thread.start()
+
+    def stop(self):
+        """Stop sampling and release all resources."""
+        self._stop_sampling.set()
+        if self._sampling_thread:
+            self._sampling_thread.join()
+        fds = [fd for fds in self._throttle_fds for fd in fds]
+        fds += self._frequency_fds + [self._vmstat_fd, self._loadavg_fd]
+        for fd in fds:
+            if fd is not None:
+                os.close(fd)
+        self._throttle_fds = []
+        self._frequency_fds = []
+        self._vmstat_fd = self._loadavg_fd = None
+
+    def set_sample_interval(self, sample_interval):
+        """
+        Change the time between two samples (effective after the next sample),
+        keeping samples for the same duration as before.
+        @param sample_interval: the time between two samples in seconds
+        """
+        with self._lock:
+            history = self._samples.maxlen * self.sample_interval
+            self.sample_interval = sample_interval
+            self._resize_buffer(math.ceil(history / sample_interval))
+
+    def keep_history(self, seconds):
+        """
+        Make sure that the buffer holds the samples of at least the given duration,
+        such that the system health during periods of this length
+        (like the wall-time limit of a run) can be checked precisely.
+        @param seconds: the duration in seconds
+        """
+        with self._lock:
+            # plus one sample before and after the period
+            size = math.ceil(seconds / self.sample_interval) + 2
+            if size > self._samples.maxlen:
+                self._resize_buffer(size)
+
+    def _resize_buffer(self, size):
+        # keeps the newest samples
+        self._samples = collections.deque(self._samples, maxlen=size)
+
+    def _sample_regularly(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            self.sample()
+
+    def sample(self):
+        """Take a sample now, add it to the buffer, and return it."""
+        with self._lock:
+            throttle_counts = array.array("q")
+            for fds in self._throttle_fds:
+                counts = [_read_int(fd) for fd in fds]
+                throttle_counts.append(-1 if None in counts else sum(counts, 0))
+            frequencies = array.array(
+                "q", (_read_int(fd, -1) for fd in self._frequency_fds)
+            )
+
+            swap_count = None
+            vmstat = _read_fd(self._vmstat_fd)
+            if vmstat:
+                swap_count = sum(
+                    int(line.split()[1])
+                    for line in vmstat.splitlines()
+                    if line.startswith(("pswpin ", "pswpout "))
+                )
+            load = _read_fd(self._loadavg_fd)
+            load = float(load.split()[0]) if load else None
+
+            sample = _HealthSample(
+                time.monotonic(), throttle_counts, swap_count, frequencies, load
+            )
+            self._samples.append(sample)
+            return sample
+
+    def get_statistics(self, start, end, cores=None):
+        """
+        Check the system health during a given time period.
+        If there is no sample after the end of the period, one is taken now.
+        Changes are detected with a granularity of the sample interval,
+        i.e., the period is extended to the closest samples around it.
+        @param start: the start of the period as value of time.monotonic()
+        @param end: the end of the period as value of time.monotonic()
+        @param cores: the list of CPU cores to check (default: all cores)
+        @return: a dict with the keys "cpu-throttled" and "swapped" (bools)
+            and "cpufreq-min", "cpufreq-avg", "cpufreq-max" (in Hz) and "loadavg-max",
+            each only if the respective information is available
+        """
+        with self._lock:
+            samples = list(self._samples)
+        if not samples or samples[-1].time < end:
+            samples.append(self.sample())
+
+        times = [sample.time for sample in samples]
+        first = bisect.bisect_right(times, start)
+        if first > 0:
+            before = samples[first - 1]
+        else:
+            # Period started before oldest sample in buffer, compare counters
+            # with the first sample ever, which might include more events.
+            before = self._first_sample or samples[0]
+        last = bisect.bisect_left(times, end)
+        after = samples[last]
+        window = samples[min(first, last) : last + 1]
+
+        if cores is None:
+            indices = range(len(self.cores))
+        else:
+            indices = [self.cores.index(core) for core in cores if core in self.cores]
+
+        result = {}
+        throttle_counts = [
+            (before.throttle_counts[i], after.throttle_counts[i])
+            for i in indices
+            if before.throttle_counts[i] >= 0 and after.throttle_counts[i] >= 0
+        ]
+        if any(self._throttle_fds[i] for i in indices):
+            result["cpu-throttled"] = any(old < new for old, new in throttle_counts)
+        if before.swap_count is not None and after.swap_count is not None:
+            result["swapped"] = after.swap_count > before.swap_count
+
+        frequencies = [
+            sample.frequencies[i]
+            for sample in window
+            for i in indices
+            if sample.frequencies[i] >= 0
+        ]
+        if frequencies:
+            result["cpufreq-min"] = min(frequencies) * 1000  # convert kHz to Hz
+            result["cpufreq-avg"] = sum(frequencies) * 1000 // len(frequencies)
+            result["cpufreq-max"] = max(frequencies) * 1000
+        loads = [sample.load for sample in window if sample.load is not None]
+        if loads:
+            result["loadavg-max"] = max(loads)
+        return result
+
+
+def get_system_health_monitor(sample_interval=None):
+    """
+    Return the SystemHealthMonitor of the current process,
+    which is created and started on first use.
+    @param sample_interval: None or the time between two samples in seconds,
+        which is changed for the existing monitor if necessary
+        (default for new monitors: 1s)
+    """
+    global _system_health_monitor
+    with _system_health_monitor_lock:
+        # A forked process inherits the monitor but not its sampling thread.
+        if _system_health_monitor is None or _system_health_monitor[0] != os.getpid():
+            monitor = SystemHealthMonitor(
+                sample_interval=sample_interval or _HEALTH_SAMPLE_INTERVAL_SECONDS
+            )
+            monitor.start()
+            _system_health_monitor = (os.getpid(), monitor)
+        monitor = _system_health_monitor[1]
+        if sample_interval and sample_interval != monitor.sample_interval:
+            monitor.set_sample_interval(sample_interval)
+        return monitor
+
+
+def _open_for_sampling(path):
+    """Open a file from sysfs or procfs that will be read repeatedly, or return None."""
+    try:
+        return os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+
+
+def _read_fd(fd):
+    """Read the current content of a file from sysfs or procfs, or return None."""
+    if fd is None:
+        return None
+    try:
+        return os.pread(fd, 65536, 0).decode()
+    except OSError as e:
+        logging.debug("Cannot read system-health information from kernel: %s", e)
+        return None
+
+
+def _read_int(fd, default=None):
+    try:
+        return int(_read_fd(fd))
+    except (TypeError, ValueError):
+        return default
+
+
 def is_turbo_boost_enabled():
     """
     Check whether Turbo Boost (scaling CPU frequency beyond nominal frequency)
@@ -34,8 +34,10 @@ DummyConfig = collections.namedtuple(
         "selected_run_definitions",
         "selected_sourcefile_sets",
         "description_file",
+        "shard",
+        "schedule_by_results",
     ],
-)(None, "test", False, None, None, None, None, None, None, None, None)
+)(None, "test", False, None, None, None, None, None, None, None, None, None, None)
 
 ALL_TEST_TASKS = {
     "false_other_sub_task.yml": "other_subproperty",
@@ -6,11 +6,16 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
 import unittest
 
+from benchexec import cgroups
 from benchexec import check_cgroups
+from benchexec import util
 
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
 
@@ -66,3 +71,113 @@ class TestCheckCgroups(unittest.TestCase):
 
         finally:
             check_cgroups.check_cgroup_availability = tmp
+
+
+class TestCgroupV2(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        logging.disable(logging.CRITICAL)
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_cgroups_")
+        self.cgroup_dir = os.path.join(self.base_dir, "benchmark_test")
+        os.mkdir(self.cgroup_dir)
+        self.cgroup = cgroups.CgroupV2(
+            dict.fromkeys(
+                [cgroups.BLKIO, cgroups.CPUACCT, cgroups.FREEZER, cgroups.MEMORY],
+                self.cgroup_dir,
+            )
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def write_file(self, name, content, directory=None):
+        util.write_file(content, directory or self.cgroup_dir, name)
+
+    def test_from_path(self):
+        self.write_file("cgroup.controllers", "cpuset cpu io memory pids")
+        cgroup = cgroups.CgroupV2.from_path(self.cgroup_dir)
+        for subsystem in [
+            cgroups.BLKIO,
+            cgroups.CPUACCT,
+            cgroups.CPUSET,
+            cgroups.FREEZER,
+            cgroups.MEMORY,
+            "pids",
+        ]:
+            self.assertIn(subsystem, cgroup)
+            self.assertEqual(cgroup[subsystem], self.cgroup_dir)
+        self.assertNotIn("hugetlb", cgroup)
+
+    def test_file_names(self):
+        self.write_file("memory.max", "max")
+        self.write_file("cpu.weight", "100")
+        self.assertTrue(self.cgroup.has_value(cgroups.MEMORY, "max"))
+        self.assertEqual(self.cgroup.get_value(cgroups.CPUACCT, "weight"), "100")
+        self.assertFalse(self.cgroup.has_value(cgroups.MEMORY, "limit_in_bytes"))
+
+    def test_read_cputime(self):
+        self.write_file(
+            "cpu.stat", "usage_usec 1500000\nuser_usec 1000000\nsystem_usec 500000\n"
+        )
+        self.assertEqual(self.cgroup.read_cputime(), 1.5)
+
+    def test_read_max_mem_usage(self):
+        self.assertIsNone(self.cgroup.read_max_mem_usage())
+        self.write_file("memory.peak", "1000")
+        self.assertEqual(self.cgroup.read_max_mem_usage(), 1000)
+        self.write_file("memory.swap.peak", "24")
+        self.assertEqual(self.cgroup.read_max_mem_usage(), 1024)
+
+    def test_read_io_stat(self):
+        self.assertIsNone(self.cgroup.read_io_stat())
+        self.write_file(
+            "io.stat",
+            "8:0 rbytes=100 wbytes=20 rios=1 wios=1 dbytes=0 dios=0\n"
+            "8:16 rbytes=5 wbytes=3 rios=1 wios=1 dbytes=0 dios=0\n",
+        )
+        self.assertEqual(self.cgroup.read_io_stat(), (105, 23))
+
+    def test_read_oom_kill_count(self):
+        self.write_file(
+            "memory.events",
+            "low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\noom_group_kill 0\n",
+        )
+        self.assertEqual(self.cgroup.read_oom_kill_count(), 1)
+
+    def test_read_memory_limit(self):
+        self.write_file("memory.max", "max")
+        self.assertIsNone(self.cgroup.read_memory_limit())
+        self.write_file("memory.max", "2000", directory=self.base_dir)
+        self.assertEqual(self.cgroup.read_memory_limit(), 2000)
+        self.write_file("memory.max", "1000")
+        self.assertEqual(self.cgroup.read_memory_limit(), 1000)
+
+    def test_read_memory_usage(self):
+        self.write_file("memory.current", "1000")
+        self.write_file("memory.stat", "anon 600\nfile 400\ninactive_file 300\n")
+        self.assertEqual(self.cgroup.read_memory_usage(), 700)
+
+    def test_kill_all_tasks(self):
+        mount = cgroups._find_cgroup2_mount()
+        if not mount or not os.access(mount, os.W_OK):
+            self.skipTest("no writable cgroup2 hierarchy")
+        parent = cgroups.CgroupV2({cgroups.FREEZER: mount, cgroups.CPUACCT: mount})
+        try:
+            cgroup = parent.create_fresh_child_cgroup(cgroups.CPUACCT, cgroups.FREEZER)
+        except OSError as e:
+            self.skipTest(f"cannot create cgroup: {e}")
+        process = subprocess.Popen(["sleep", "60"])
+        try:
+            cgroup.add_task(process.pid)
+            self.assertEqual(list(cgroup.get_all_tasks(cgroups.FREEZER)), [process.pid])
+            cgroup.kill_all_tasks()
+            self.assertEqual(process.wait(timeout=10), -9)
+            self.assertEqual(list(cgroup.get_all_tasks(cgroups.FREEZER)), [])
+            self.assertGreaterEqual(cgroup.read_cputime(), 0)
+        finally:
+            process.kill()
+            process.wait()
+            cgroup.remove()
@@ -0,0 +1,158 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import base64
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import types
+import unittest
+
+from benchexec import distributedexecution
+from benchexec import util
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class FakeOutputHandler(object):
+    def __init__(self):
+        self.started_runs = []
+        self.finished_runs = []
+
+    def output_before_run(self, run):
+        self.started_runs.append(run)
+
+    def output_after_run(self, run):
+        self.finished_runs.append(run)
+
+
+class FakeRun(object):
+    def __init__(self, name, runSet, output_dir):
+        self.identifier = name
+        self.runSet = runSet
+        self.log_file = os.path.join(output_dir, "logs", name + ".log")
+        self.result_files_folder = os.path.join(output_dir, "files", name)
+        self.values = {}
+
+    def cmdline(self):
+        return ["tool", self.identifier]
+
+    def set_result(self, values, visible_columns):
+        self.values = values
+
+
+class TestCoordinator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        logging.disable(logging.CRITICAL)
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix="BenchExec_test_distributed_")
+        benchmark = types.SimpleNamespace(
+            rlimits=types.SimpleNamespace(
+                cpu_cores=None,
+                memory=None,
+                cputime_hard=None,
+                cputime=60,
+                walltime=None,
+            ),
+            environment=lambda: {},
+            working_directory=lambda: None,
+            result_files_patterns=[],
+            config=types.SimpleNamespace(
+                maxLogfileSize=None, filesCountLimit=None, filesSizeLimit=None
+            ),
+        )
+        self.output_handler = FakeOutputHandler()
+        self.coordinator = distributedexecution._Coordinator(
+            ("127.0.0.1", 0), benchmark, self.output_handler
+        )
+        self.runSet = object()
+
+    def tearDown(self):
+        self.coordinator.shutdown()
+        shutil.rmtree(self.output_dir)
+
+    def connect_worker(self, slots=1):
+        sock = socket.create_connection(self.coordinator.address)
+        sock.settimeout(10)
+        connection = distributedexecution._Connection(sock)
+        connection.send(
+            {
+                "type": "hello",
+                "version": distributedexecution._PROTOCOL_VERSION,
+                "slots": slots,
+                "hostname": "worker",
+            }
+        )
+        return connection
+
+    def send_result(self, connection, message):
+        connection.send(
+            {
+                "type": "result",
+                "id": message["id"],
+                "killed": False,
+                "values": {"cputime": 1.5, "walltime": 2.0, "exitcode": 0},
+                "log": base64.b64encode(
+                    b"output of " + message["args"][1].encode()
+                ).decode(),
+                "files": {"result.txt": base64.b64encode(b"result").decode()},
+            }
+        )
+
+    def test_execute_runs(self):
+        runs = [FakeRun(f"task{i}", self.runSet, self.output_dir) for i in range(3)]
+        connection = self.connect_worker(slots=2)
+        self.coordinator.submit(self.runSet, runs)
+
+        for _ in runs:
+            message = connection.receive()
+            self.assertEqual(message["type"], "run")
+            self.assertEqual(message["softtimelimit"], 60)
+            self.send_result(connection, message)
+        self.coordinator.wait_until_finished(self.runSet)
+        connection.close()
+
+        self.assertEqual(self.output_handler.started_runs, runs)
+        self.assertCountEqual(self.output_handler.finished_runs, runs)
+        self.assertEqual(self.coordinator.cputime[self.runSet], 3 * 1.5)
+        for run in runs:
+            self.assertEqual(run.values["host"], "worker")
+            self.assertEqual(run.values["exitcode"], util.ProcessExitCode.from_raw(0))
+            self.assertEqual(
+                util.read_file(run.log_file), "output of " + run.identifier
+            )
+            self.assertEqual(
+                util.read_file(run.result_files_folder, "result.txt"), "result"
+            )
+
+    def test_requeue_runs_of_disconnected_worker(self):
+        runs = [FakeRun(f"task{i}", self.runSet, self.output_dir) for i in range(2)]
+        self.coordinator.submit(self.runSet, runs)
+
+        lost_worker = self.connect_worker(slots=1)
+        lost_run = lost_worker.receive()
+        lost_worker.close()
+
+        connection = self.connect_worker(slots=1)
+        received_runs = []
+        for _ in runs:
+            message = connection.receive()
+            received_runs.append(message["args"])
+            self.send_result(connection, message)
+        self.coordinator.wait_until_finished(self.runSet)
+        connection.close()
+
+        self.assertIn(lost_run["args"], received_runs)
+        self.assertCountEqual(self.output_handler.finished_runs, runs)
+        # the re-queued run is not announced twice
+        self.assertEqual(len(self.output_handler.started_runs), len(runs))
@@ -0,0 +1,125 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from benchexec import filehierarchylimit
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+def write_file(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+class TestInotifyFileHierarchy(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_filehierarchylimit_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        try:
+            self.hierarchy = filehierarchylimit._InotifyFileHierarchy(self.base_dir)
+        except OSError as e:
+            self.skipTest(f"inotify not available: {e}")
+        self.addCleanup(self.hierarchy.close)
+
+    def path(self, *parts):
+        return os.path.join(self.base_dir, *parts)
+
+    def assertFiles(self, count, size):  # noqa: N802 unittest naming
+        self.hierarchy.update()
+        self.assertEqual(self.hierarchy.files_count, count)
+        self.assertEqual(self.hierarchy.files_size, size)
+
+    def test_existing_files(self):
+        os.makedirs(self.path("a", "b"))
+        write_file(self.path("a", "b", "f"), 10)
+        write_file(self.path("g"), 5)
+        hierarchy = filehierarchylimit._InotifyFileHierarchy(self.base_dir)
+        try:
+            self.assertEqual(hierarchy.files_count, 2)
+            self.assertEqual(hierarchy.files_size, 15)
+        finally:
+            hierarchy.close()
+
+    def test_create_modify_delete(self):
+        write_file(self.path("f"), 10)
+        self.assertFiles(1, 10)
+        with open(self.path("f"), "ab") as f:
+            f.write(b"y" * 5)
+        self.assertFiles(1, 15)
+        os.remove(self.path("f"))
+        self.assertFiles(0, 0)
+
+    def test_new_directories(self):
+        os.makedirs(self.path("a", "b", "c"))
+        write_file(self.path("a", "b", "c", "f"), 10)
+        self.assertFiles(1, 10)
+        # files created in a new directory after it was noticed
+        write_file(self.path("a", "b", "g"), 7)
+        self.assertFiles(2, 17)
+
+    def test_move_directory(self):
+        os.makedirs(self.path("a"))
+        write_file(self.path("a", "f"), 10)
+        self.assertFiles(1, 10)
+        os.rename(self.path("a"), self.path("b"))
+        self.assertFiles(1, 10)
+        write_file(self.path("b", "g"), 1)
+        self.assertFiles(2, 11)
+        shutil.rmtree(self.path("b"))
+        self.assertFiles(0, 0)
+
+    def test_symlinks_and_directories_do_not_count(self):
+        os.mkdir(self.path("a"))
+        os.symlink("/etc/passwd", self.path("link"))
+        self.assertFiles(0, 0)
+
+    def test_same_result_as_scan(self):
+        for i in range(20):
+            os.makedirs(self.path(str(i % 3), str(i)), exist_ok=True)
+            write_file(self.path(str(i % 3), str(i), "f"), i)
+        os.rename(self.path("0"), self.path("3"))
+        os.remove(self.path("1", "4", "f"))
+        self.hierarchy.update()
+
+        limit_thread = filehierarchylimit.FileHierarchyLimitThread(
+            self.base_dir, files_count_limit=None, files_size_limit=None, pid_to_kill=0
+        )
+        limit_thread._hierarchy = None  # force scan
+        scanned = {}
+        limit_thread._check_limit = lambda count, size: scanned.update(
+            count=count, size=size
+        )
+        limit_thread.check()
+        self.assertEqual(self.hierarchy.files_count, scanned["count"])
+        self.assertEqual(self.hierarchy.files_size, scanned["size"])
+
+    def test_check_interval_after_fallback_to_scan(self):
+        limit_thread = filehierarchylimit.FileHierarchyLimitThread(
+            self.base_dir, files_count_limit=None, files_size_limit=None, pid_to_kill=0
+        )
+        if limit_thread._hierarchy is None:
+            self.skipTest("inotify not available")
+        self.assertEqual(
+            limit_thread.check_interval,
+            filehierarchylimit._INCREMENTAL_CHECK_INTERVAL_SECONDS,
+        )
+
+        def fail():
+            raise OSError("inotify watch limit reached")
+
+        limit_thread._hierarchy.update = fail
+        self.assertIsNone(limit_thread.check())
+        self.assertIsNone(limit_thread._hierarchy)
+        self.assertEqual(
+            limit_thread.check_interval, filehierarchylimit._CHECK_INTERVAL_SECONDS
+        )
@@ -0,0 +1,95 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import subprocess
+import sys
+import unittest
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TIME_LIMIT = 0.3
+"""Maximum time in seconds for importing the module of an entry point.
+This is several times more than what is necessary on a typical machine,
+such that only real regressions (like eagerly importing a large module) fail."""
+
+
+def import_times(module):
+    """
+    Import the given module in a new Python process with "-X importtime".
+    @return: a dict with the cumulative import time in seconds of each imported module
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000000
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def assertLazilyImported(self, module, lazy_modules):  # noqa: N802
+        imported = import_times(module).keys()
+        self.assertFalse(
+            imported & set(lazy_modules),
+            f"{module} should import these modules only when they are needed",
+        )
+
+    def assertFastImport(self, module):  # noqa: N802
+        # Taking the minimum reduces the noise from other processes and
+        # excludes the creation of .pyc files.
+        import_time = min(import_times(module)[module] for _ in range(3))
+        self.assertLess(
+            import_time,
+            IMPORT_TIME_LIMIT,
+            f"importing {module} is too slow, check 'python -X importtime'",
+        )
+
+    def test_runexec(self):
+        self.assertLazilyImported(
+            "benchexec.runexecutor",
+            [
+                "concurrent.futures",
+                "json",
+                "multiprocessing",
+                "platform",
+                "xml.etree.ElementTree",
+                "benchexec.pqos",
+                "benchexec.runexecserver",
+            ],
+        )
+        self.assertFastImport("benchexec.runexecutor")
+
+    def test_containerexec(self):
+        self.assertFastImport("benchexec.containerexecutor")
+
+    def test_benchexec(self):
+        self.assertLazilyImported(
+            "benchexec.benchexec",
+            [
+                "hashlib",
+                "statistics",
+                "xml.dom.minidom",
+                "yaml",
+                "benchexec.containerexecutor",
+                "benchexec.localexecution",
+                "benchexec.runexecutor",
+            ],
+        )
+        self.assertFastImport("benchexec.benchexec")
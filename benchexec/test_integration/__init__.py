@@ -9,6 +9,7 @@ import bz2
 import glob
 import os
 import shutil
+import socket
 import subprocess
 import sys
 import tempfile
@@ -247,6 +248,46 @@ class BenchExecIntegrationTests(unittest.TestCase):
     def test_simple_parallel(self):
         self.run_benchexec_and_compare_expected_files("--numOfThreads", "12")
 
+    def test_simple_parallel_pipelined(self):
+        self.run_benchexec_and_compare_expected_files(
+            "--numOfThreads", "12", "--pipeline-run-sets"
+        )
+
+    def test_simple_parallel_worker_processes(self):
+        self.run_benchexec_and_compare_expected_files(
+            "--numOfThreads", "12", "--worker-processes"
+        )
+
+    def test_run_set_cputime_worker_processes(self):
+        benchmark_xml = os.path.join(self.benchmarks_dir, "benchmark-example-true.xml")
+        self.run_cmd(
+            benchmark_xml,
+            "--no-compress-results",
+            "--rundefinition",
+            "no options",
+            "--numOfThreads",
+            "2",
+            "--worker-processes",
+        )
+        result_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+        result = ElementTree.ElementTree().parse(result_xml)
+
+        def get_cputime(elem):
+            return float(elem.find("column[@title='cputime']").get("value")[:-1])
+
+        runs_cputime = sum(get_cputime(run) for run in result.findall("run"))
+        self.assertGreater(runs_cputime, 0)
+        # the run set consists of these runs, rounding is the only difference
+        self.assertAlmostEqual(get_cputime(result), runs_cputime, delta=0.01)
+
+    def test_simple_parallel_memory_admission(self):
+        self.run_benchexec_and_compare_expected_files(
+            "--numOfThreads", "12", "--memory-admission-margin", "10MB"
+        )
+
     def test_wildcard_tasks_1(self):
         self.run_benchexec_and_compare_expected_files(
             "--tasks", "*", tasks=benchmark_test_tasks
@@ -379,6 +420,190 @@ class BenchExecIntegrationTests(unittest.TestCase):
 
         self.assertSameRunResults(actual_xml, expected_xml)
 
+    def test_resume_finished_execution(self):
+        benchmark_xml = os.path.join(self.benchmarks_dir, "benchmark-example-true.xml")
+        args = [benchmark_xml, "--no-compress-results", "--rundefinition", "no options"]
+        self.run_cmd(*args)
+        result_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+        expected_runs = ElementTree.ElementTree().parse(result_xml).findall("run")
+
+        output = self.run_cmd(*args, "--resume")
+        self.assertIn(f"Reusing results of {len(expected_runs)} runs", output)
+
+        actual_runs = ElementTree.ElementTree().parse(result_xml).findall("run")
+        self.assertEqual(
+            [[column.attrib for column in run] for run in expected_runs],
+            [[column.attrib for column in run] for run in actual_runs],
+        )
+
+    def test_resume_interrupted_execution(self):
+        benchmark_xml = os.path.join(self.benchmarks_dir, "benchmark-example-true.xml")
+        args = [benchmark_xml, "--no-compress-results", "--rundefinition", "no options"]
+        self.run_cmd(*args)
+        result_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+
+        # Simulate an interrupted execution by removing the result of the last run.
+        tree = ElementTree.ElementTree()
+        tree.parse(result_xml)
+        runs = tree.findall("run")
+        for column in list(runs[-1]):
+            runs[-1].remove(column)
+        tree.write(result_xml)
+
+        output = self.run_cmd(*args, "--resume")
+        self.assertIn(f"Reusing results of {len(runs) - 1} runs", output)
+
+        actual_runs = ElementTree.ElementTree().parse(result_xml).findall("run")
+        self.assertEqual(len(runs), len(actual_runs))
+        for run in actual_runs:
+            self.assertIsNotNone(run.find("column[@title='status']"), run.attrib)
+
+    def test_resume_crashed_execution(self):
+        benchmark_xml = os.path.join(self.benchmarks_dir, "benchmark-example-true.xml")
+        args = [benchmark_xml, "--no-compress-results", "--rundefinition", "no options"]
+        self.run_cmd(*args)
+        result_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+
+        # Simulate a crash, after which the times of the run set
+        # and the result of the last run are missing.
+        tree = ElementTree.ElementTree()
+        tree.parse(result_xml)
+        for column in tree.findall("column"):
+            tree.getroot().remove(column)
+        runs = tree.findall("run")
+        for column in list(runs[-1]):
+            runs[-1].remove(column)
+        tree.write(result_xml)
+
+        def get_seconds(elem, title):
+            return float(elem.find(f"column[@title='{title}']").get("value")[:-1])
+
+        self.run_cmd(*args, "--resume")
+        result = ElementTree.ElementTree().parse(result_xml)
+        for title in ["cputime", "walltime"]:
+            restored_time = sum(get_seconds(run, title) for run in runs[:-1])
+            self.assertGreaterEqual(get_seconds(result, title), restored_time)
+
+    def test_result_cache(self):
+        benchmark_xml = os.path.join(self.benchmarks_dir, "benchmark-example-true.xml")
+        cache_dir = os.path.join(self.tmp, "cache")
+        args = [
+            benchmark_xml,
+            "--no-compress-results",
+            "--rundefinition",
+            "no options",
+            "--result-cache",
+            cache_dir,
+        ]
+        result_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+        self.run_cmd(*args)
+        expected_runs = ElementTree.ElementTree().parse(result_xml).findall("run")
+        shutil.rmtree(self.output_dir)
+        os.mkdir(self.output_dir)
+
+        self.run_cmd(*args)
+        actual_runs = ElementTree.ElementTree().parse(result_xml).findall("run")
+        self.assertEqual(len(expected_runs), len(actual_runs))
+        for expected_run, actual_run in zip(expected_runs, actual_runs):
+            for title in ["status", "category", "cputime", "walltime"]:
+                self.assertEqual(
+                    expected_run.find(f"column[@title='{title}']").attrib,
+                    actual_run.find(f"column[@title='{title}']").attrib,
+                )
+            self.assertEqual(
+                actual_run.find("column[@title='resultcache']").get("value"),
+                "reused",
+            )
+
+    def test_shards(self):
+        benchmark_xml = os.path.join(self.benchmarks_dir, "benchmark-example-true.xml")
+        args = [benchmark_xml, "--no-compress-results", "--rundefinition", "no options"]
+        shard_dirs = [
+            os.path.join(self.tmp, "shard1"),
+            os.path.join(self.tmp, "shard2"),
+        ]
+        for i, shard_dir in enumerate(shard_dirs, start=1):
+            self.run_cmd(*args, "--shard", f"{i}/2", "--outputpath", shard_dir + "/")
+        self.run_cmd(
+            *args, "--merge-shards", shard_dirs[0], "--merge-shards", shard_dirs[1]
+        )
+        # same depth as the usual output directory such that relative paths match
+        single_dir = os.path.join(os.path.dirname(self.output_dir), "single")
+        self.run_cmd(*args, "--outputpath", single_dir + "/")
+
+        shard_runs = []
+        for shard_dir in shard_dirs:
+            result_xml = glob.glob(os.path.join(shard_dir, "*.results.no options.xml"))
+            shard_runs += ElementTree.ElementTree().parse(result_xml[0]).findall("run")
+        merged_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+        merged_runs = ElementTree.ElementTree().parse(merged_xml).findall("run")
+        single_xml = os.path.join(
+            single_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+        single_runs = ElementTree.ElementTree().parse(single_xml).findall("run")
+
+        self.assertEqual(len(shard_runs), len(single_runs))
+        self.assertEqual(
+            [run.attrib for run in single_runs], [run.attrib for run in merged_runs]
+        )
+        for run in merged_runs:
+            self.assertIsNotNone(run.find("column[@title='status']"), run.attrib)
+
+    def test_distributed(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            address = f"127.0.0.1:{s.getsockname()[1]}"
+        worker_cmd = [
+            os.path.join(bin_dir, "benchexec-worker"),
+            address,
+            "--container",
+            "--read-only-dir",
+            "/",
+            "--read-only-dir",
+            os.path.normpath(base_dir),
+        ]
+        workers = [
+            subprocess.Popen(
+                worker_cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            for _ in range(2)
+        ]
+        try:
+            self.run_benchexec_and_compare_expected_files("--coordinator", address)
+        finally:
+            for worker in workers:
+                worker.terminate()
+                worker.wait()
+
+        result_xml = os.path.join(
+            self.output_dir,
+            "benchmark-example-rand.2015-01-01_00-00-00.results.xml",
+        )
+        runs = ElementTree.ElementTree().parse(result_xml).findall("run")
+        self.assertTrue(runs)
+        for run in runs:
+            self.assertIsNotNone(run.find("column[@title='status']"), run.attrib)
+            self.assertIsNotNone(run.find("column[@title='host']"), run.attrib)
+
     def test_description(self):
         test_description = """
             äöüß     This tests non-ASCII characters, line breaks, whitespace, and
@@ -0,0 +1,110 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+from benchexec import intel_cpu_energy
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+MAX_ENERGY_RANGE = 1000000000
+
+
+class TestRaplEnergyMeasurement(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_intel_cpu_energy_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.add_zone("intel-rapl:0", "package-0")
+        self.add_zone("intel-rapl:0:0", "core")
+        self.add_zone("intel-rapl:0:1", "dram")
+        self.add_zone("intel-rapl:1", "package-1")
+        self.add_zone("intel-rapl:2", "psys")
+
+    def add_zone(self, zone, name, energy=0):
+        zone_dir = os.path.join(self.base_dir, zone)
+        os.mkdir(zone_dir)
+        self.write_zone_file(zone, "name", name)
+        self.write_zone_file(zone, "max_energy_range_uj", MAX_ENERGY_RANGE)
+        self.set_energy(zone, energy)
+
+    def write_zone_file(self, zone, name, value):
+        with open(os.path.join(self.base_dir, zone, name), "w") as f:
+            f.write(f"{value}\n")
+
+    def set_energy(self, zone, energy):
+        self.write_zone_file(zone, "energy_uj", energy)
+
+    def create_measurement(self):
+        counters = intel_cpu_energy._PowercapCounters.find(self.base_dir)
+        self.assertIsNotNone(counters)
+        return intel_cpu_energy.RaplEnergyMeasurement(counters, sample_interval=1000)
+
+    def test_find_domains(self):
+        counters = intel_cpu_energy._PowercapCounters.find(self.base_dir)
+        self.assertListEqual(
+            counters.domains, [(0, "package"), (0, "core"), (0, "dram"), (1, "package")]
+        )
+
+    def test_no_zones(self):
+        self.assertIsNone(
+            intel_cpu_energy._PowercapCounters.find(
+                os.path.join(self.base_dir, "nonexisting")
+            )
+        )
+
+    def test_measurement(self):
+        measurement = self.create_measurement()
+        self.set_energy("intel-rapl:0", 1000)
+        measurement.start()
+        self.assertTrue(measurement.is_running())
+        self.set_energy("intel-rapl:0", 3501000)
+        self.set_energy("intel-rapl:0:0", 2000000)
+        self.set_energy("intel-rapl:1", 250000)
+        energy = measurement.stop()
+        self.assertFalse(measurement.is_running())
+
+        self.assertEqual(energy[0]["package"], Decimal("3.5"))
+        self.assertEqual(energy[0]["core"], Decimal(2))
+        self.assertEqual(energy[0]["dram"], Decimal(0))
+        self.assertEqual(energy[1]["package"], Decimal("0.25"))
+        self.assertNotIn(2, energy)
+
+    def test_wraparound(self):
+        measurement = self.create_measurement()
+        self.set_energy("intel-rapl:0", MAX_ENERGY_RANGE - 1000000)
+        measurement.start()
+        self.set_energy("intel-rapl:0", 2000000)
+        energy = measurement.stop()
+        self.assertEqual(energy[0]["package"], Decimal(3))
+
+    def test_repeated_sampling(self):
+        measurement = self.create_measurement()
+        measurement.start()
+        # Multiple wrap-arounds are only noticed if sampled in between.
+        for i in range(1, 5):
+            self.set_energy("intel-rapl:0", (i % 2) * MAX_ENERGY_RANGE // 2)
+            measurement.sample()
+        energy = measurement.stop()
+        self.assertEqual(energy[0]["package"], Decimal(2 * MAX_ENERGY_RANGE) / 10**6)
+
+    def test_stop_without_start(self):
+        self.assertIsNone(self.create_measurement().stop())
+
+    def test_format_energy_results(self):
+        measurement = self.create_measurement()
+        measurement.start()
+        self.set_energy("intel-rapl:0", 1000000)
+        result = intel_cpu_energy.format_energy_results(measurement.stop())
+        self.assertEqual(result["cpuenergy"], Decimal(1))
+        self.assertEqual(result["cpuenergy-pkg0-package"], Decimal(1))
+        self.assertEqual(result["cpuenergy-pkg0-core"], Decimal(0))
+        self.assertEqual(result["cpuenergy-pkg1-package"], Decimal(0))
@@ -0,0 +1,95 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+from benchexec import cgroups
+from benchexec import perfevents
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+TASK_CLOCK = ("task-clock", 1, 1)
+
+
+class TestPerfEvents(unittest.TestCase):
+    def test_read_counter(self):
+        try:
+            fd = perfevents._open_counter(TASK_CLOCK, 0, -1)  # current thread
+        except OSError as e:
+            self.skipTest(f"perf_event_open not available: {e.strerror}")
+        try:
+            sum(range(100000))
+            first = perfevents._read_counter(fd)
+            sum(range(100000))
+            second = perfevents._read_counter(fd)
+        finally:
+            os.close(fd)
+        self.assertGreater(first, 0)
+        self.assertGreater(second, first)
+
+    def test_multiplexed_counter(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            # value, time enabled, time running: counted only for a quarter
+            os.write(write_fd, perfevents._COUNTER_VALUE.pack(100, 2000, 500))
+            self.assertEqual(perfevents._read_counter(read_fd), 400)
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+
+class TestPerfEventMeasurement(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        my_cgroups = cgroups.find_my_cgroups()
+        if not my_cgroups.require_subsystem(cgroups.PERF_EVENT, logging.debug):
+            self.skipTest("perf_event cgroup not available")
+        self.events = perfevents.find_supported_events(my_cgroups[cgroups.PERF_EVENT])
+        if not self.events:
+            self.skipTest("cannot count perf events for cgroups")
+        self.cgroup = my_cgroups.create_fresh_child_cgroup(cgroups.PERF_EVENT)
+        self.addCleanup(self.cgroup.remove)
+
+    def test_software_events_supported(self):
+        names = [event[0] for event in self.events]
+        for name in ["context-switches", "page-faults", "task-clock"]:
+            self.assertIn(name, names)
+
+    def test_measurement(self):
+        measurement = perfevents.PerfEventMeasurement(
+            self.cgroup[cgroups.PERF_EVENT], self.events
+        )
+        measurement.start()
+        sum(range(100000))  # not counted, we are not in the cgroup
+        subprocess.run(
+            [sys.executable, "-c", "sum(range(100000))"],
+            preexec_fn=lambda: self.cgroup.add_task(os.getpid()),
+            check=True,
+        )
+        result = measurement.stop()
+
+        self.assertGreater(result["perf-task-clock"], 0)
+        self.assertLess(result["perf-task-clock"], 10)
+        self.assertGreater(result["perf-page-faults"], 0)
+        for event in self.events:
+            self.assertIn("perf-" + event[0], result)
+
+    def test_stop_closes_counters(self):
+        measurement = perfevents.PerfEventMeasurement(
+            self.cgroup[cgroups.PERF_EVENT], self.events
+        )
+        measurement.start()
+        fds = [fd for fds in measurement._counters.values() for fd in fds]
+        measurement.stop()
+        for fd in fds:
+            self.assertRaises(OSError, os.fstat, fd)
+        self.assertDictEqual(measurement.stop(), {})
@@ -10,11 +10,16 @@
 """
 import json
 import copy
+import glob
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 from subprocess import CalledProcessError
 from unittest.mock import patch, MagicMock
-from benchexec.pqos import Pqos
+from benchexec import util
+from benchexec.pqos import Pqos, _Resctrl
 
 
 mock_pqos_wrapper_output = {
@@ -151,6 +156,12 @@ class TestPqos(unittest.TestCase):
     def setUpClass(cls):
         logging.disable(logging.CRITICAL)
 
+    def setUp(self):
+        # do not fall back to resctrl if it is available on this system
+        resctrl_patcher = patch("benchexec.pqos._Resctrl.find", return_value=None)
+        resctrl_patcher.start()
+        self.addCleanup(resctrl_patcher.stop)
+
     @patch("benchexec.pqos.find_executable2", return_value="/path/to/pqos_wrapper/lib")
     def test_pqos_init(self, mock_find_executable):
         """
@@ -366,3 +377,163 @@ class TestPqos(unittest.TestCase):
         """
         ret = Pqos.convert_core_list([[0, 1], [2, 3]])
         self.assertEqual(ret, "[[0,1],[2,3]]")
+
+
+_real_mkdir = os.mkdir
+_real_rmdir = os.rmdir
+_real_find = _Resctrl.find
+
+
+def fake_resctrl_mkdir(path, *args, **kwargs):
+    """
+    Create a directory like the kernel does in the resctrl file system
+    """
+    _real_mkdir(path, *args, **kwargs)
+    util.write_file("", path, "cpus_list")
+    _real_mkdir(os.path.join(path, "mon_data"))
+    for domain in ["mon_L3_00", "mon_L3_01"]:
+        _real_mkdir(os.path.join(path, "mon_data", domain))
+        for feature in ["llc_occupancy", "mbm_local_bytes", "mbm_total_bytes"]:
+            util.write_file("0", path, "mon_data", domain, feature)
+    if os.path.basename(os.path.dirname(path)) != "mon_groups":
+        _real_mkdir(os.path.join(path, "mon_groups"))
+
+
+def fake_resctrl_rmdir(path):
+    """
+    Remove a directory with its content like the kernel does in resctrl file system
+    """
+    for parent, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            os.remove(os.path.join(parent, name))
+        for name in dirs:
+            _real_rmdir(os.path.join(parent, name))
+    _real_rmdir(path)
+
+
+class TestResctrl(unittest.TestCase):
+    """
+    Unit tests for cache allocation and monitoring with resctrl
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_pqos_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        os.makedirs(os.path.join(self.base_dir, "info", "L3"))
+        os.makedirs(os.path.join(self.base_dir, "info", "L3_MON"))
+        os.makedirs(os.path.join(self.base_dir, "mon_groups"))
+        util.write_file("fff", self.base_dir, "info", "L3", "cbm_mask")
+        util.write_file("1", self.base_dir, "info", "L3", "min_cbm_bits")
+        util.write_file("4", self.base_dir, "info", "L3", "num_closids")
+        util.write_file(
+            "    L3:0=fff;1=fff\n    MB:0=100;1=100\n", self.base_dir, "schemata"
+        )
+        for patcher in [
+            patch("benchexec.pqos.os.mkdir", side_effect=fake_resctrl_mkdir),
+            patch("benchexec.pqos.os.rmdir", side_effect=fake_resctrl_rmdir),
+            patch("benchexec.pqos._Resctrl.find", return_value=_Resctrl(self.base_dir)),
+            patch("benchexec.pqos.find_executable2", return_value=None),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def groups(self, *pattern):
+        return sorted(glob.glob(os.path.join(self.base_dir, *pattern, "benchexec_*")))
+
+    def test_find(self):
+        self.assertIsNotNone(_real_find(self.base_dir))
+        self.assertIsNone(_real_find(os.path.join(self.base_dir, "nonexisting")))
+
+    @patch("benchexec.pqos.find_executable2", return_value="/path/to/pqos_wrapper/lib")
+    def test_pqos_wrapper_is_preferred(self, mock_find_executable):
+        pqos = Pqos()
+        self.assertIsNone(pqos.resctrl)
+        self.assertIsNotNone(pqos.executable_path)
+
+    def test_allocate_l3ca(self):
+        pqos = Pqos()
+        pqos.allocate_l3ca([[0, 1], [2, 3]])
+        self.assertTrue(pqos.reset_required)
+        groups = self.groups()
+        self.assertEqual(len(groups), 2)
+        self.assertEqual(util.read_file(groups[0], "cpus_list"), "0,1")
+        self.assertEqual(util.read_file(groups[0], "schemata"), "L3:0=3f;1=3f")
+        self.assertEqual(util.read_file(groups[1], "cpus_list"), "2,3")
+        self.assertEqual(util.read_file(groups[1], "schemata"), "L3:0=fc0;1=fc0")
+
+        pqos.reset_resources()
+        self.assertFalse(pqos.reset_required)
+        self.assertListEqual(self.groups(), [])
+
+    def test_allocate_l3ca_not_enough_closids(self):
+        pqos = Pqos()
+        pqos.allocate_l3ca([[0], [1], [2], [3]])
+        self.assertFalse(pqos.reset_required)
+        self.assertListEqual(self.groups(), [])
+
+    def test_monitoring(self):
+        pqos = Pqos()
+        pqos.start_monitoring([[0, 1]])
+        groups = self.groups("mon_groups")
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(util.read_file(groups[0], "cpus_list"), "0,1")
+        for domain in ["mon_L3_00", "mon_L3_01"]:
+            util.write_file("524288", groups[0], "mon_data", domain, "llc_occupancy")
+            util.write_file("1048576", groups[0], "mon_data", domain, "mbm_total_bytes")
+
+        mon_data = pqos.stop_monitoring()
+        self.assertListEqual(self.groups("mon_groups"), [])
+        self.assertEqual(mon_data["llc_avg"], 512)
+        self.assertEqual(mon_data["llc_max"], 1024)
+        self.assertGreater(mon_data["mbm_total_avg"], 0)
+        self.assertGreaterEqual(mon_data["mbm_total_max"], mon_data["mbm_total_avg"])
+        self.assertEqual(mon_data["mbm_local_avg"], 0)
+        self.assertSetEqual(
+            set(mon_data),
+            {
+                "llc_avg",
+                "llc_max",
+                "mbm_local_avg",
+                "mbm_local_max",
+                "mbm_total_avg",
+                "mbm_total_max",
+            },
+        )
+
+    def test_monitoring_unavailable_counter(self):
+        pqos = Pqos()
+        pqos.start_monitoring([[0, 1]])
+        group = self.groups("mon_groups")[0]
+        util.write_file(
+            "Unavailable", group, "mon_data", "mon_L3_00", "mbm_local_bytes"
+        )
+        mon_data = pqos.stop_monitoring()
+        self.assertIn("llc_avg", mon_data)
+        self.assertNotIn("mbm_local_avg", mon_data)
+
+    def test_monitoring_with_l3ca(self):
+        pqos = Pqos()
+        pqos.allocate_l3ca([[0, 1], [2, 3]])
+        pqos.start_monitoring([[2, 3]])
+        l3ca_group = self.groups()[1]
+        self.assertEqual(len(self.groups(l3ca_group, "mon_groups")), 1)
+        self.assertIn("llc_avg", pqos.stop_monitoring())
+        self.assertListEqual(self.groups(l3ca_group, "mon_groups"), [])
+        pqos.reset_resources()
+
+    def test_reset_monitoring(self):
+        stale_group = os.path.join(
+            self.base_dir, "mon_groups", "benchexec_4194305_mon0"
+        )
+        own_group = os.path.join(
+            self.base_dir, "mon_groups", f"benchexec_{os.getpid()}_mon0"
+        )
+        os.mkdir(stale_group)
+        os.mkdir(own_group)
+        Pqos().reset_monitoring()
+        self.assertFalse(os.path.exists(stale_group))
+        self.assertTrue(os.path.exists(own_group))
@@ -0,0 +1,136 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchexec import cgroups
+from benchexec import resources
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+GB = 1024 * 1024 * 1024
+
+MEMINFO = """MemTotal:       {total} kB
+MemFree:        {available} kB
+MemAvailable:   {available} kB
+"""
+
+VMSTAT = """pgpgin 1
+pswpin {swapin}
+pswpout 0
+"""
+
+PRESSURE = """some avg10={pressure:.2f} avg60=0.00 avg300=0.00 total=0
+full avg10=0.00 avg60=0.00 avg300=0.00 total=0
+"""
+
+
+class FakeCgroups(object):
+    """Provides the memory values of the cgroup API that admission control uses."""
+
+    def __init__(self, limit, usage, inactive_file=0):
+        self.limit = limit
+        self.usage = usage
+        self.inactive_file = inactive_file
+
+    def __contains__(self, subsystem):
+        return subsystem == cgroups.MEMORY
+
+    def read_memory_limit(self):
+        return self.limit
+
+    def read_memory_usage(self):
+        return max(0, self.usage - self.inactive_file)
+
+
+class TestMemoryAdmissionControl(unittest.TestCase):
+    def setUp(self):
+        self.proc_dir = tempfile.mkdtemp(prefix="BenchExec_test_resources_")
+        files = {
+            "_MEMINFO_FILE": "meminfo",
+            "_VMSTAT_FILE": "vmstat",
+            "_MEMORY_PRESSURE_FILE": "pressure_memory",
+        }
+        for constant, name in files.items():
+            patcher = patch.object(
+                resources, constant, os.path.join(self.proc_dir, name)
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.write_proc_files()
+
+    def tearDown(self):
+        shutil.rmtree(self.proc_dir)
+
+    def write_proc_files(
+        self, total=16 * GB, available=16 * GB, swapin=0, pressure=0.0
+    ):
+        contents = {
+            "meminfo": MEMINFO.format(total=total // 1024, available=available // 1024),
+            "vmstat": VMSTAT.format(swapin=swapin),
+            "pressure_memory": PRESSURE.format(pressure=pressure),
+        }
+        for name, content in contents.items():
+            with open(os.path.join(self.proc_dir, name), "w") as f:
+                f.write(content)
+
+    def test_capacity_is_limited_by_cgroup(self):
+        admission = resources.MemoryAdmissionControl(GB, FakeCgroups(8 * GB, 0))
+        self.assertEqual(admission.capacity, 8 * GB)
+        admission = resources.MemoryAdmissionControl(GB, FakeCgroups(64 * GB, 0))
+        self.assertEqual(admission.capacity, 16 * GB)
+
+    def test_free_memory(self):
+        my_cgroups = FakeCgroups(8 * GB, 5 * GB, inactive_file=2 * GB)
+        admission = resources.MemoryAdmissionControl(GB, my_cgroups)
+        self.assertEqual(admission.get_free_memory(), 5 * GB)
+
+        self.write_proc_files(available=4 * GB)
+        self.assertEqual(admission.get_free_memory(), 4 * GB)
+
+    def test_admit_while_memory_is_free(self):
+        my_cgroups = FakeCgroups(8 * GB, 5 * GB)
+        admission = resources.MemoryAdmissionControl(2 * GB, my_cgroups)
+        self.assertTrue(admission.may_admit(running_runs=4))
+        # the run that was just admitted is assumed to need the margin
+        self.assertFalse(admission.may_admit(running_runs=5))
+
+        my_cgroups.usage = 7 * GB
+        admission = resources.MemoryAdmissionControl(2 * GB, my_cgroups)
+        self.assertFalse(admission.may_admit(running_runs=4))
+
+    def test_admit_after_settle_time(self):
+        admission = resources.MemoryAdmissionControl(6 * GB, FakeCgroups(8 * GB, 0))
+        with patch.object(resources.time, "monotonic", return_value=100):
+            self.assertTrue(admission.may_admit(running_runs=1))
+            self.assertFalse(admission.may_admit(running_runs=2))
+        with patch.object(resources.time, "monotonic", return_value=110):
+            self.assertTrue(admission.may_admit(running_runs=2))
+
+    def test_no_admission_after_swapping(self):
+        admission = resources.MemoryAdmissionControl(GB, FakeCgroups(8 * GB, 0))
+        self.write_proc_files(swapin=10)
+        self.assertFalse(admission.may_admit(running_runs=1))
+        # no further swapping since last check
+        self.assertTrue(admission.may_admit(running_runs=1))
+
+    def test_no_admission_under_memory_pressure(self):
+        admission = resources.MemoryAdmissionControl(GB, FakeCgroups(8 * GB, 0))
+        self.write_proc_files(pressure=25.0)
+        self.assertFalse(admission.may_admit(running_runs=1))
+        os.remove(os.path.join(self.proc_dir, "pressure_memory"))
+        self.assertTrue(admission.may_admit(running_runs=1))
+
+    def test_always_admit_if_nothing_runs(self):
+        admission = resources.MemoryAdmissionControl(GB, FakeCgroups(8 * GB, 8 * GB))
+        self.write_proc_files(swapin=10, pressure=25.0)
+        self.assertTrue(admission.may_admit(running_runs=0))
@@ -0,0 +1,150 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime
+import decimal
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+from benchexec import resultcache
+from benchexec import util
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestResultCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+        logging.disable(logging.CRITICAL)
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_resultcache_")
+        self.cache_dir = os.path.join(self.base_dir, "cache")
+        self.log_file = os.path.join(self.base_dir, "run.log")
+        self.write_file(self.log_file, "output of tool")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def write_file(self, name, content):
+        with open(os.path.join(self.base_dir, name), "w") as f:
+            f.write(content)
+
+    def make_run(
+        self, options=(), memlimit=None, containerargs={}, files_count_limit=None
+    ):
+        self.write_file("tool", "#!/bin/sh")
+        self.write_file("task.c", "int main() {}")
+        benchmark = types.SimpleNamespace(
+            executable=os.path.join(self.base_dir, "tool"),
+            tool=types.SimpleNamespace(program_files=lambda executable: [executable]),
+            rlimits=(None, memlimit),
+            environment=lambda: {},
+            working_directory=lambda: None,
+            config=types.SimpleNamespace(
+                containerargs={"use_namespaces": True, **containerargs},
+                filesCountLimit=files_count_limit,
+                filesSizeLimit=None,
+                maxLogfileSize=None,
+            ),
+        )
+        task = os.path.join(self.base_dir, "task.c")
+        return types.SimpleNamespace(
+            runSet=types.SimpleNamespace(benchmark=benchmark),
+            cmdline=lambda: [benchmark.executable, *options, task],
+            sourcefiles=[task],
+            required_files=[],
+        )
+
+    def test_store_and_lookup(self):
+        cache = resultcache.ResultCache(self.cache_dir)
+        values = {
+            "walltime": 1.5,
+            "cputime": 1.25,
+            "memory": 4096,
+            "exitcode": util.ProcessExitCode.from_raw(9),
+            "terminationreason": "cputime",
+            "starttime": datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc),
+            "cpuenergy": {0: {"package": decimal.Decimal("12.5")}},
+        }
+        cache.store("abcdef", values, "TIMEOUT", self.log_file)
+
+        new_log_file = os.path.join(self.base_dir, "logs", "new.log")
+        cached_values, status = cache.lookup("abcdef", new_log_file)
+        self.assertEqual(cached_values, values)
+        self.assertEqual(status, "TIMEOUT")
+        self.assertEqual(util.read_file(new_log_file), "output of tool")
+
+        self.assertIsNone(cache.lookup("012345", new_log_file))
+
+    def test_lookup_invalid_entry(self):
+        cache = resultcache.ResultCache(self.cache_dir)
+        os.makedirs(os.path.join(self.cache_dir, "ab", "abcdef"))
+        self.write_file(os.path.join(self.cache_dir, "ab", "abcdef", "result.json"), "")
+        self.assertIsNone(cache.lookup("abcdef", self.log_file))
+
+    def test_key(self):
+        cache = resultcache.ResultCache(self.cache_dir)
+        key = cache.get_key(self.make_run())
+        self.assertEqual(key, cache.get_key(self.make_run()))
+        self.assertNotEqual(key, cache.get_key(self.make_run(options=["-x"])))
+        self.assertNotEqual(key, cache.get_key(self.make_run(memlimit=1000)))
+        self.assertNotEqual(
+            key, cache.get_key(self.make_run(containerargs={"use_namespaces": False}))
+        )
+        self.assertNotEqual(
+            key, cache.get_key(self.make_run(containerargs={"network_access": True}))
+        )
+        self.assertNotEqual(key, cache.get_key(self.make_run(files_count_limit=10)))
+
+        run = self.make_run()
+        self.write_file("task.c", "int main() { return 1; }")
+        self.assertNotEqual(key, cache.get_key(run))
+
+    def test_key_depends_on_program_files(self):
+        run = self.make_run()
+        key = resultcache.ResultCache(self.cache_dir).get_key(run)
+        self.write_file("tool", "#!/bin/bash")
+        self.assertNotEqual(key, resultcache.ResultCache(self.cache_dir).get_key(run))
+
+    def test_evict_by_age(self):
+        cache = resultcache.ResultCache(self.cache_dir, max_age=60)
+        cache.store("aa0000", {}, "true", self.log_file)
+        cache.store("bb0000", {}, "true", self.log_file)
+        old = time.time() - 120
+        os.utime(
+            os.path.join(self.cache_dir, "aa", "aa0000", "result.json"), (old, old)
+        )
+
+        cache.evict()
+        self.assertIsNone(cache.lookup("aa0000", self.log_file))
+        self.assertIsNotNone(cache.lookup("bb0000", self.log_file))
+
+    def test_evict_by_size(self):
+        cache = resultcache.ResultCache(self.cache_dir)
+        for i, key in enumerate(["aa0000", "bb0000", "cc0000"]):
+            cache.store(key, {}, "true", self.log_file)
+            result_file = os.path.join(self.cache_dir, key[:2], key, "result.json")
+            os.utime(result_file, (1000 + i, 1000 + i))
+        entry_size = sum(
+            f.stat().st_size
+            for f in os.scandir(os.path.join(self.cache_dir, "aa", "aa0000"))
+        )
+
+        cache.max_size = 2 * entry_size
+        cache.evict()
+        self.assertIsNone(cache.lookup("aa0000", self.log_file))
+        self.assertIsNotNone(cache.lookup("bb0000", self.log_file))
+        self.assertIsNotNone(cache.lookup("cc0000", self.log_file))
@@ -0,0 +1,161 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from benchexec import runexecserver
+from benchexec.runexecutor import RunExecutor
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestCoreAllocator(unittest.TestCase):
+    def setUp(self):
+        self.allocator = runexecserver._CoreAllocator([0, 1, 2, 3])
+
+    def acquire_in_thread(self, *args):
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(self.allocator.acquire(*args))
+        )
+        thread.start()
+        thread.join(0.1)
+        return thread, result
+
+    def test_disjoint_cores(self):
+        self.assertSetEqual(self.allocator.acquire([1, 2]), {1, 2})
+        self.assertSetEqual(self.allocator.acquire(None, 2), {0, 3})
+
+        thread, result = self.acquire_in_thread([0])
+        self.assertTrue(thread.is_alive(), "core 0 was reserved twice")
+        self.allocator.release({0, 3})
+        thread.join()
+        self.assertListEqual(result, [{0}])
+
+    def test_exclusive(self):
+        self.allocator.acquire([3])
+        thread, result = self.acquire_in_thread()
+        self.assertTrue(thread.is_alive(), "exclusive reservation while core in use")
+        self.allocator.release({3})
+        thread.join()
+        self.assertListEqual(result, [None])
+
+        thread, result = self.acquire_in_thread(None, 1)
+        self.assertTrue(thread.is_alive(), "core reserved during exclusive run")
+        self.allocator.release(None)
+        thread.join()
+        self.assertListEqual(result, [{0}])
+
+    def test_invalid_requests(self):
+        self.assertRaises(ValueError, self.allocator.acquire, [4])
+        self.assertRaises(ValueError, self.allocator.acquire, [])
+        self.assertRaises(ValueError, self.allocator.acquire, None, 5)
+        self.assertRaises(ValueError, self.allocator.acquire, None, 0)
+        self.assertRaises(ValueError, self.allocator.acquire, None, True)
+
+
+class TestRunExecServer(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_runexecserver_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        try:
+            self.server = runexecserver.RunExecServer(
+                lambda: RunExecutor(use_namespaces=False),
+                default_run_args={"output_filename": self.path("output.log")},
+            )
+        except SystemExit as e:
+            self.skipTest(e)
+
+    def path(self, name):
+        return os.path.join(self.base_dir, name)
+
+    def serve(self, *requests):
+        input_stream = io.StringIO(
+            "".join(
+                (request if isinstance(request, str) else json.dumps(request)) + "\n"
+                for request in requests
+            )
+        )
+        output_stream = io.StringIO()
+        self.server.serve_stream(input_stream, output_stream)
+        responses = [
+            json.loads(line) for line in output_stream.getvalue().split("\n")[:-1]
+        ]
+        return {response["id"]: response for response in responses}
+
+    def test_runs(self):
+        responses = self.serve(
+            {"id": 1, "args": ["sh", "-c", "echo hello"], "cpu_cores": 1},
+            {
+                "id": 2,
+                "args": ["sh", "-c", "exit 3"],
+                "output_filename": self.path("2"),
+            },
+        )
+        self.assertEqual(responses[1]["result"]["returnvalue"], 0)
+        self.assertIn("walltime", responses[1]["result"])
+        self.assertIn("cputime", responses[1]["result"])
+        self.assertEqual(responses[2]["result"]["returnvalue"], 3)
+        with open(self.path("output.log")) as output:
+            self.assertEqual(output.read().splitlines()[-1], "hello")
+        self.assertTrue(os.path.exists(self.path("2")))
+
+    def test_input(self):
+        with open(self.path("input"), "w") as input_file:
+            input_file.write("TEST_TOKEN\n")
+        self.serve({"id": 1, "args": ["cat"], "input": self.path("input")})
+        with open(self.path("output.log")) as output:
+            self.assertEqual(output.read().splitlines()[-1], "TEST_TOKEN")
+
+    def test_invalid_requests(self):
+        responses = self.serve(
+            "no JSON",
+            {"id": 1},
+            {"id": 2, "args": ["true"], "unknown": True},
+            {"id": 3, "args": ["true"], "cores": [0], "cpu_cores": 1},
+            {"id": 4, "args": ["true"], "memlimit": -1},
+            {"id": 5, "args": "echo hi"},
+            {"id": 6, "args": ["true"], "cores": 5},
+            {"id": 7, "args": ["true"], "cores": ["0"]},
+            {"id": 8, "args": ["true"], "cpu_cores": True},
+            {"id": 9, "args": ["true"], "cpu_cores": "1"},
+        )
+        self.assertEqual(len(responses), 10)
+        for response in responses.values():
+            self.assertNotIn("result", response)
+            self.assertIn("error", response)
+        self.assertEqual(responses[4]["error"], "Invalid memory limit -1.")
+
+    def test_socket(self):
+        socket_path = self.path("socket")
+        server_thread = threading.Thread(
+            target=self.server.serve_socket, args=(socket_path,)
+        )
+        server_thread.start()
+        try:
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+                client.sendall(b'{"id": "a", "args": ["true"]}\n')
+                client.shutdown(socket.SHUT_WR)
+                response = json.loads(client.makefile().readline())
+            self.assertEqual(response["id"], "a")
+            self.assertEqual(response["result"]["returnvalue"], 0)
+        finally:
+            self.server.stop()
+            server_thread.join()
+        self.assertFalse(os.path.exists(socket_path))
@@ -15,11 +15,13 @@ import tempfile
 import threading
 import time
 import unittest
+import unittest.mock
 import shutil
 
 from benchexec import container
 from benchexec import containerexecutor
 from benchexec import filehierarchylimit
+from benchexec import perfevents
 from benchexec.runexecutor import RunExecutor
 from benchexec import runexecutor
 from benchexec import util
@@ -154,6 +156,12 @@ class TestRunExecutor(unittest.TestCase):
             "blkio-read",
             "blkio-write",
             "starttime",
+            "cpu-throttled",
+            "swapped",
+            "cpufreq-min",
+            "cpufreq-avg",
+            "cpufreq-max",
+            "loadavg-max",
         }
         expected_keys.update(additional_keys)
         for key in result.keys():
@@ -169,6 +177,18 @@ class TestRunExecutor(unittest.TestCase):
                     "^cpuenergy-pkg[0-9]+-(package|core|uncore|dram|psys)$",
                     f"unexpected result entry '{key}={result[key]}'",
                 )
+            elif key.startswith("overhead-"):
+                self.assertRegex(
+                    key,
+                    "^overhead-[a-z-]+$",
+                    f"unexpected result entry '{key}={result[key]}'",
+                )
+            elif key.startswith("perf-"):
+                self.assertIn(
+                    key[len("perf-") :],
+                    [event[0] for event in perfevents.ALL_EVENTS],
+                    f"unexpected result entry '{key}={result[key]}'",
+                )
             else:
                 self.assertIn(
                     key,
@@ -255,6 +275,81 @@ class TestRunExecutor(unittest.TestCase):
             )
         self.check_result_keys(result)
 
+    def test_overhead_of_trivial_run(self):
+        """
+        Regression test for the overhead of measuring the CPU time of a run:
+        if the cgroup of the run is empty afterwards,
+        the measurements need to be taken without waiting for values to settle.
+        """
+        if not os.path.exists("/bin/true"):
+            self.skipTest("missing /bin/true")
+        self.setUp(measure_overhead=True)
+        if runexecutor.CPUACCT not in self.runexecutor.cgroups:
+            self.skipTest("cpuacct cgroup not available")
+
+        cgroup_class = type(self.runexecutor.cgroups)
+        is_empty = cgroup_class.is_empty
+        emptiness = []
+        checked_runs = 0
+
+        def record_is_empty(cgroups):
+            emptiness.append(is_empty(cgroups))
+            return emptiness[-1]
+
+        with unittest.mock.patch.object(cgroup_class, "is_empty", record_is_empty):
+            for _ in range(5):
+                emptiness.clear()
+                (result, _) = self.execute_run("/bin/true")
+                if not any(emptiness):
+                    continue
+                checked_runs += 1
+                report = ", ".join(
+                    f"{key[len('overhead-') :]} {value * 1000:.1f}ms"
+                    for key, value in result.items()
+                    if key.startswith("overhead-")
+                )
+                # must be below the sleep of 0.1s that is necessary otherwise
+                self.assertLess(
+                    result["overhead-measurements"],
+                    0.1,
+                    f"measurements for empty cgroup are too slow: {report}",
+                )
+        if not checked_runs:
+            self.skipTest("cgroup of run was never empty")
+
+    def test_measure_overhead(self):
+        if not os.path.exists("/bin/true"):
+            self.skipTest("missing /bin/true")
+        self.setUp(measure_overhead=True)
+        phases = [
+            "cgroup-setup",
+            "tempdir-setup",
+            "container-setup",
+            "output-transfer",
+            "kill-tasks",
+            "measurements",
+            "cgroup-cleanup",
+            "tempdir-cleanup",
+        ]
+        overhead_keys = ["overhead-" + phase for phase in phases]
+        (result, _) = self.execute_run("/bin/true")
+        for key in overhead_keys:
+            self.assertIn(key, result)
+            self.assertGreaterEqual(result[key], 0)
+            self.assertLess(result[key], 10)
+
+    def test_perf_events(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        self.setUp(measure_perf_events=True)
+        if not self.runexecutor._perf_events:
+            self.skipTest("cannot count perf events")
+        (result, _) = self.execute_run("/bin/sh", "-c", "echo TEST_TOKEN")
+        self.assertGreater(result["perf-task-clock"], 0)
+        self.assertGreater(result["perf-page-faults"], 0)
+        if "perf-instructions" in result:
+            self.assertGreater(result["perf-instructions"], 0)
+
     def test_wrong_command(self):
         (result, _) = self.execute_run(
             "/does/not/exist", expect_terminationreason="failed"
@@ -551,6 +646,48 @@ class TestRunExecutor(unittest.TestCase):
         )
         self.assertEqual(output[-1], "/usr/bin")
 
+    def test_tool_is_process_group_leader(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (_, output) = self.execute_run(
+            "/bin/sh", "-c", "read -r stat < /proc/self/stat; echo $stat"
+        )
+        # format of /proc/self/stat is "pid (comm) state ppid pgrp ..."
+        stat = output[-1].split(" ")
+        self.assertEqual(stat[0], stat[4], "tool is not process-group leader")
+
+    def test_tool_starts_in_cgroups(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        cgroups = self.runexecutor.cgroups
+        if cgroups.paths:
+            if not cgroups.can_join_single_thread:
+                self.skipTest("posix_spawn cannot start tool in cgroups")
+            try:
+                cgroups.join_current_thread()()
+            except OSError as e:
+                self.skipTest(f"posix_spawn cannot start tool in cgroups: {e}")
+        with unittest.mock.patch.object(
+            os, "posix_spawn", wraps=os.posix_spawn
+        ) as posix_spawn:
+            (_, output) = self.execute_run("/bin/sh", "-c", "cat /proc/self/cgroup")
+        posix_spawn.assert_called_once()
+        if cgroups.paths:
+            self.assertTrue(
+                any("/benchmark_" in line for line in output), "tool not in cgroup"
+            )
+        with open("/proc/thread-self/cgroup") as own_cgroups:
+            self.assertNotIn("/benchmark_", own_cgroups.read())
+
+    def test_command_from_path(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (result, output) = self.execute_run(
+            "sh", "-c", "echo TEST_TOKEN", environments={"newEnv": {"PATH": "/bin"}}
+        )
+        self.check_exitcode(result, 0, "exit code of sh is not zero")
+        self.assertEqual(output[-1], "TEST_TOKEN")
+
     def test_stop_run(self):
         if not os.path.exists(self.sleep):
             self.skipTest("missing sleep")
@@ -632,6 +769,120 @@ class TestRunExecutor(unittest.TestCase):
         self.assertIn(self.REDUCE_WARNING_MSG, new_content)
         self.assertTrue(new_content.startswith(line))
 
+    def test_stream_output(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        self.setUp(stream_output=True)
+        line_count = 2000
+        (result, output) = self.execute_run(
+            "/bin/sh",
+            "-c",
+            f"i=1; while [ $i -le {line_count} ]; do echo line $i; i=$((i+1)); done",
+            maxLogfileSize=1000,
+        )
+        self.check_exitcode(result, 0, "exit code of shell is not zero")
+        self.assertIn(self.REDUCE_WARNING_MSG, output)
+        self.assertIn("line 1", output)
+        self.assertEqual(output[-1], f"line {line_count}")
+
+        kept_lines = [line for line in output if line.startswith("line ")]
+        self.assertLessEqual(len("\n".join(kept_lines)), 1000)
+        total_size = sum(len(f"line {i}\n") for i in range(1, line_count + 1))
+        kept_size = sum(len(line) + 1 for line in kept_lines)
+        self.assertIn(f"({total_size - kept_size} bytes were removed)", output)
+
+    def test_stream_output_not_shrunk(self):
+        if not os.path.exists(self.echo):
+            self.skipTest("missing echo")
+        self.setUp(stream_output=True)
+        (result, output) = self.execute_run(
+            self.echo, "TEST_TOKEN", maxLogfileSize=1000
+        )
+        self.check_exitcode(result, 0, "exit code of echo is not zero")
+        self.assertEqual(output[-1], "TEST_TOKEN", "run output misses command output")
+        self.assertNotIn(self.REDUCE_WARNING_MSG, output)
+
+    def execute_runs(self, *args_of_runs, **kwargs):
+        output_dir = tempfile.mkdtemp(prefix="BenchExec_test_execute_runs_")
+        self.addCleanup(shutil.rmtree, output_dir)
+        futures = self.runexecutor.execute_runs(
+            [
+                {"args": args, "output_filename": os.path.join(output_dir, str(i))}
+                for i, args in enumerate(args_of_runs)
+            ],
+            **kwargs,
+        )
+        results = []
+        for i, future in enumerate(futures):
+            result = future.result(timeout=120)
+            with open(os.path.join(output_dir, str(i))) as output_file:
+                results.append((result, output_file.read().splitlines()))
+        return results
+
+    def test_execute_runs(self):
+        if not os.path.exists(self.echo):
+            self.skipTest("missing echo")
+        results = self.execute_runs(
+            *[[self.echo, f"TEST_TOKEN_{i}"] for i in range(5)], parallel_runs=2
+        )
+        self.assertEqual(len(results), 5)
+        for i, (result, output) in enumerate(results):
+            self.check_exitcode(result, 0, "exit code of echo is not zero")
+            self.check_result_keys(result)
+            self.assertEqual(output[-1], f"TEST_TOKEN_{i}", "run output is wrong")
+
+    def test_execute_runs_in_parallel(self):
+        if not os.path.exists(self.sleep):
+            self.skipTest("missing sleep")
+        start = time.monotonic()
+        results = self.execute_runs(
+            [self.sleep, "1"], [self.sleep, "1"], parallel_runs=2
+        )
+        walltime = time.monotonic() - start
+        for result, _ in results:
+            self.check_exitcode(result, 0, "exit code of sleep is not zero")
+        self.assertLess(walltime, 1.9, "runs were not executed in parallel")
+
+    def test_execute_runs_with_cores(self):
+        if not os.path.exists(self.echo):
+            self.skipTest("missing echo")
+        if self.runexecutor.cpus is None:
+            self.skipTest("cannot limit cores without cpuset cgroup")
+        results = self.execute_runs(
+            [self.echo, "TEST_TOKEN"], [self.echo, "TEST_TOKEN"], cpu_cores_per_run=1
+        )
+        for result, output in results:
+            self.check_exitcode(result, 0, "exit code of echo is not zero")
+            cores = [key for key in result if key.startswith("cputime-cpu")]
+            self.assertLessEqual(len(cores), 1, "run used more than one core")
+
+    def test_execute_runs_after_stop(self):
+        if not os.path.exists(self.sleep) or not os.path.exists(self.echo):
+            self.skipTest("missing sleep or echo")
+        thread = _StopRunThread(1, self.runexecutor)
+        thread.start()
+        results = self.runexecutor.execute_runs(
+            [
+                {"args": [self.sleep, "10"], "output_filename": "/dev/null"},
+                {"args": [self.echo], "output_filename": "/dev/null"},
+            ]
+        )
+        thread.join()
+        result = results[0].result(timeout=120)
+        self.assertEqual(result.get("terminationreason"), "killed")
+        self.assertTrue(results[1].cancelled(), "run was started after stop()")
+
+        (result, output) = self.execute_runs([self.echo, "TEST_TOKEN"])[0]
+        self.check_exitcode(result, 0, "exit code of echo is not zero")
+        self.assertEqual(output[-1], "TEST_TOKEN", "run after stop() failed")
+
+    def test_execute_runs_with_cores_in_run(self):
+        self.assertRaises(
+            ValueError,
+            self.runexecutor.execute_runs,
+            [{"args": [self.echo], "output_filename": "/dev/null", "cores": [0]}],
+        )
+
     def test_append_crash_dump_info(self):
         if not os.path.exists("/bin/sh"):
             self.skipTest("missing /bin/sh")
@@ -901,6 +1152,9 @@ class TestRunExecutorWithContainer(TestRunExecutor):
     def test_no_cleanup_temp(self):
         self.skipTest("not relevant in container")
 
+    def test_tool_starts_in_cgroups(self):
+        self.skipTest("not relevant in container")
+
     def check_result_files(
         self, shell_cmd, result_files_patterns, expected_result_files
     ):
@@ -1059,6 +1313,7 @@ class TestRunExecutorWithContainer(TestRunExecutor):
             self.skipTest("missing /bin/sh")
         self.setUp(container_tmpfs=False)  # create RunExecutor with desired parameter
         filehierarchylimit._CHECK_INTERVAL_SECONDS = 0.1
+        filehierarchylimit._INCREMENTAL_CHECK_INTERVAL_SECONDS = 0.1
         (result, output) = self.execute_run(
             "/bin/sh",
             "-c",
@@ -1078,6 +1333,7 @@ class TestRunExecutorWithContainer(TestRunExecutor):
             self.skipTest("missing /bin/sh")
         self.setUp(container_tmpfs=False)  # create RunExecutor with desired parameter
         filehierarchylimit._CHECK_INTERVAL_SECONDS = 0.1
+        filehierarchylimit._INCREMENTAL_CHECK_INTERVAL_SECONDS = 0.1
         (result, output) = self.execute_run(
             "/bin/sh",
             "-c",
@@ -1144,6 +1400,77 @@ class TestRunExecutorWithContainer(TestRunExecutor):
             uptime, 10, f"Uptime {uptime}s unexpectedly low in container"
         )
 
+    def test_hidden_dirs_are_fresh_for_each_run(self):
+        for _ in range(3):
+            result, output = self.execute_run(
+                "/bin/sh",
+                "-c",
+                "test -e /tmp/test_file && echo EXISTS; touch /tmp/test_file",
+            )
+            self.check_exitcode(result, 0, "exit code of process is not 0")
+            self.assertNotIn("EXISTS", output, "file of previous run exists")
+
+
+class TestRunExecutorWithMountTemplate(TestRunExecutorWithContainer):
+    def setUp(self, *args, **kwargs):
+        super(TestRunExecutorWithMountTemplate, self).setUp(
+            *args, mount_template=True, **kwargs
+        )
+
+    def get_runexec_cmdline(self, *args, **kwargs):
+        return [
+            "python3",
+            runexec,
+            "--mount-template",
+        ] + super(
+            TestRunExecutorWithMountTemplate, self
+        ).get_runexec_cmdline(*args, **kwargs)[2:]
+
+    def test_mount_template_is_reused(self):
+        self.execute_run("/bin/true")
+        mount_template = self.runexecutor._mount_template
+        self.assertIsNotNone(mount_template, "mount template was not created")
+        self.execute_run("/bin/true")
+        self.assertIs(self.runexecutor._mount_template, mount_template)
+
+
+class TestRunExecutorWithPreparedContainer(TestRunExecutorWithContainer):
+    def setUp(self, *args, **kwargs):
+        super(TestRunExecutorWithPreparedContainer, self).setUp(
+            *args, prepare_container=True, **kwargs
+        )
+
+    def get_runexec_cmdline(self, *args, **kwargs):
+        return [
+            "python3",
+            runexec,
+            "--prepare-container",
+        ] + super(
+            TestRunExecutorWithPreparedContainer, self
+        ).get_runexec_cmdline(*args, **kwargs)[2:]
+
+    def test_prepared_container_is_used(self):
+        self.execute_run("/bin/true")
+        prepared_container = self.runexecutor._prepared_container
+        self.assertIsNotNone(prepared_container, "no container was prepared")
+
+        result, output = self.execute_run("/bin/echo", "TEST_TOKEN")
+        self.check_exitcode(result, 0, "exit code of process is not 0")
+        self.assertEqual(output[-1], "TEST_TOKEN", "run in prepared container failed")
+        self.assertIsNot(
+            self.runexecutor._prepared_container,
+            prepared_container,
+            "prepared container was not used",
+        )
+        self.assertFalse(self.runexecutor._claimed_containers)
+
+    def test_prepared_container_with_other_parameters(self):
+        self.execute_run("/bin/true")
+        self.assertIsNotNone(self.runexecutor._prepared_container)
+        # the prepared container has no output directory and is not usable
+        self.check_result_files("echo TEST_TOKEN > TEST_FILE", ["."], ["TEST_FILE"])
+        self.check_result_files("echo TEST_TOKEN > TEST_FILE", ["."], ["TEST_FILE"])
+
 
 class _StopRunThread(threading.Thread):
     def __init__(self, delay, runexecutor):
@@ -0,0 +1,143 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import bz2
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+from benchexec import BenchExecException
+from benchexec import scheduling
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+RESULT_XML = """<?xml version="1.0" ?>
+<result>
+  <run name="../tasks/a.c" files="[../tasks/a.c]" properties="unreach-call">
+    <column title="status" value="true"/>
+    <column title="walltime" value="{a}s"/>
+  </run>
+  <run name="../tasks/b.c" files="[../tasks/b.c]">
+    <column title="status" value="TIMEOUT"/>
+    <column title="walltime" value="{b}s"/>
+  </run>
+  <run name="dummy task" files="[]">
+    <column title="walltime" value="{dummy}s"/>
+  </run>
+  <run name="../tasks/unfinished.c" files="[../tasks/unfinished.c]"/>
+</result>
+"""
+
+
+def make_run(identifier, sourcefiles=True, properties=()):
+    return types.SimpleNamespace(
+        identifier=identifier,
+        sourcefiles=[identifier] if sourcefiles else [],
+        properties=[types.SimpleNamespace(name=p) for p in properties],
+    )
+
+
+class TestRuntimePredictor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_scheduling_")
+        self.results_dir = os.path.join(self.base_dir, "results")
+        self.tasks_dir = os.path.join(self.base_dir, "tasks")
+        os.mkdir(self.results_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def write_result_file(self, name, compress=False, **walltimes):
+        content = RESULT_XML.format(**walltimes).encode()
+        filename = os.path.join(self.results_dir, name)
+        if compress:
+            filename += ".bz2"
+            content = bz2.compress(content)
+        with open(filename, "wb") as f:
+            f.write(content)
+        return filename
+
+    def test_predict(self):
+        result_file = self.write_result_file("r.xml", a=10, b=900, dummy=1.5)
+        predictor = scheduling.RuntimePredictor([result_file])
+
+        a = make_run(os.path.join(self.tasks_dir, "a.c"), properties=["unreach-call"])
+        b = make_run(os.path.join(self.tasks_dir, "b.c"))
+        dummy = make_run("dummy task", sourcefiles=False)
+        self.assertEqual(predictor.predict(a), 10)
+        self.assertEqual(predictor.predict(b), 900)
+        self.assertEqual(predictor.predict(dummy), 1.5)
+
+    def test_predict_unknown(self):
+        result_file = self.write_result_file("r.xml", a=10, b=900, dummy=1.5)
+        predictor = scheduling.RuntimePredictor([result_file])
+
+        other_property = make_run(os.path.join(self.tasks_dir, "a.c"))
+        unfinished = make_run(os.path.join(self.tasks_dir, "unfinished.c"))
+        unknown = make_run(os.path.join(self.tasks_dir, "c.c"))
+        self.assertIsNone(predictor.predict(other_property))
+        self.assertIsNone(predictor.predict(unfinished))
+        self.assertIsNone(predictor.predict(unknown))
+
+    def test_predict_mean_of_several_files(self):
+        result_files = [
+            self.write_result_file("r1.xml", a=10, b=900, dummy=1),
+            self.write_result_file("r2.xml", compress=True, a=20, b=900, dummy=2),
+        ]
+        predictor = scheduling.RuntimePredictor(result_files)
+
+        a = make_run(os.path.join(self.tasks_dir, "a.c"), properties=["unreach-call"])
+        self.assertEqual(predictor.predict(a), 15)
+
+    def test_predict_walltimes_with_fallback(self):
+        result_file = self.write_result_file("r.xml", a=10, b=20, dummy=30)
+        predictor = scheduling.RuntimePredictor([result_file])
+
+        runs = [
+            make_run(os.path.join(self.tasks_dir, "c.c")),
+            make_run(os.path.join(self.tasks_dir, "b.c")),
+            make_run("dummy task", sourcefiles=False),
+        ]
+        self.assertEqual(predictor.predict_walltimes(runs), [25, 20, 30])
+
+    def test_invalid_result_file(self):
+        result_file = os.path.join(self.results_dir, "invalid.xml")
+        with open(result_file, "w") as f:
+            f.write("<result>")
+        self.assertRaises(
+            BenchExecException, scheduling.RuntimePredictor, [result_file]
+        )
+        self.assertRaises(
+            BenchExecException,
+            scheduling.RuntimePredictor,
+            [os.path.join(self.results_dir, "missing.xml")],
+        )
+
+
+class TestScheduling(unittest.TestCase):
+    def test_order_longest_first(self):
+        runs, walltimes = scheduling.order_longest_first(
+            ["a", "b", "c", "d"], [1, 5, 1, 3]
+        )
+        self.assertEqual(runs, ["b", "d", "a", "c"])
+        self.assertEqual(walltimes, [5, 3, 1, 1])
+
+    def test_predict_makespan(self):
+        self.assertEqual(scheduling.predict_makespan([], 4), 0)
+        self.assertEqual(scheduling.predict_makespan([3, 1, 2], 1), 6)
+        self.assertEqual(scheduling.predict_makespan([3, 1, 2], 8), 3)
+        self.assertEqual(scheduling.predict_makespan([1, 1, 1, 1, 4], 2), 6)
+        self.assertEqual(scheduling.predict_makespan([4, 1, 1, 1, 1], 2), 4)
+        self.assertRaises(ValueError, scheduling.predict_makespan, [1], 0)
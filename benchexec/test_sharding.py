@@ -0,0 +1,67 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from benchexec import sharding
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestSharding(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(sharding.parse_shard("1/1"), (1, 1))
+        self.assertEqual(sharding.parse_shard("3/4"), (3, 4))
+        for invalid in ["", "1", "0/2", "3/2", "a/b", "1/2/3"]:
+            self.assertRaises(argparse.ArgumentTypeError, sharding.parse_shard, invalid)
+
+    def test_assign_shards_by_hash(self):
+        run_ids = [f"task{i}.c\0unreach-call\0" for i in range(1000)]
+        shards = sharding.assign_shards(run_ids, 4)
+        self.assertEqual(shards, sharding.assign_shards(run_ids, 4))
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        for shard in range(1, 5):
+            self.assertAlmostEqual(shards.count(shard), 250, delta=50)
+
+        # assignment of a run does not depend on the other runs
+        self.assertEqual(sharding.assign_shards(run_ids[500:], 4), shards[500:])
+
+    def test_assign_shards_by_walltime(self):
+        run_ids = ["a", "b", "c", "d", "e"]
+        walltimes = [1, 10, 4, 5, 2]
+        shards = sharding.assign_shards(run_ids, 2, walltimes)
+        self.assertEqual(shards, sharding.assign_shards(run_ids, 2, walltimes))
+        load = {
+            shard: sum(w for w, s in zip(walltimes, shards) if s == shard)
+            for shard in [1, 2]
+        }
+        self.assertEqual(sorted(load.values()), [11, 11])
+
+    def test_find_latest_execution(self):
+        output_dir = tempfile.mkdtemp(prefix="BenchExec_test_sharding_")
+        try:
+            prefix = os.path.join(output_dir, "bench")
+            self.assertEqual(sharding.find_latest_execution(prefix), (None, None))
+            for name in [
+                "bench.2015-01-01_00-00-00.results.xml",
+                "bench.2015-01-02_00-00-00.results.rundef.xml.bz2",
+                "bench.2015-01-02_00-00-00.results.rundef.txt",
+                "bench.2015-01-03_00-00-00.logfiles.zip",
+                "bench.other.2015-01-04_00-00-00.results.xml",
+            ]:
+                open(os.path.join(output_dir, name), "w").close()
+
+            base_name, result_file = sharding.find_latest_execution(prefix)
+            self.assertEqual(base_name, prefix + ".2015-01-02_00-00-00")
+            self.assertEqual(result_file, base_name + ".results.rundef.xml.bz2")
+        finally:
+            shutil.rmtree(output_dir)
@@ -0,0 +1,95 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+import unittest
+
+from benchexec import supervisor
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class FakeTimeLimit(object):
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.checks = 0
+        self.finished = threading.Event()
+
+    def check(self):
+        self.checks += 1
+        if self.delays:
+            return self.delays.pop(0)
+        self.finished.set()
+        return None
+
+
+class FakeEventHandler(object):
+    def __init__(self):
+        self.efd = os.eventfd(0, os.EFD_CLOEXEC)
+        self.handled = threading.Event()
+        self.closed = threading.Event()
+
+    def fileno(self):
+        return self.efd
+
+    def handle_event(self):
+        self.handled.set()
+
+    def close(self):
+        os.close(self.efd)
+        self.closed.set()
+
+
+class TestRunSupervisor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        logging.disable(logging.CRITICAL)
+        cls.supervisor = supervisor.RunSupervisor.get_instance()
+        if not cls.supervisor:
+            raise unittest.SkipTest("event loop for supervision not supported")
+
+    def setUp(self):
+        self.process = subprocess.Popen(["sleep", "60"])
+        self.run = self.supervisor.supervise(self.process.pid)
+
+    def tearDown(self):
+        self.run.cancel()
+        self.process.kill()
+        self.process.wait()
+
+    def test_time_limit_is_checked_until_finished(self):
+        time_limit = FakeTimeLimit([0.01, 0.01])
+        self.run.add_time_limit(time_limit)
+        self.assertTrue(time_limit.finished.wait(10))
+        self.assertEqual(time_limit.checks, 3)
+
+    def test_cancel_stops_checks(self):
+        time_limit = FakeTimeLimit([0.1] * 100)
+        self.run.add_time_limit(time_limit)
+        self.run.cancel()
+        checks = time_limit.checks
+        self.assertFalse(time_limit.finished.wait(0.3))
+        self.assertEqual(time_limit.checks, checks)
+
+    def test_event_handler(self):
+        event_handler = FakeEventHandler()
+        self.run.add_event_handler(event_handler)
+        os.eventfd_write(event_handler.efd, 1)
+        self.assertTrue(event_handler.handled.wait(10))
+        self.assertTrue(event_handler.closed.wait(10))
+
+    def test_limits_cancelled_on_process_termination(self):
+        event_handler = FakeEventHandler()
+        self.run.add_event_handler(event_handler)
+        self.process.kill()
+        self.assertTrue(event_handler.closed.wait(10))
+        self.assertFalse(event_handler.handled.is_set())
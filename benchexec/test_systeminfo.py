@@ -0,0 +1,158 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from benchexec import systeminfo
+from benchexec import util
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestSystemHealthMonitor(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_systeminfo_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.cpu_dir = os.path.join(self.base_dir, "cpu")
+        self.proc_dir = os.path.join(self.base_dir, "proc")
+        os.mkdir(self.proc_dir)
+        for core in range(2):
+            os.makedirs(os.path.join(self.cpu_dir, f"cpu{core}", "thermal_throttle"))
+            os.makedirs(os.path.join(self.cpu_dir, f"cpu{core}", "cpufreq"))
+            self.set_throttle_count(core, 0)
+            self.set_frequency(core, 1000000)
+        self.set_swap_count(0)
+        self.set_load(0.5)
+        self.monitor = self.create_monitor()
+
+    def create_monitor(self, buffer_size=100):
+        monitor = systeminfo.SystemHealthMonitor(
+            sample_interval=1000,
+            buffer_size=buffer_size,
+            cpu_dir=self.cpu_dir,
+            proc_dir=self.proc_dir,
+        )
+        monitor.start()
+        self.addCleanup(monitor.stop)
+        return monitor
+
+    def set_throttle_count(self, core, count):
+        throttle_dir = os.path.join(self.cpu_dir, f"cpu{core}", "thermal_throttle")
+        util.write_file(f"{count}\n", throttle_dir, "core_throttle_count")
+        util.write_file("0\n", throttle_dir, "package_throttle_count")
+
+    def set_frequency(self, core, frequency):
+        cpufreq_dir = os.path.join(self.cpu_dir, f"cpu{core}", "cpufreq")
+        util.write_file(f"{frequency}\n", cpufreq_dir, "scaling_cur_freq")
+
+    def set_swap_count(self, count):
+        util.write_file(
+            f"nr_free_pages 1000\npswpin {count}\npswpout 0\npswpout_zero 7\n",
+            self.proc_dir,
+            "vmstat",
+        )
+
+    def set_load(self, load):
+        util.write_file(f"{load} 0.20 0.10 1/100 1234\n", self.proc_dir, "loadavg")
+
+    def test_healthy_system(self):
+        start = self.monitor.sample().time
+        end = self.monitor.sample().time
+        self.assertDictEqual(
+            self.monitor.get_statistics(start, end),
+            {
+                "cpu-throttled": False,
+                "swapped": False,
+                "cpufreq-min": 1000000000,
+                "cpufreq-avg": 1000000000,
+                "cpufreq-max": 1000000000,
+                "loadavg-max": 0.5,
+            },
+        )
+
+    def test_throttled_on_cores_of_run(self):
+        start = self.monitor.sample().time
+        self.set_throttle_count(1, 5)
+        end = self.monitor.sample().time
+        self.assertTrue(self.monitor.get_statistics(start, end)["cpu-throttled"])
+        self.assertTrue(self.monitor.get_statistics(start, end, [1])["cpu-throttled"])
+        self.assertFalse(self.monitor.get_statistics(start, end, [0])["cpu-throttled"])
+
+    def test_only_events_during_period(self):
+        self.set_swap_count(10)
+        self.set_throttle_count(0, 1)
+        start = self.monitor.sample().time
+        end = self.monitor.sample().time
+        self.set_swap_count(20)
+        self.set_load(8)
+        self.monitor.sample()
+        health = self.monitor.get_statistics(start, end)
+        self.assertFalse(health["swapped"])
+        self.assertFalse(health["cpu-throttled"])
+        self.assertEqual(health["loadavg-max"], 0.5)
+
+    def test_sample_at_end_of_period(self):
+        start = self.monitor.sample().time
+        self.set_swap_count(1)
+        end = time.monotonic()
+        # no sample after end exists yet, so one is taken
+        health = self.monitor.get_statistics(start, end)
+        self.assertTrue(health["swapped"])
+
+    def test_frequency_statistics(self):
+        start = self.monitor.sample().time
+        self.set_frequency(0, 2000000)
+        self.monitor.sample()
+        self.set_frequency(0, 3000000)
+        end = self.monitor.sample().time
+        health = self.monitor.get_statistics(start, end, [0])
+        self.assertEqual(health["cpufreq-min"], 2000000000)
+        self.assertEqual(health["cpufreq-avg"], 2500000000)
+        self.assertEqual(health["cpufreq-max"], 3000000000)
+
+    def test_period_older_than_buffer(self):
+        monitor = self.create_monitor(buffer_size=2)
+        start = monitor.sample().time
+        self.set_throttle_count(0, 1)
+        for _ in range(3):
+            monitor.sample()
+        end = monitor.sample().time
+        self.assertTrue(monitor.get_statistics(start, end)["cpu-throttled"])
+
+    def test_keep_history(self):
+        monitor = self.create_monitor(buffer_size=2)
+        monitor.keep_history(5 * monitor.sample_interval)
+        self.set_throttle_count(0, 1)  # before the period
+        start = monitor.sample().time
+        end = monitor.sample().time
+        for _ in range(3):
+            monitor.sample()
+        # without enough history, the throttling would be attributed to the period
+        self.assertFalse(monitor.get_statistics(start, end)["cpu-throttled"])
+
+    def test_set_sample_interval(self):
+        monitor = self.create_monitor(buffer_size=10)
+        monitor.set_sample_interval(monitor.sample_interval / 2)
+        for _ in range(20):
+            monitor.sample()
+        self.assertEqual(len(monitor._samples), 20)
+
+    def test_missing_information(self):
+        shutil.rmtree(self.cpu_dir)
+        os.remove(os.path.join(self.proc_dir, "vmstat"))
+        monitor = self.create_monitor()
+        start = monitor.sample().time
+        self.assertDictEqual(monitor.get_statistics(start, start), {"loadavg-max": 0.5})
+
+    def test_shared_instance(self):
+        monitor = systeminfo.get_system_health_monitor()
+        self.assertIs(monitor, systeminfo.get_system_health_monitor())
@@ -54,6 +54,57 @@ class TestParse(unittest.TestCase):
         self.assertEqual(util.parse_timespan_value("1h"), 60 * 60)
         self.assertEqual(util.parse_timespan_value("1d"), 24 * 60 * 60)
 
+    def test_parse_address(self):
+        self.assertEqual(util.parse_address("1234"), ("localhost", 1234))
+        self.assertEqual(util.parse_address(":1234"), ("localhost", 1234))
+        self.assertEqual(util.parse_address("0.0.0.0:1234"), ("0.0.0.0", 1234))
+        self.assertEqual(util.parse_address("[::1]:1234"), ("::1", 1234))
+        self.assertRaises(ValueError, util.parse_address, "")
+        self.assertRaises(ValueError, util.parse_address, "host")
+        self.assertRaises(ValueError, util.parse_address, "host:70000")
+
+    def test_get_seconds_from_xml(self):
+        from xml.etree import ElementTree
+
+        run = ElementTree.fromstring(
+            '<run><column title="cputime" value="1.5s"/>'
+            '<column title="walltime" value="error"/></run>'
+        )
+        self.assertEqual(util.get_seconds_from_xml(run, "cputime"), 1.5)
+        self.assertIsNone(util.get_seconds_from_xml(run, "walltime"))
+        self.assertIsNone(util.get_seconds_from_xml(run, "memory"))
+
+
+class TestReadXmlFile(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_util_")
+
+    def tearDown(self):
+        util.rmtree(self.base_dir)
+
+    def test_compressed_files(self):
+        import bz2
+        import gzip
+
+        content = b'<result starttime="2020-01-01T00:00:00"/>'
+        for suffix, compress in [("", bytes), (".bz2", bz2.compress)]:
+            filename = os.path.join(self.base_dir, "results.xml" + suffix)
+            with open(filename, "wb") as f:
+                f.write(compress(content))
+            self.assertEqual(util.read_xml_file(filename).tag, "result")
+        filename = os.path.join(self.base_dir, "results.xml.gz")
+        with gzip.open(filename, "wb") as f:
+            f.write(content)
+        self.assertEqual(util.read_xml_file(filename).tag, "result")
+
+    def test_invalid_file(self):
+        filename = os.path.join(self.base_dir, "results.xml")
+        util.write_file("<result>", filename)
+        self.assertRaises(util.BenchExecException, util.read_xml_file, filename)
+        self.assertRaises(
+            util.BenchExecException, util.read_xml_file, filename + ".missing"
+        )
+
 
 class TestProcessExitCode(unittest.TestCase):
     @classmethod
@@ -23,11 +23,10 @@ import signal as _signal
 import stat
 import subprocess
 import sys
-from ctypes.util import find_library
-import ctypes
-from xml.etree import ElementTree
 from shlex import quote as escape_string_shell  # noqa: F401 @UnusedImport
 
+from benchexec import BenchExecException
+
 
 _BYTE_FACTOR = 1000  # byte in kilobyte
 _FREQUENCY_FACTOR = 1000  # Hz in kHz
@@ -98,12 +97,56 @@ def copy_of_xml_element(elem):
     In Python 2.7 you can use  'copyElem = elem.copy()'  instead.
     """
 
+    from xml.etree import ElementTree
+
     copyElem = ElementTree.Element(elem.tag, elem.attrib)
     for child in elem:
         copyElem.append(child)
     return copyElem
 
 
+def read_xml_file(filename):
+    """
+    Parse an XML file like a result file of benchexec,
+    which may be compressed with bzip2 or gzip (as indicated by its extension).
+    @return: the root element of the file
+    @raise BenchExecException: if the file cannot be read or parsed
+    """
+    from xml.etree import ElementTree
+
+    if filename.endswith(".bz2"):
+        import bz2
+
+        open_func = bz2.BZ2File
+    elif filename.endswith(".gz"):
+        import gzip
+
+        open_func = gzip.GzipFile
+    else:
+        open_func = open
+    try:
+        with open_func(filename, "rb") as f:
+            return ElementTree.parse(f).getroot()
+    except (OSError, EOFError, ElementTree.ParseError) as e:
+        raise BenchExecException(f"Could not read result file {filename}: {e}")
+
+
+def get_seconds_from_xml(elem, title):
+    """
+    Parse the value of a column like "1.23s" in a result file, if present.
+    @param elem: the XML element of a run or run set
+    @param title: the title of the column
+    @return: the value in seconds as float, or None
+    """
+    column = elem.find(f"column[@title='{title}']")
+    if column is None:
+        return None
+    try:
+        return float(column.get("value", "").rstrip("s"))
+    except ValueError:
+        return None
+
+
 _ILLEGAL_XML_CHARS = re.compile(r"[^\x09\x0A\x0D\x20-\xD7FF\xE000-\xFFFD]")
 
 
@@ -169,6 +212,22 @@ def parse_int_list(s):
     return result
 
 
+def parse_address(s):
+    """
+    Parse a network address of the form "[HOST:]PORT",
+    where HOST defaults to localhost.
+    @return a pair of the host name and the port (as int)
+    """
+    host, _, port = s.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        raise InputValueError(f"invalid port: '{s}'")
+    if not 0 <= port <= 65535:
+        raise InputValueError(f"port out of range: '{s}'")
+    return host.strip("[]") or "localhost", port
+
+
 def split_number_and_unit(s):
     """Parse a string that consists of a integer number and an optional unit.
     @param s a non-empty string that starts with an int and is followed by some letters
@@ -733,6 +792,9 @@ def get_capability(filename):
 
         @filename: The complete path to the file
     """
+    import ctypes
+    from ctypes.util import find_library
+
     res = {"capabilities": [], "set": [], "error": False}
     try:
         libcap_path = find_library("cap")